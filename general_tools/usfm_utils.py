@@ -3,39 +3,83 @@
 from __future__ import unicode_literals
 import re
 
+# Alignment and word markup, in the order unalign_usfm() originally removed it, one pass per pattern.
+alignment_steps = [
+    (re.compile(r'\\ts(-s)*\s*\\\*\s*'), r''),
+    (re.compile(r'\\zaln-s[^*]*?\*'), r''),
+    (re.compile(r'\\zaln-e\\\*'), r''),
+    (re.compile(r'\\k-s.*?\\\*'), r''),
+    (re.compile(r'\\k-e\\\*'), r''),
+    (re.compile(r'\\w ([^|]+)\|.*?\\w\*'), r'\1'),
+]
+
+# The same markup, removed in a single pass.
+# The contents of each marker must not include a backslash, so that no marker can hide another.
+# The last group matches any marker that the others do not. If it matches, the single pass is abandoned.
+alignment_re = re.compile(r'\\(?:ts(?:-s)*\s*\\\*\s*|zaln-s[^*\\]*\\?\*|zaln-e\\\*|k-s[^\\\n]*\\\*|k-e\\\*|'
+                          r'w ([^|\\]+)\|[^\\\n]*\\w\*|(ts|zaln-s|zaln-e\\\*|k-s|k-e\\\*|w ))')
+alignment_starts = ('\\ts', '\\zaln-s', '\\zaln-e\\*', '\\k-s', '\\k-e\\*', '\\w ')
+
+
+blank_lines_re = re.compile(r'\n\n+')
+continued_line_re = re.compile(r'\n(?=[^\\])')
+spaces_re = re.compile(r'  +')
+apostrophe_s_re = re.compile(r"\s*' s(?!\w)")
+fqa_re = re.compile(r'\\fqa([^*]+)\\fqa(?![*])')
+quotes_re = re.compile(r'\s*"\s*([^"]+)\s*"\s*')
+marker_punctuation_re = re.compile(r'\\(\w+\**)([^\w* \n])')
+space_before_re = re.compile(r' +([:;.?,!\]})-])')
+space_after_re = re.compile(r'([{(\[-]) +')
+
+
+def remove_alignment(usfm):
+    """
+    Removes alignment milestones, \\ts markers and word attributes.
+    The single pass gives the same result as the separate passes in alignment_steps,
+    provided every marker is regular and removing them does not form new markers.
+    Otherwise the separate passes are made instead.
+    :param usfm:
+    :return: the usfm without alignment markup
+    """
+    # Text, word, irregular marker, text, word, irregular marker, ..., text
+    parts = alignment_re.split(usfm)
+    if parts[2::3].count(None) == len(parts) // 3:
+        result = ''.join(filter(None, parts))
+        if not any(start in result for start in alignment_starts):
+            return result
+    for (pattern, replacement) in alignment_steps:
+        usfm = pattern.sub(replacement, usfm)
+    return usfm
+
 
 def unalign_usfm(aligned_usfm):
     """
-    Converts an aligned USFM string to an unaligned USFM compatible string
+    Converts an aligned USFM string to an unaligned USFM compatible string.
+    Only the alignment markup is removed in a single pass.
+    Joining the lines and fixing the punctuation still take about ten more passes over the string.
     :param aligned_usfm:
     :return: the unaligned USFM of the string
     """
     # Remove all tags used for alignments and words
-    usfm = re.sub(r'\\ts(-s)*\s*\\\*\s*', r'', aligned_usfm, flags=re.UNICODE | re.MULTILINE)
-    usfm = re.sub(r'\\zaln-s[^*]*?\*', r'', usfm, flags=re.UNICODE | re.MULTILINE)
-    usfm = re.sub(r'\\zaln-e\\\*', r'', usfm, flags=re.UNICODE | re.MULTILINE)
-    usfm = re.sub(r'\\k-s.*?\\\*', r'', usfm, flags=re.UNICODE | re.MULTILINE)
-    usfm = re.sub(r'\\k-e\\\*', r'', usfm, flags=re.UNICODE | re.MULTILINE)
-    usfm = re.sub(r'\\w ([^|]+)\|.*?\\w\*', r'\1', usfm, flags=re.UNICODE | re.MULTILINE)
-    usfm = re.sub(r'^\n', '', usfm, flags=re.UNICODE | re.MULTILINE)
-    usfm = re.sub(r'^([^\\].*)\n(?=[^\\])', r'\1 ', usfm, flags=re.UNICODE | re.MULTILINE)
-    usfm = re.sub(r'^\\(.*)\n(?=[^\\])', r'\\\1 ', usfm, flags=re.UNICODE | re.MULTILINE)
-    usfm = re.sub(r'  +', ' ', usfm, flags=re.UNICODE | re.MULTILINE)
+    usfm = remove_alignment(aligned_usfm)
+    # Remove blank lines, then join each line that does not start with a marker to the previous line
+    usfm = blank_lines_re.sub('\n', usfm.lstrip('\n'))
+    usfm = continued_line_re.sub(' ', usfm)
+    usfm = spaces_re.sub(' ', usfm)
 
     # Clean up bad USFM data and fixing punctuation
-    usfm = re.sub(r"\s*' s(?!\w)", "'s", usfm, flags=re.UNICODE | re.MULTILINE)
-    usfm = re.sub(r'\\s5', '', usfm, flags=re.UNICODE | re.MULTILINE)
-    usfm = re.sub(r'\\fqa([^*]+)\\fqa(?![*])', r'\\fqa\1\\fqa*', usfm, flags=re.UNICODE | re.MULTILINE)
+    if "' s" in usfm:
+        usfm = apostrophe_s_re.sub("'s", usfm)
+    usfm = usfm.replace('\\s5', '')
+    if '\\fqa' in usfm:
+        usfm = fqa_re.sub(r'\\fqa\1\\fqa*', usfm)
 
     # Pair up quotes by chapter
-    chapters = re.compile(r'\\c ').split(usfm)
-    usfm = chapters[0]
-    for chapter in chapters[1:]:
-        chapter = re.sub(r'\s*"\s*([^"]+)\s*"\s*', r' "\1" ', chapter, flags=re.UNICODE | re.MULTILINE | re.DOTALL)
-        usfm += '\\c {0}'.format(chapter)
-    usfm = re.sub(r'\\(\w+\**)([^\w* \n])', r'\\\1 \2', usfm, flags=re.UNICODE | re.MULTILINE)  # \\q1" => \q1 "
-    usfm = re.sub(r" ' ", r" '", usfm, flags=re.UNICODE | re.MULTILINE)
-    usfm = re.sub(r' +([:;.?,!\]})-])', r'\1', usfm, flags=re.UNICODE | re.MULTILINE)
-    usfm = re.sub(r'([{(\[-]) +', r'\1', usfm, flags=re.UNICODE | re.MULTILINE)
+    chapters = usfm.split('\\c ')
+    usfm = '\\c '.join(chapters[:1] + [quotes_re.sub(r' "\1" ', chapter) for chapter in chapters[1:]])
+    usfm = marker_punctuation_re.sub(r'\\\1 \2', usfm)  # \\q1" => \q1 "
+    usfm = usfm.replace(" ' ", " '")
+    usfm = space_before_re.sub(r'\1', usfm)
+    usfm = space_after_re.sub(r'\1', usfm)
 
     return usfm.strip()
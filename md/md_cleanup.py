@@ -419,17 +419,18 @@ def preliminary_cleanup(text):
 
 # Applies the substitutions found in substitutions.py, plus two that are language specific
 def substitution(text):
+    subs = substitutions.subs
     if language_code != 'en':
 #        fromstr = "rc://" + language_code + "/"
 #        text = text.replace(fromstr, "rc://*/")
 #        fromstr = "rc://" + language_code + " /"
 #        text = text.replace(fromstr, "rc://*/")
-        substitutions.subs.append(	("rc://" + language_code + "/", "rc://*/") )
-        substitutions.subs.append(	("rc://" + language_code + " /", "rc://*/") )
-        substitutions.subs.append(	("rc:// " + language_code + "/", "rc://*/") )
-        substitutions.subs.append(	("rc://en/", "rc://*/") )
+        subs = subs + [	("rc://" + language_code + "/", "rc://*/"),
+                        ("rc://" + language_code + " /", "rc://*/"),
+                        ("rc:// " + language_code + "/", "rc://*/"),
+                        ("rc://en/", "rc://*/") ]
 
-    for pair in substitutions.subs:
+    for pair in subs:
         text = text.replace(pair[0], pair[1])
     if resource_type == 'tq':
         text = text.replace("\n\n\n", "\n\n")
@@ -464,7 +465,7 @@ def convertWholeFile(source, target):
 
     if not text.startswith("# "):
         if not suppress2:
-            sys.stdout.write(os.path.relpath(source, source_dir)) + " does not begin with level 1 heading, so no headings will be touched.\n")
+            sys.stdout.write(os.path.relpath(source, source_dir) + " does not begin with level 1 heading, so no headings will be touched.\n")
         fixHeadings = False
 
     # Do the hash level fixes and TA references
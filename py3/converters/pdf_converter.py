@@ -24,8 +24,10 @@ import argparse
 import jsonpickle
 import yaml
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
 from typing import List, Type
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 from abc import abstractmethod
 from weasyprint import HTML, LOGGER
 from .resource import Resource, Resources
@@ -41,12 +43,20 @@ LANGUAGE_FILES = {
 }
 APPENDIX_LINKING_LEVEL = 1
 APPENDIX_RESOURCES = ['ta', 'tw']
+SPLIT_PART_SIZE = 1000000  # Characters of HTML in each part when rendering the PDF in parts
+PAGE_PROBE_LABEL = 'split-page-probe'  # Bookmark label prefix that reports the number printed on a part's first page
+PAGE_PROBE_STYLE = f'html {{ bookmark-level: 1; bookmark-label: "{PAGE_PROBE_LABEL} " counter(page); }}\n'
+PAGES_COUNTER_RE = re.compile(r'counter\(\s*pages\s*(,[^)]*)?\)')  # Replaced by the page count in each part
+RUNNING_STRINGS = {  # The string-set selectors of css/style.css, carried over into each part
+    'heading-left': '.manual-cover h2, .resource-title-page h1, h1.section-header',
+    'heading-right': '.heading-right'
+}
 
 
 class PdfConverter:
 
     def __init__(self, resources: Resources, project_id=None, working_dir=None, output_dir=None,
-                 lang_code=DEFAULT_LANG_CODE, regenerate=False, logger=None):
+                 lang_code=DEFAULT_LANG_CODE, regenerate=False, logger=None, split_jobs=0):
         self.resources = resources
         self.main_resource = self.resources.main
         self.project_id = project_id
@@ -55,6 +65,7 @@ class PdfConverter:
         self.lang_code = lang_code
         self.regenerate = regenerate
         self.logger = logger
+        self.split_jobs = split_jobs
 
         self.save_dir = None
         self.log_dir = None
@@ -307,8 +318,11 @@ class PdfConverter:
     def generate_pdf(self):
         if self.regenerate or not os.path.exists(self.pdf_file):
             self.logger.info(f'Generating PDF file {self.pdf_file}...')
-            weasy = HTML(filename=self.html_file, base_url=f'file://{self.output_res_dir}/')
-            weasy.write_pdf(self.pdf_file)
+            if self.split_jobs:
+                self.generate_pdf_in_parts()
+            else:
+                weasy = HTML(filename=self.html_file, base_url=f'file://{self.output_res_dir}/')
+                weasy.write_pdf(self.pdf_file)
             self.logger.info('Generated PDF file.')
             self.logger.info(f'PDF file located at {self.pdf_file}')
 
@@ -318,6 +332,258 @@ class PdfConverter:
             self.logger.info(
                 f'PDF file {self.pdf_file} is already there. Not generating. Use -r to force regeneration.')
 
+    def generate_pdf_in_parts(self):
+        # Each part of the HTML is laid out in a worker process to get its page count, the number printed on its
+        # first page, its anchors, links and bookmarks. Then it is rendered again with its page counter set to
+        # carry on from the part before, counter(pages) replaced by the page count and (for the part with the TOC)
+        # the TOC page numbers filled in. The part PDFs are then merged, putting back the links between parts
+        # and the bookmarks
+        base_url = f'file://{self.output_res_dir}/'
+        soup = BeautifulSoup(read_file(self.html_file), 'html.parser')
+        parts = self.get_html_parts(soup)
+        html_tag = str(soup.new_tag('html', attrs=soup.html.attrs)).replace('</html>', '')
+        head_html = str(soup.head)
+        soup.decompose()
+        jobs = min(self.split_jobs, len(parts))
+
+        def write_part_html(html_file, part_head_html, part_html, style=''):
+            part_head_html = part_head_html.replace('</head>', f'<style>\n{PAGE_PROBE_STYLE}{style}</style>\n</head>')
+            write_file(html_file, f'<!DOCTYPE html>\n{html_tag}\n{part_head_html}\n<body>\n{part_html}\n</body>\n</html>')
+
+        self.logger.info(f'Rendering the HTML in {len(parts)} parts, {jobs} at a time...')
+        with tempfile.TemporaryDirectory(prefix='parts-', dir=self.output_res_dir) as parts_dir:
+            html_files = [os.path.join(parts_dir, f'part{idx:04d}.html') for idx in range(len(parts))]
+            pdf_files = [os.path.join(parts_dir, f'part{idx:04d}.pdf') for idx in range(len(parts))]
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                for html_file, part_html in zip(html_files, parts):
+                    write_part_html(html_file, head_html, part_html)
+                layouts = list(executor.map(layout_pdf_part, html_files, repeat(base_url)))
+
+                # The pages are numbered on from the number printed on the first page, which depends on what the
+                # stylesheets set the page counter to there (style.css prints 1, obs_style.css -1). Setting the
+                # page counter anywhere else is not supported
+                page_count = sum(len(layout['pages']) for layout in layouts)
+                first_number = layouts[0]['first_number']
+                anchor_numbers = {}
+                first_page = 0
+                for layout in layouts:
+                    layout['first_page'] = first_page
+                    for anchor, position in layout['anchors'].items():
+                        anchor_numbers.setdefault(anchor, first_number + first_page + position[0])
+                    first_page += len(layout['pages'])
+                self.logger.info(f'Laid out {page_count} pages. Rendering the parts with their page numbers...')
+                stylesheets = []
+                try:
+                    part_head_html = self.get_head_html_with_page_count(head_html, page_count, stylesheets)
+                    for html_file, part_html, layout in zip(html_files, parts, layouts):
+                        style = ''
+                        if layout['first_page']:
+                            style += f'@page :first {{ counter-set: page {first_number + layout["first_page"]}; }}\n'
+                        if 'id="contents"' in part_html:
+                            part_soup = BeautifulSoup(part_html, 'html.parser')
+                            for link in part_soup.select('#contents a[href^="#"]'):
+                                if link['href'][1:] in anchor_numbers:
+                                    link['data-page'] = str(anchor_numbers[link['href'][1:]])
+                            part_html = str(part_soup)
+                            style += '#contents ul li a::after { content: attr(data-page); }\n'
+                        write_part_html(html_file, part_head_html, part_html, style)
+                    renders = list(executor.map(write_pdf_part, html_files, repeat(base_url), pdf_files))
+                finally:
+                    for stylesheet in stylesheets:
+                        os.remove(stylesheet)
+            for pdf_file, layout, (part_page_count, part_first_number) in zip(pdf_files, layouts, renders):
+                # The page numbers, the TOC and the links all depend on the parts keeping their laid out pages
+                if part_page_count != len(layout['pages']):
+                    raise RuntimeError(f'{os.path.basename(pdf_file)} has {part_page_count} pages, '
+                                       f'but was laid out with {len(layout["pages"])}')
+                if part_first_number != first_number + layout['first_page']:
+                    raise RuntimeError(f'{os.path.basename(pdf_file)} starts at page number {part_first_number}, '
+                                       f'not {first_number + layout["first_page"]}')
+            self.logger.info(f'Merging the {len(parts)} PDF parts...')
+            self.merge_pdf_parts(pdf_files, layouts)
+
+    def get_head_html_with_page_count(self, head_html, page_count, stylesheets):
+        # Each part only knows its own page count, so counter(pages) is replaced by the page count of the whole
+        # document, in copies of the stylesheets next to them (so their relative URLs still work). The copies
+        # are added to stylesheets, for the caller to remove
+        head_soup = BeautifulSoup(head_html, 'html.parser')
+        for link in head_soup.select('link[rel~="stylesheet"][href]'):
+            css_file = os.path.join(self.output_res_dir, link['href'])
+            if not os.path.isfile(css_file):
+                continue
+            css = read_file(css_file)
+            if not PAGES_COUNTER_RE.search(css):
+                continue
+            fd, copy_file = tempfile.mkstemp(prefix=f'{self.file_base_id}-', suffix='.css',
+                                             dir=os.path.dirname(css_file))
+            os.close(fd)
+            stylesheets.append(copy_file)
+            write_file(copy_file, PAGES_COUNTER_RE.sub(f'"{page_count}"', css))
+            link['href'] = os.path.join(os.path.dirname(link['href']), os.path.basename(copy_file))
+        return str(head_soup)
+
+    def get_html_parts(self, soup):
+        # Splits the body at the page breaks between sections and articles, into parts of about SPLIT_PART_SIZE.
+        # The sections a part starts inside of are opened again around it, and the running headers in effect
+        # where it starts are set again at its start
+        running_strings = {}
+        for name, selector in RUNNING_STRINGS.items():
+            for tag in soup.body.select(selector):
+                running_strings.setdefault(id(tag), []).append((name, tag.get_text()))
+        part_units = [[]]
+        part_size = 0
+        for unit in self.get_split_units(soup.body, ()):
+            if part_size >= SPLIT_PART_SIZE:
+                part_units.append([])
+                part_size = 0
+            part_units[-1].append(unit)
+            part_size += unit[2]
+
+        parts = []
+        opened = set()
+        strings = {}
+        for units in part_units:
+            # Set inside the section or article the part starts with, or else right inside the section it
+            # starts at the beginning of, so it doesn't come before that section's page break
+            carried_html = ''
+            first_tag = next((node for node in units[0][1] if isinstance(node, Tag)), None)
+            if strings and first_tag:
+                first_strings = {name for tag in chain([first_tag], first_tag.find_all(True))
+                                 for name, text in running_strings.get(id(tag), [])}
+                carried = ', '.join(f'{name} "{self.get_css_string(text)}"' for name, text in strings.items()
+                                    if name not in first_strings)
+                if carried:
+                    carried_tag = soup.new_tag('div', attrs={'class': 'hidden', 'style': f'string-set: {carried}'})
+                    if first_tag.name in ['section', 'article']:
+                        first_tag.insert(0, carried_tag)
+                    else:
+                        carried_html = str(carried_tag)
+            html = ''
+            path = ()
+            for unit_path, nodes, size in units:
+                common = 0
+                while common < min(len(path), len(unit_path)) and path[common] is unit_path[common]:
+                    common += 1
+                for wrapper in reversed(path[common:]):
+                    html += f'</{wrapper.name}>\n'
+                for depth in range(common, len(unit_path)):
+                    html += self.get_wrapper_start_html(soup, unit_path, depth, nodes, opened)
+                path = unit_path
+                html += carried_html + ''.join(str(node) for node in nodes)
+                carried_html = ''
+                for node in nodes:
+                    if isinstance(node, Tag):
+                        for tag in chain([node], node.find_all(True)):
+                            for name, text in running_strings.get(id(tag), []):
+                                strings[name] = text
+            for wrapper in reversed(path):
+                html += f'</{wrapper.name}>\n'
+            parts.append(html)
+        return parts
+
+    def get_split_units(self, element, path):
+        # Returns (path, nodes, size) for each run of the element's children that starts with a page break,
+        # going into the children that are sections or articles bigger than a part
+        runs = []
+        for child in element.children:
+            if not runs or self.is_page_break_before(child):
+                runs.append([])
+            runs[-1].append(child)
+        units = []
+        for nodes in runs:
+            size = sum(len(str(node)) for node in nodes)
+            tags = [node for node in nodes if isinstance(node, Tag)]
+            if size > SPLIT_PART_SIZE and len(tags) == 1 and tags[0].name in ['section', 'article']:
+                sub_units = self.get_split_units(tags[0], path + (tags[0],))
+                if len(sub_units) > 1:
+                    units += sub_units
+                    continue
+            units.append((path, nodes, size))
+        return units
+
+    @staticmethod
+    def is_page_break_before(node):
+        # Follows the section and article page breaks of css/style.css
+        if not isinstance(node, Tag) or node.name not in ['section', 'article']:
+            return False
+        previous = node.find_previous_sibling(True)
+        if not previous or 'section-header' in previous.get('class', []):
+            return False
+        if node.parent.name == 'section' and not node.find_previous_sibling(node.name):
+            return False
+        return True
+
+    @staticmethod
+    def get_wrapper_start_html(soup, path, depth, nodes, opened):
+        # The wrapper keeps its id only the first time it is opened. When opened again, hidden sections and
+        # articles stand in for the children before this part so nth-of-type() still matches the same children
+        wrapper = path[depth]
+        attrs = dict(wrapper.attrs)
+        placeholders = ''
+        if id(wrapper) in opened:
+            attrs.pop('id', None)
+            if wrapper.name == 'section':
+                child = path[depth + 1] if depth + 1 < len(path) else next((node for node in nodes
+                                                                            if isinstance(node, Tag)), None)
+                for name in ['section', 'article']:
+                    if child and child.find_previous_sibling(name):
+                        placeholders += f'<{name} style="display: none"></{name}>'
+        opened.add(id(wrapper))
+        return str(soup.new_tag(wrapper.name, attrs=attrs)).replace(f'</{wrapper.name}>', '') + placeholders + '\n'
+
+    @staticmethod
+    def get_css_string(text):
+        return ' '.join(text.split()).replace('\\', '\\\\').replace('"', '\\"')
+
+    def merge_pdf_parts(self, pdf_files, layouts):
+        # pypdf is only needed to render in parts, so it is only imported here
+        from pypdf import PdfWriter
+        from pypdf.annotations import Link
+        from pypdf.generic import Fit
+
+        writer = PdfWriter()
+        anchors = {}
+        page_dests = []  # The named destinations of the links pypdf kept on each page
+        for pdf_file, layout in zip(pdf_files, layouts):
+            # pypdf keeps the links to named destinations it has already merged, so the links within the part
+            writer.append(pdf_file, import_outline=False)
+            if len(writer.pages) != layout['first_page'] + len(layout['pages']):
+                raise RuntimeError(f'{os.path.basename(pdf_file)} does not have the {len(layout["pages"])} pages '
+                                   f'it was laid out with')
+            for page in writer.pages[layout['first_page']:]:
+                page_dests.append({str(annotation.get_object().get('/Dest')) for annotation in page.get('/Annots', [])})
+            for anchor, (page_idx, x, y) in layout['anchors'].items():
+                anchors.setdefault(anchor, (layout['first_page'] + page_idx, x, y, layout['pages'][page_idx]))
+
+        def get_pdf_point(page_idx, size, x, y):
+            # WeasyPrint positions are in CSS pixels from the top left of the page
+            mediabox = writer.pages[page_idx].mediabox
+            scale = float(mediabox.width) / size[0]
+            return float(mediabox.left) + x * scale, float(mediabox.top) - y * scale
+
+        bookmark_parents = []
+        for layout in layouts:
+            for page_idx, anchor, rect in layout['links']:
+                page_idx += layout['first_page']
+                if anchor not in anchors or anchor in page_dests[page_idx]:
+                    continue
+                size = layout['pages'][page_idx - layout['first_page']]
+                target_page_idx, x, y, target_size = anchors[anchor]
+                link = Link(rect=get_pdf_point(page_idx, size, rect[0], rect[3]) + get_pdf_point(page_idx, size, rect[2], rect[1]),
+                            target_page_index=target_page_idx,
+                            fit=Fit.xyz(*get_pdf_point(target_page_idx, target_size, x, y)))
+                writer.add_annotation(page_number=page_idx, annotation=link)
+            for page_idx, level, label, x, y, state in layout['bookmarks']:
+                page_idx += layout['first_page']
+                size = layout['pages'][page_idx - layout['first_page']]
+                while bookmark_parents and bookmark_parents[-1][0] >= level:
+                    bookmark_parents.pop()
+                parent = bookmark_parents[-1][1] if bookmark_parents else None
+                bookmark = writer.add_outline_item(label, page_idx, parent=parent, is_open=state != 'closed',
+                                                   fit=Fit.xyz(*get_pdf_point(page_idx, size, x, y)))
+                bookmark_parents.append((level, bookmark))
+        writer.write(self.pdf_file)
+
     def save_bad_links_html(self):
         link_file_path = os.path.join(self.output_res_dir, f'{self.file_base_id}_bad_links.html')
 
@@ -416,7 +682,8 @@ class PdfConverter:
         self.logger.info(f'BAD HIGHLIGHTS file can be found at {save_file}')
 
     def setup_resource(self, resource):
-        resource.clone(self.working_dir)
+        if not resource.commit:  # Not already cloned for this run, e.g. by run_converter before starting its workers
+            resource.clone(self.working_dir)
         self.generation_info[resource.repo_name] = {'tag': resource.tag, 'commit': resource.commit}
         logo_path = os.path.join(self.images_dir, resource.logo_file)
         if not os.path.isfile(logo_path):
@@ -1044,6 +1311,107 @@ class PdfConverter:
         return text
 
 
+def layout_pdf_part(html_file, base_url):
+    # Runs in a worker process. Returns the page sizes, the number printed on the first page and where the anchors,
+    # the links to anchors in other parts and the bookmarks are, with the positions in CSS pixels from the top left
+    # of their page. WeasyPrint gives the link rectangles as (x1, y1, x2, y2)
+    document = HTML(filename=html_file, base_url=base_url).render()
+    layout = {'pages': [], 'first_number': get_first_page_number(document), 'anchors': {}, 'links': [],
+              'bookmarks': []}
+    for page_idx, page in enumerate(document.pages):
+        layout['pages'].append((page.width, page.height))
+        for anchor, position in page.anchors.items():
+            layout['anchors'].setdefault(anchor, (page_idx, position[0], position[1]))
+        for link in page.links:
+            if link[0] == 'internal':
+                layout['links'].append((page_idx, link[1], tuple(link[2][:4])))
+        for bookmark in page.bookmarks:
+            level, label, position = bookmark[:3]
+            if label.startswith(PAGE_PROBE_LABEL):
+                continue
+            state = bookmark[3] if len(bookmark) > 3 else 'open'
+            layout['bookmarks'].append((page_idx, level, label, position[0], position[1], state))
+    layout['links'] = [link for link in layout['links'] if link[1] not in layout['anchors']]
+    return layout
+
+
+def write_pdf_part(html_file, base_url, pdf_file):
+    # Runs in a worker process. Returns the page count and the number printed on the first page, to check
+    # them against the layout
+    document = HTML(filename=html_file, base_url=base_url).render()
+    document.write_pdf(pdf_file)
+    return len(document.pages), get_first_page_number(document)
+
+
+def get_first_page_number(document):
+    # The page probe of PAGE_PROBE_STYLE labels a bookmark with the page counter of the first page
+    for bookmark in document.pages[0].bookmarks if document.pages else []:
+        label = bookmark[1]
+        if label.startswith(PAGE_PROBE_LABEL):
+            return int(label[len(PAGE_PROBE_LABEL):])
+    raise RuntimeError('Cannot find the page number probe on the first page')
+
+
+def run_project_converter(pdf_converter_class: Type[PdfConverter], resources: Resources, project_id, working_dir,
+                          output_dir, lang_code, regenerate, split_jobs=0):
+    # Runs in a worker process, so each project gets its own logger (and so its own log files) and
+    # the WeasyPrint log handlers it adds are removed again before the worker's next project
+    project_id_str = f'_{project_id}' if project_id else ''
+    logger = logging.getLogger(f'{resources.main.repo_name}{project_id_str}')
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    ch = logging.StreamHandler()
+    ch.setLevel(logging.DEBUG)
+    ch.setFormatter(logging.Formatter(f'%(levelname)s - {project_id}: %(message)s'))
+    logger.addHandler(ch)
+    weasyprint_handlers = list(LOGGER.handlers)
+    try:
+        converter = pdf_converter_class(resources=resources, project_id=project_id, working_dir=working_dir,
+                                        output_dir=output_dir, lang_code=lang_code, regenerate=regenerate,
+                                        logger=logger, split_jobs=split_jobs)
+        converter.logger.info(f'Starting PDF Converter for {resources.main.repo_name}_{resources.main.tag}{project_id_str}...')
+        converter.run()
+        return {
+            'project_id': project_id,
+            'pdf_file': converter.pdf_file,
+            'bad_links': len(converter.bad_links),
+            'bad_highlights': len(converter.bad_highlights)
+        }
+    finally:
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        for handler in list(LOGGER.handlers):
+            if handler not in weasyprint_handlers:
+                LOGGER.removeHandler(handler)
+                handler.close()
+
+
+def run_converters_in_parallel(resources: Resources, pdf_converter_class: Type[PdfConverter], project_ids, working_dir,
+                               output_dir, lang_code, regenerate, jobs, split_jobs=0):
+    # The resources are cloned (and the directories set up) once here, then every project shares them
+    converter = pdf_converter_class(resources=resources, working_dir=working_dir, output_dir=output_dir,
+                                    lang_code=lang_code, regenerate=regenerate)
+    converter.logger.info(f'Setting up {", ".join(resources.keys())} for {len(project_ids)} projects, '
+                          f'converting {jobs} at a time...')
+    converter.setup_dirs()
+    converter.setup_resources()
+    with ProcessPoolExecutor(max_workers=min(jobs, len(project_ids))) as executor:
+        futures = [executor.submit(run_project_converter, pdf_converter_class, resources, project_id,
+                                   converter.working_dir, converter.output_dir, lang_code, regenerate, split_jobs)
+                   for project_id in project_ids]
+        try:
+            # Reported in project order, whichever worker finishes first
+            for future in futures:
+                result = future.result()
+                converter.logger.info(f'{result["project_id"]}: {result["bad_links"]} bad links, '
+                                      f'{result["bad_highlights"]} bad highlights - {result["pdf_file"]}')
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+
 def run_converter(resource_names: List[str], pdf_converter_class: Type[PdfConverter], logo_url=None):
     parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
     parser.add_argument('-l', '--lang_code', dest='lang_codes', required=False, help='Language Code(s)',
@@ -1054,6 +1422,11 @@ def run_converter(resource_names: List[str], pdf_converter_class: Type[PdfConver
     parser.add_argument('--owner', dest='owner', default=DEFAULT_OWNER, required=False, help='Owner')
     parser.add_argument('-r', '--regenerate', dest='regenerate', action='store_true',
                         help='Regenerate PDF even if exists')
+    parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=1, required=False,
+                        help='Number of projects to convert at once in worker processes (0 for one per CPU)')
+    parser.add_argument('-s', '--split', dest='split_jobs', type=int, default=0, required=False,
+                        help='Render the PDF in parts, this many at once in worker processes, and merge them '
+                             '(0 to render the whole HTML file at once)')
     for resource_name in resource_names:
         parser.add_argument(f'--{resource_name}-tag', dest=resource_name, default=DEFAULT_TAG, required=False)
 
@@ -1064,24 +1437,35 @@ def run_converter(resource_names: List[str], pdf_converter_class: Type[PdfConver
     output_dir = args.output_dir
     owner = args.owner
     regenerate = args.regenerate
+    jobs = args.jobs or os.cpu_count() or 1
+    split_jobs = args.split_jobs
     if not lang_codes:
         lang_codes = [DEFAULT_LANG_CODE]
     if not project_ids:
         project_ids = [None]
 
-    resources = Resources()
+    def get_resources(lang_code):
+        resources = Resources()
+        for resource_name in resource_names:
+            repo_name = f'{lang_code}_{resource_name}'
+            tag = getattr(args, resource_name)
+            logo = None
+            if logo_url and resource_name == resource_names[0]:
+                logo = logo_url
+            resource = Resource(resource_name=resource_name, repo_name=repo_name, tag=tag, owner=owner, logo_url=logo)
+            resources[resource_name] = resource
+        return resources
+
     for lang_code in lang_codes:
+        if jobs > 1 and len(project_ids) > 1:
+            run_converters_in_parallel(get_resources(lang_code), pdf_converter_class, project_ids, working_dir,
+                                       output_dir, lang_code, regenerate, jobs, split_jobs)
+            continue
         for project_id in project_ids:
-            for resource_name in resource_names:
-                repo_name = f'{lang_code}_{resource_name}'
-                tag = getattr(args, resource_name)
-                logo = None
-                if logo_url and resource_name == resource_names[0]:
-                    logo = logo_url
-                resource = Resource(resource_name=resource_name, repo_name=repo_name, tag=tag, owner=owner, logo_url=logo)
-                resources[resource_name] = resource
+            resources = get_resources(lang_code)
             converter = pdf_converter_class(resources=resources, project_id=project_id, working_dir=working_dir,
-                                            output_dir=output_dir, lang_code=lang_code, regenerate=regenerate)
+                                            output_dir=output_dir, lang_code=lang_code, regenerate=regenerate,
+                                            split_jobs=split_jobs)
             project_id_str = f'_{project_id}' if project_id else ''
             converter.logger.info(f'Starting PDF Converter for {resources.main.repo_name}_{resources.main.tag}{project_id_str}...')
             converter.run()
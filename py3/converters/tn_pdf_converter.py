@@ -14,7 +14,7 @@ import os
 import re
 from datetime import datetime
 from ..general_tools.file_utils import write_file, read_file, load_json_object, unzip, load_yaml_object
-from ..general_tools.usfm_utils import usfm3_to_usfm2
+from ..general_tools.usfm_utils import usfm3_to_usfm2_verses
 from .pdf_converter import PdfConverter, run_converter
 
 
@@ -112,42 +112,12 @@ class TnPdfConverter(PdfConverter):
         self.populate_verse_usfm_ust()
 
     def populate_verse_usfm_ust(self):
-        book_data = {}
-        book_file = os.path.join(self.resources['ust'].repo_dir, f'{self.book_number}-{self.book_id.upper}.usfm')
-        usfm3 = read_file(book_file)
-        usfm2 = usfm3_to_usfm2(usfm3)
-        chapters = usfm2.split(r'\c ')
-        for chapter_usfm in chapters[1:]:
-            chapter = int(re.findall('(\d+)', chapter_usfm)[0])
-            book_data[chapter] = {}
-            chapter_usfm = r'\c '+chapter_usfm
-            verses = chapter_usfm.split(r'\v ')
-            for verseUsfm in verses[1:]:
-                verse = int(re.findall('(\d+)', verseUsfm)[0])
-                verseUsfm = r'\v '+verseUsfm
-                if re.match(r'^\\v \d+\s*$', verseUsfm, flags=re.MULTILINE):
-                    verseUsfm = ''
-                book_data[chapter][verse] = verseUsfm
-        self.verse_usfm[self.ust_id] = book_data
+        book_file = os.path.join(self.resources['ust'].repo_dir, f'{self.book_number}-{self.book_id.upper()}.usfm')
+        self.verse_usfm[self.ust_id] = usfm3_to_usfm2_verses(read_file(book_file))
 
     def populate_verse_usfm_ult(self):
-        bookData = {}
         book_file = os.path.join(self.ult_dir, '{0}-{1}.usfm'.format(self.book_number, self.book_id.upper()))
-        usfm3 = read_file(book_file)
-        usfm2 = usfm3_to_usfm2(usfm3)
-        chapters = usfm2.split(r'\c ')
-        for chapterUsfm in chapters[1:]:
-            chapter = int(re.findall('(\d+)', chapterUsfm)[0])
-            bookData[chapter] = {}
-            chapterUsfm = r'\c '+chapterUsfm
-            verses = chapterUsfm.split(r'\v ')
-            for verseUsfm in verses[1:]:
-                verse = int(re.findall('(\d+)', verseUsfm)[0])
-                verseUsfm = r'\v '+verseUsfm
-                if re.match(r'^\\v \d+\s*$', verseUsfm, flags=re.MULTILINE):
-                    verseUsfm = ''
-                bookData[chapter][verse] = verseUsfm
-        self.verse_usfm[self.ult_id] = bookData
+        self.verse_usfm[self.ult_id] = usfm3_to_usfm2_verses(read_file(book_file))
 
     def populate_chapters_and_verses(self):
         versification_file = os.path.join(self.versification_dir, '{0}.json'.format(self.book_id))
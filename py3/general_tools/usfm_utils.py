@@ -3,6 +3,48 @@
 from __future__ import unicode_literals
 import re
 
+# Alignment and word markup, removed in a single pass.
+# The contents of each marker must not include a backslash, so that no marker can hide another.
+# The last group matches any marker that the others do not. If it matches, the single pass is abandoned.
+alignment_re = re.compile(r'\\(?:zaln-s[^*\\]*\\?\*|zaln-e\\\*|w ([^|\\]+)\|[^\\\n]*\\w\*|(zaln-s|zaln-e\\\*|w ))')
+alignment_starts = ('\\zaln-s', '\\zaln-e\\*', '\\w ')
+
+blank_lines_re = re.compile(r'\n\n+')
+continued_line_re = re.compile(r'\n(?=[^\\])')
+spaces_re = re.compile(r'  +')
+apostrophe_s_re = re.compile(r"\s*' s(?!\w)")
+fqa_re = re.compile(r'\\fqa([^*]+)\\fqa(?![*])')
+quotes_re = re.compile(r'\s*"\s*([^"]+)\s*"\s*')
+marker_punctuation_re = re.compile(r'\\(\w+\**)([^\w* \n])')
+space_before_re = re.compile(r' +([:;.?,!\]})-])')
+space_after_re = re.compile(r'([{(\[-]) +')
+
+chapter_verse_re = re.compile(r'\\([cv]) ')
+number_re = re.compile(r'\d+')
+empty_verse_re = re.compile(r'\\v \d+\s*$', flags=re.MULTILINE)
+
+
+def remove_alignment(usfm):
+    """
+    Removes alignment milestones and word attributes.
+    The single pass gives the same result as one pass per marker,
+    provided every marker is regular and removing them does not form new markers.
+    Otherwise one pass per marker is made instead.
+    :param usfm:
+    :return: the usfm without alignment markup
+    """
+    # Text, word, irregular marker, text, word, irregular marker, ..., text
+    parts = alignment_re.split(usfm)
+    if parts[2::3].count(None) == len(parts) // 3:
+        result = ''.join(filter(None, parts))
+        if not any(start in result for start in alignment_starts):
+            return result
+    usfm = re.sub(r'\\zaln-s[^\*]*\*', r'', usfm, flags=re.UNICODE | re.MULTILINE)
+    usfm = re.sub(r'\\zaln-e\\\*', r'', usfm, flags=re.UNICODE | re.MULTILINE)
+    usfm = re.sub(r'\\w ([^|]+)\|.*?\\w\*', r'\1', usfm, flags=re.UNICODE | re.MULTILINE)
+    return usfm
+
+
 def usfm3_to_usfm2(usfm):
     """
     Converts a USFM 3 string to a USFM 2 compatible string
@@ -10,6 +52,71 @@ def usfm3_to_usfm2(usfm):
     :return: the USFM 2 version of the string
     """
     # Kind of usfm3 to usfm2
+    usfm = remove_alignment(usfm)
+    # Remove blank lines, then join each line that does not start with a marker to the previous line
+    usfm = blank_lines_re.sub('\n', usfm.lstrip('\n'))
+    usfm = continued_line_re.sub(' ', usfm)
+    usfm = spaces_re.sub(' ', usfm)
+
+    # Clean up bad USFM data and fixing punctuation
+    if "' s" in usfm:
+        usfm = apostrophe_s_re.sub("'s", usfm)
+    usfm = usfm.replace('\\s5', '')
+    if '\\fqa' in usfm:
+        usfm = fqa_re.sub(r'\\fqa\1\\fqa*', usfm)
+
+    # Pair up quotes by chapter
+    chapters = usfm.split('\\c')
+    usfm = '\\c'.join(chapters[:1] + [quotes_re.sub(r' "\1" ', chapter) for chapter in chapters[1:]])
+    usfm = marker_punctuation_re.sub(r'\\\1 \2', usfm) # \\q1" => \q1 "
+    usfm = usfm.replace(" ' ", " '")
+    usfm = space_before_re.sub(r'\1', usfm)
+    usfm = space_after_re.sub(r'\1', usfm)
+
+    return usfm.strip()
+
+
+def usfm3_to_usfm2_verses(usfm):
+    """
+    Converts a USFM 3 string to USFM 2 and indexes it by chapter and verse.
+    It works in two stages. First usfm3_to_usfm2() converts the whole book, using its own regex passes.
+    Then a separate scan of the \\c and \\v markers in the converted text builds the index.
+    :param usfm:
+    :return: dict of chapter number to dict of verse number to the USFM 2 of the verse,
+             from its \\v marker up to the next \\v or \\c marker. Verses with no text on the \\v line are ''.
+    """
+    usfm2 = usfm3_to_usfm2(usfm)
+    book_data = {}
+    chapter_data = None
+    verse = None
+    for marker in chapter_verse_re.finditer(usfm2):
+        if verse is not None:
+            chapter_data[verse] = verse_usfm(usfm2, verse_start, marker.start())
+            verse = None
+        if marker.group(1) == 'c':
+            chapter_data = book_data[int(number_re.search(usfm2, marker.end()).group())] = {}
+        elif chapter_data is not None:
+            verse = int(number_re.search(usfm2, marker.end()).group())
+            verse_start = marker.start()
+    if verse is not None:
+        chapter_data[verse] = verse_usfm(usfm2, verse_start, len(usfm2))
+    return book_data
+
+
+def verse_usfm(usfm2, start, end):
+    if empty_verse_re.match(usfm2, start, end):
+        return ''
+    return usfm2[start:end]
+
+
+def usfm3_to_usfm2_stepwise(usfm):
+    """
+    The original implementation of usfm3_to_usfm2(), one regular expression pass at a time.
+    Kept for comparison; see benchmark().
+    :param usfm3:
+    :return: the USFM 2 version of the string
+    """
+    # Kind of usfm3 to usfm2
     usfm = re.sub(r'\\zaln-s[^\*]*\*', r'', usfm, flags=re.UNICODE | re.MULTILINE)
     usfm = re.sub(r'\\zaln-e\\\*', r'', usfm, flags=re.UNICODE | re.MULTILINE)
     usfm = re.sub(r'\\w ([^|]+)\|.*?\\w\*', r'\1', usfm, flags=re.UNICODE | re.MULTILINE)
@@ -22,16 +129,73 @@ def usfm3_to_usfm2(usfm):
     usfm = re.sub(r"\s*' s(?!\w)", "'s", usfm, flags=re.UNICODE | re.MULTILINE)
     usfm = re.sub(r'\\s5', '', usfm, flags=re.UNICODE | re.MULTILINE)
     usfm = re.sub(r'\\fqa([^*]+)\\fqa(?![*])', r'\\fqa\1\\fqa*', usfm, flags=re.UNICODE | re.MULTILINE)
-    
+
     # Pair up quotes by chapter
     chapters = re.compile(r'\\c').split(usfm)
     usfm = chapters[0]
     for chapter in chapters[1:]:
         chapter = re.sub(r'\s*"\s*([^"]+)\s*"\s*', r' "\1" ', chapter, flags=re.UNICODE | re.MULTILINE | re.DOTALL)
-        usfm += '\c'+chapter
+        usfm += '\\c'+chapter
     usfm = re.sub(r'\\(\w+\**)([^\w* \n])', r'\\\1 \2', usfm, flags=re.UNICODE | re.MULTILINE) # \\q1" => \q1 "
     usfm = re.sub(r" ' ", r" '", usfm, flags=re.UNICODE | re.MULTILINE)
     usfm = re.sub(r' +([:;.?,!\]})-])', r'\1', usfm, flags=re.UNICODE | re.MULTILINE)
     usfm = re.sub(r'([{(\[-]) +', r'\1', usfm, flags=re.UNICODE | re.MULTILINE)
 
     return usfm.strip()
+
+
+def usfm3_to_usfm2_verses_stepwise(usfm):
+    """
+    The original conversion and verse index of TnPdfConverter.populate_verse_usfm_ult(), for comparison
+    """
+    book_data = {}
+    usfm2 = usfm3_to_usfm2_stepwise(usfm)
+    chapters = usfm2.split(r'\c ')
+    for chapter_usfm in chapters[1:]:
+        chapter = int(re.findall(r'(\d+)', chapter_usfm)[0])
+        book_data[chapter] = {}
+        chapter_usfm = r'\c '+chapter_usfm
+        verses = chapter_usfm.split(r'\v ')
+        for verse_usfm in verses[1:]:
+            verse = int(re.findall(r'(\d+)', verse_usfm)[0])
+            verse_usfm = r'\v '+verse_usfm
+            if re.match(r'^\\v \d+\s*$', verse_usfm, flags=re.MULTILINE):
+                verse_usfm = ''
+            book_data[chapter][verse] = verse_usfm
+    return book_data
+
+
+def benchmark(paths, repeat=3):
+    """
+    Converts the specified USFM 3 files both ways, reports the best time of each
+    and whether the results are identical.
+    :param paths: usfm files or folders of usfm files, such as a clone of en_ult
+    """
+    import os
+    import time
+    paths = list(paths)
+    total_fast = total_slow = 0
+    for path in paths:
+        if os.path.isdir(path):
+            paths.extend(sorted(os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith('.usfm')))
+            continue
+        with open(path, 'r', encoding='utf-8-sig') as input:
+            usfm3 = input.read()
+        fast_time = slow_time = float('inf')
+        for i in range(repeat):
+            start = time.perf_counter()
+            result = usfm3_to_usfm2_verses(usfm3)
+            fast_time = min(fast_time, time.perf_counter() - start)
+            start = time.perf_counter()
+            expected = usfm3_to_usfm2_verses_stepwise(usfm3)
+            slow_time = min(slow_time, time.perf_counter() - start)
+        same = result == expected and usfm3_to_usfm2(usfm3) == usfm3_to_usfm2_stepwise(usfm3)
+        print(f"{path}: {'same' if same else 'DIFFERENT'}, {fast_time:.3f}s vs. {slow_time:.3f}s")
+        total_fast += fast_time
+        total_slow += slow_time
+    print(f"Total: {total_fast:.3f}s vs. {total_slow:.3f}s")
+
+
+if __name__ == "__main__":
+    import sys
+    benchmark(sys.argv[1:])
@@ -367,177 +367,30 @@ def clean(unicodeString):
     return ret_value
 
 
+# Returns a new token for the specified token group: (key,) or (key, value).
+# The token class comes from tokenClasses, which is defined after the classes.
 def createToken(t):
-    options = {
-        'id':   IDToken,
-        'ide':  IDEToken,
-        'usfm': USFMVersionToken,
-        'h':    HToken,
-
-        'mt':   MTToken,
-        'mt1':  MT1Token,
-        'mt2':  MT2Token,
-        'mt3':  MT3Token,
-
-        'ms':   MSToken,
-        'ms1':  MS1Token,
-        'ms2':  MS2Token,
-
-        'mr':   MRToken,
-        'p':    PToken,
-        'pc':   PCToken,
-
-        'pi':   PIToken,
-        'pi1':  PI1Token,
-        'pi2':  PI2Token,
-
-        'b':    BToken,
-
-        's':    SToken,
-        's1':   S1Token,
-        's2':   S2Token,
-        's3':   S3Token,
-        's4':   S4Token,
-
-        's5':   S5Token,
-
-        'sr':   SRToken,
-        'sts':  STSToken,
-        'mi':   MIToken,
-        'r':    RToken,
-        'c':    CToken,
-        'ca':   CAStartToken, 'ca*':  CAEndToken,
-        'cl':   CLToken,
-        'v':    VToken,
-        'va':   VAStartToken, 'va*':  VAEndToken,
-
-        'q':    QToken,
-        'q1':   Q1Token,
-        'q2':   Q2Token,
-        'q3':   Q3Token,
-        'q4':   Q4Token,
-
-        'qa':   QAToken,
-        'qac':  QACToken,
-        'qc':   QCToken,
-        'qm':   QMToken,
-        'qm1':  QM1Token,
-        'qm2':  QM2Token,
-        'qm3':  QM3Token,
-        'qr':   QRToken,
-        'qs':   QSStartToken,
-        'qs*':  QSEndToken,
-        'qt':   QTStartToken,
-        'qt*':  QTEndToken,
-        'nb':   NBToken,
-        'f':    FStartToken,
-        'fe':   FEStartToken,  # Footnote intended as an end note
-        'fr':   FRToken, 'fr*':  FREndToken,
-        'fk':   FKToken,
-        'ft':   FTToken, 'ft*':  FTEndToken,
-        'fq':   FQToken, 'fq*':  FQEndToken,
-        'fqa':  FQAToken, 'fqa*': FQAEndToken,
-        'fqb':  FQAEndToken,
-        'f*':   FEndToken,
-        'fe*':  FEEndToken,
-        'fv':   FVStartToken, 'fv*':  FVEndToken,
-        'fdc':  FDCStartToken, 'fdc*': FDCEndToken,
-        'fp':   FPToken,
-        'x':    XStartToken,
-        'xdc':  XDCStartToken, 'xdc*': XDCEndToken,
-        'xo':   XOToken,
-        'xt':   XTToken, 'xt*': XTEndToken,
-        'x*':   XEndToken,
-        'it':   ITStartToken, 'it*':  ITEndToken,
-        'bd':   BDStartToken, 'bd*':  BDEndToken,
-        'bdit': BDITStartToken, 'bdit*': BDITEndToken,
-
-        'li':   LIToken,
-        'li1':  LI1Token,
-        'li2':  LI2Token,
-        'li3':  LI3Token,
-        'li4':  LI4Token,
-
-        'd':    DToken,
-        'sp':   SPToken,
-        # 'i*':   IEndToken,
-        'add':  ADDStartToken, 'add*': ADDEndToken,
-        'nd':   NDStartToken, 'nd*':  NDEndToken,
-        'sc':   SCStartToken, 'sc*':  SCEndToken,
-        'wj':   WJStartToken, 'wj*':  WJEndToken,
-        'm':    MToken,
-        'tl':   TLStartToken, 'tl*':  TLEndToken,
-        '\\\\': EscapedToken,
-        'rem':  REMToken,
-
-        'tr':   TRToken,
-        'th1':  TH1Token,
-        'th2':  TH2Token,
-        'th3':  TH3Token,
-        'th4':  TH4Token,
-        'th5':  TH5Token,
-        'th6':  TH6Token,
-        'thr1': THR1Token,
-        'thr2': THR2Token,
-        'thr3': THR3Token,
-        'thr4': THR4Token,
-        'thr5': THR5Token,
-        'thr6': THR6Token,
-        'tc1':  TC1Token,
-        'tc2':  TC2Token,
-        'tc3':  TC3Token,
-        'tc4':  TC4Token,
-        'tc5':  TC5Token,
-        'tc6':  TC6Token,
-        'tcr1': TCR1Token,
-        'tcr2': TCR2Token,
-        'tcr3': TCR3Token,
-        'tcr4': TCR4Token,
-        'tcr5': TCR5Token,
-        'tcr6': TCR6Token,
-
-        'toc1': TOC1Token,
-        'toc2': TOC2Token,
-        'toc3': TOC3Token,
-
-        'is':   ISToken,
-        'is1':  IS1Token,
-        'is2':  IS2Token,
-        'is3':  IS3Token,
-
-        'imt':  IMTToken,
-        'imt1': IMT1Token,
-        'imt2': IMT2Token,
-        'imt3': IMT3Token,
-
-        'ie':   IEToken,
-        'ip':   IPToken,
-        'ipi':  IPIToken,
-        'im':   IMToken,
-        'imi':  IMIToken,
-        'iot':  IOTToken,
-        'io':   IOToken,
-        'io1':  IO1Token,
-        'io2':  IO2Token,
-        'ior':  IORStartToken, 'ior*': IOREndToken,
-        'bk':   BKStartToken, 'bk*':  BKEndToken,
-        'text': TEXTToken,
-        'unknown': UnknownToken
-    }
-    for k, v in options.items():
-        if t[0] == k:
-            if len(t) == 1:
-                token = v()
-            else:
-                token = v(t[1])
-            token.type = k
-            return token
-    raise Exception(t[0])
+    key = t[0]
+    try:
+        token = tokenClasses[key](t[1]) if len(t) > 1 else tokenClasses[key]()
+    except KeyError:
+        raise Exception(key)
+    token.type = key
+    return token
 
 
 
+# Gives every token class an empty __slots__ unless it declares its own,
+# so that token instances carry no per-instance __dict__.
+class UsfmTokenType(type):
+    def __new__(mcls, name, bases, namespace):
+        namespace.setdefault('__slots__', ())
+        return super().__new__(mcls, name, bases, namespace)
+
 # noinspection PyMethodMayBeStatic
-class UsfmToken:
+class UsfmToken(metaclass=UsfmTokenType):
+    __slots__ = ('value', 'type')
+
     def __init__(self, value=''):
         self.value = value
         self.type = None
@@ -1323,3 +1176,161 @@ class BKStartToken(UsfmToken):
 class BKEndToken(UsfmToken):
     def renderOn(self, printer):  return printer.render_bk_e(self)
     def is_bk_e(self):            return True
+
+# Maps each token key to its token class
+tokenClasses = {
+    'id':   IDToken,
+    'ide':  IDEToken,
+    'usfm': USFMVersionToken,
+    'h':    HToken,
+
+    'mt':   MTToken,
+    'mt1':  MT1Token,
+    'mt2':  MT2Token,
+    'mt3':  MT3Token,
+
+    'ms':   MSToken,
+    'ms1':  MS1Token,
+    'ms2':  MS2Token,
+
+    'mr':   MRToken,
+    'p':    PToken,
+    'pc':   PCToken,
+
+    'pi':   PIToken,
+    'pi1':  PI1Token,
+    'pi2':  PI2Token,
+
+    'b':    BToken,
+
+    's':    SToken,
+    's1':   S1Token,
+    's2':   S2Token,
+    's3':   S3Token,
+    's4':   S4Token,
+
+    's5':   S5Token,
+
+    'sr':   SRToken,
+    'sts':  STSToken,
+    'mi':   MIToken,
+    'r':    RToken,
+    'c':    CToken,
+    'ca':   CAStartToken, 'ca*':  CAEndToken,
+    'cl':   CLToken,
+    'v':    VToken,
+    'va':   VAStartToken, 'va*':  VAEndToken,
+
+    'q':    QToken,
+    'q1':   Q1Token,
+    'q2':   Q2Token,
+    'q3':   Q3Token,
+    'q4':   Q4Token,
+
+    'qa':   QAToken,
+    'qac':  QACToken,
+    'qc':   QCToken,
+    'qm':   QMToken,
+    'qm1':  QM1Token,
+    'qm2':  QM2Token,
+    'qm3':  QM3Token,
+    'qr':   QRToken,
+    'qs':   QSStartToken,
+    'qs*':  QSEndToken,
+    'qt':   QTStartToken,
+    'qt*':  QTEndToken,
+    'nb':   NBToken,
+    'f':    FStartToken,
+    'fe':   FEStartToken,  # Footnote intended as an end note
+    'fr':   FRToken, 'fr*':  FREndToken,
+    'fk':   FKToken,
+    'ft':   FTToken, 'ft*':  FTEndToken,
+    'fq':   FQToken, 'fq*':  FQEndToken,
+    'fqa':  FQAToken, 'fqa*': FQAEndToken,
+    'fqb':  FQAEndToken,
+    'f*':   FEndToken,
+    'fe*':  FEEndToken,
+    'fv':   FVStartToken, 'fv*':  FVEndToken,
+    'fdc':  FDCStartToken, 'fdc*': FDCEndToken,
+    'fp':   FPToken,
+    'x':    XStartToken,
+    'xdc':  XDCStartToken, 'xdc*': XDCEndToken,
+    'xo':   XOToken,
+    'xt':   XTToken, 'xt*': XTEndToken,
+    'x*':   XEndToken,
+    'it':   ITStartToken, 'it*':  ITEndToken,
+    'bd':   BDStartToken, 'bd*':  BDEndToken,
+    'bdit': BDITStartToken, 'bdit*': BDITEndToken,
+
+    'li':   LIToken,
+    'li1':  LI1Token,
+    'li2':  LI2Token,
+    'li3':  LI3Token,
+    'li4':  LI4Token,
+
+    'd':    DToken,
+    'sp':   SPToken,
+    # 'i*':   IEndToken,
+    'add':  ADDStartToken, 'add*': ADDEndToken,
+    'nd':   NDStartToken, 'nd*':  NDEndToken,
+    'sc':   SCStartToken, 'sc*':  SCEndToken,
+    'wj':   WJStartToken, 'wj*':  WJEndToken,
+    'm':    MToken,
+    'tl':   TLStartToken, 'tl*':  TLEndToken,
+    '\\\\': EscapedToken,
+    'rem':  REMToken,
+
+    'tr':   TRToken,
+    'th1':  TH1Token,
+    'th2':  TH2Token,
+    'th3':  TH3Token,
+    'th4':  TH4Token,
+    'th5':  TH5Token,
+    'th6':  TH6Token,
+    'thr1': THR1Token,
+    'thr2': THR2Token,
+    'thr3': THR3Token,
+    'thr4': THR4Token,
+    'thr5': THR5Token,
+    'thr6': THR6Token,
+    'tc1':  TC1Token,
+    'tc2':  TC2Token,
+    'tc3':  TC3Token,
+    'tc4':  TC4Token,
+    'tc5':  TC5Token,
+    'tc6':  TC6Token,
+    'tcr1': TCR1Token,
+    'tcr2': TCR2Token,
+    'tcr3': TCR3Token,
+    'tcr4': TCR4Token,
+    'tcr5': TCR5Token,
+    'tcr6': TCR6Token,
+
+    'toc1': TOC1Token,
+    'toc2': TOC2Token,
+    'toc3': TOC3Token,
+
+    'is':   ISToken,
+    'is1':  IS1Token,
+    'is2':  IS2Token,
+    'is3':  IS3Token,
+
+    'imt':  IMTToken,
+    'imt1': IMT1Token,
+    'imt2': IMT2Token,
+    'imt3': IMT3Token,
+
+    'ie':   IEToken,
+    'ip':   IPToken,
+    'ipi':  IPIToken,
+    'im':   IMToken,
+    'imi':  IMIToken,
+    'iot':  IOTToken,
+    'io':   IOToken,
+    'io1':  IO1Token,
+    'io2':  IO2Token,
+    'ior':  IORStartToken, 'ior*': IOREndToken,
+    'bk':   BKStartToken, 'bk*':  BKEndToken,
+    'text': TEXTToken,
+    'unknown': UnknownToken
+}
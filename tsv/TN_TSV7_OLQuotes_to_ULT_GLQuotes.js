@@ -10,6 +10,7 @@ const { rejigAlignment } = require('uw-proskomma/src/utils/rejig_alignment');
 // const { doAlignmentQuery } = require('uw-proskomma/src/utils/query');
 const { pruneTokens, slimSourceTokens } = require('uw-proskomma/src/utils/tokens');
 const { UWProskomma } = require('uw-proskomma/src/index');
+const readline = require('readline');
 const { exit } = require("process");
 
 BBB_NUMBER_DICT = {'GEN':'01','EXO':'02','LEV':'03','NUM':'04','DEU':'05',
@@ -31,6 +32,7 @@ BBB_NUMBER_DICT = {'GEN':'01','EXO':'02','LEV':'03','NUM':'04','DEU':'05',
 // Adapted from https://github.com/unfoldingWord-box3/uw-proskomma/blob/main/src/utils/download.js May 2021
 // Changed to accept testament as a parameter, and to only load the correct repo -- UHB or UGNT
 // Removed UST preloading
+// book may also be a list of book codes (or null for all books) when serving several books
 const getDocuments = async (pk, book, verbose, serialize) => {
     const bibleDirs = [
         ["unfoldingWord", "hbo", "uhb", path.join(resourcesDir, "hbo_uhb")],
@@ -53,7 +55,7 @@ const getDocuments = async (pk, book, verbose, serialize) => {
         const bookPaths = manifest.projects.map(e => e.path.split("/")[1]);
         for (const bookPath of bookPaths) {
             const pathBook = bookPath.split(".")[0].split('-')[1];
-            if (book && (pathBook !== book)) {
+            if (book && (Array.isArray(book) ? !book.includes(pathBook) : pathBook !== book)) {
                 continue;
             }
             if (verbose) console.log(`    ${pathBook}`)
@@ -72,7 +74,7 @@ const getDocuments = async (pk, book, verbose, serialize) => {
         const startTime = Date.now();
         if (abbr === 'ult') { // Preprocess x-occurrence,x-occurrences,x-content into x-align="content:occurrence:occurrences" for easier handling later
             // console.log(`content1: ${typeof content} (${content.length}) ${Object.keys(content)}`);
-            content = [rejigAlignment(content)]; // Tidy-up ULT USFM alignment info
+            content = content.map(usfm => rejigAlignment(usfm)); // Tidy-up ULT USFM alignment info, one book at a time
             // console.log(`content2: ${typeof content} (${content.length}) ${content}`);
         }
         pk.importDocuments(selectors, "usfm", content, {});
@@ -523,82 +525,171 @@ const getTidiedData = (dataPairs) => {
 }
 
 
+/**
+ *
+ * @param {Object} tokenLookup -- the tokens for each verse from doAlignmentQuery()
+ * @param {string} book -- the USFM book code
+ * @param {string} tnFile -- the path of the 9-column TN TSV file for the book
+ * @description Finds the ULT GL quote for the OrigQuote of each TSV record
+ * @returns a list with, for each record, either {record, glQuote} or {record, error, sourceTokens}
+ */
+const findGLQuotes = (tokenLookup, book, tnFile) => {
+    let testament = 'OT';
+    if (BBB_NUMBER_DICT[book] && Number(BBB_NUMBER_DICT[book]) > 41) {
+        testament = 'NT';
+    }
+    const gl = 'ult';
+    const results = [];
+    for (const tsvRecord of readTsv(tnFile)) {
+        // console.log(`tsvRecord = ${JSON.stringify(tsvRecord)}`);
+        // if (tsvRecord.chapter === '3') break;
+        // if (tsvRecord.verse === '2') break;
+        const cv = `${tsvRecord.chapter}:${tsvRecord.verse}`;
+        const source = testament === 'OT' ? tokenLookup.uhb : tokenLookup.ugnt;
+        // Get the tokens for this BCV
+        const sourceTokens = source[book][cv];
+        // console.log(`  All OrigL source tokens = (${sourceTokens.length}) ${JSON.stringify(sourceTokens)}`);
+
+        const glTokens = tokenLookup[gl][book][cv];
+        // console.log(`  All GL tokens = (${glTokens.length}) ${JSON.stringify(glTokens)}`);
+        // Do the alignment
+        const highlighted = gl4Source(
+            book,
+            cv,
+            sourceTokens,
+            glTokens,
+            tsvRecord.origQuote,
+            tsvRecord.occurrence, // added by RJH -- it can't work correctly without this info
+            prune
+        );
+        // Returned object has either "data" or "error"
+        if ("data" in highlighted) {
+            console.assert(!highlighted.error);
+            // console.log(`  After gl4Source(): data = (${highlighted.data.length}) ${highlighted.data}`);
+            // console.log(`    ${gl}: “${highlightedAsString(highlighted.data)}”`);
+            results.push({ record: tsvRecord, glQuote: getTidiedData(highlighted.data) });
+        } else {
+            console.assert(!highlighted.data);
+            results.push({ record: tsvRecord, error: highlighted.error, sourceTokens });
+        }
+    }
+    return results;
+}
+
+
+// Errors always go to stderr -- in serve mode stdout only carries the JSON replies
+const reportGLQuoteError = (book, result) => {
+    const cv = `${result.record.chapter}:${result.record.verse}`;
+    console.error(`  Error: ${book} ${cv} ${result.record.id} ${result.error}`);
+    console.error(`    Verse words: ${JSON.stringify(result.sourceTokens.filter(t => t.subType === "wordLike").map(t => t.payload))}\n`);
+    // console.error(`    Verse codepoints: ${sourceTokens.filter(t => t.subType === "wordLike").map(t => t.payload).map(s => "|" + Array.from(s).map(c => c.charCodeAt(0).toString(16)))}`);
+}
+
+
+/**
+ *
+ * @param {Object} tokenLookup -- the tokens for each verse from doAlignmentQuery()
+ * @description Answers book jobs from stdin until it is closed, one JSON object per line each way
+ *  Request: {"book": "LUK", "tsv": "/path/to/en_tn_43-LUK.tsv"}
+ *  Reply: {"book": "LUK", "quotes": [["LUK", "1", "2", origQuote, glQuote], …], "counts": {"pass": n, "fail": n}}
+ *      or {"book": "LUK", "error": "…"} if the whole job failed
+ */
+const serve = async (tokenLookup) => {
+    // Only the replies go to stdout (see the --serve start below)
+    const reply = response => process.stdout.write(JSON.stringify(response) + '\n');
+    const lines = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+    for await (const line of lines) {
+        if (!line.trim()) continue;
+        let job;
+        try {
+            job = JSON.parse(line);
+            const quotes = [];
+            const counts = { pass: 0, fail: 0 };
+            for (const result of findGLQuotes(tokenLookup, job.book, job.tsv)) {
+                if ("glQuote" in result) {
+                    counts.pass++;
+                    const r = result.record;
+                    quotes.push([r.book, r.chapter, r.verse, r.origQuote, result.glQuote]);
+                } else {
+                    counts.fail++;
+                    reportGLQuoteError(job.book, result);
+                }
+            }
+            reply({ book: job.book, quotes, counts });
+        } catch (err) {
+            reply({ book: job ? job.book : null, error: String(err) });
+        }
+    }
+}
+
+
 // Start of main code
+// Usage: node TN_TSV7_OLQuotes_to_ULT_GLQuotes.js resourcesDir BOOK [tnFile]
+//    or: node TN_TSV7_OLQuotes_to_ULT_GLQuotes.js resourcesDir --serve [BOOK …]
+//  where --serve loads the given books (or all books) once and then takes book jobs on stdin
 const pk = new UWProskomma();
 const args = process.argv.slice(2);
 const resourcesDir = args[0]; // Path to the en_tn and Bible repos parent dir
-const book = args[1];
+const serving = args[1] === '--serve';
+const book = serving ? null : args[1];
 const prune = true; // only return the matching quote -- not the entire verse text
 
 if (!fse.existsSync(resourcesDir)) {
     console.error("no such resources dir ", resourcesDir);
     exit(1);
 }
-const tnDir = path.join(resourcesDir, "en_tn");
-if (!fse.existsSync(tnDir)) {
-    console.error("no such TN dir ", tnDir);
-    exit(1);
-}
 
-if (! BBB_NUMBER_DICT[book]) {
-    console.error("INVALID BOOK: "+book);
-    exit(1);
-}
-let testament = 'OT';
-if (BBB_NUMBER_DICT[book] && Number(BBB_NUMBER_DICT[book]) > 41) {
-    testament = 'NT';
-}
+if (serving) {
+    // Anything else that gets logged, while loading the books too, mustn't get mixed up with the replies
+    console.log = console.info = console.debug = console.error;
+    const books = args.slice(2);
+    for (const b of books) {
+        if (! BBB_NUMBER_DICT[b]) {
+            console.error("INVALID BOOK: "+b);
+            exit(1);
+        }
+    }
+    getDocuments(pk, books.length ? books : null, false, false) // last parameters are "verbose" and "serialize"
+        .then(async () => serve(await doAlignmentQuery(pk)))
+        .catch(err => {
+            console.error(err);
+            exit(1);
+        });
+} else {
+    let tnFile = args[2];
+    if (!tnFile) {
+        const tnDir = path.join(resourcesDir, "en_tn");
+        if (!fse.existsSync(tnDir)) {
+            console.error("no such TN dir ", tnDir);
+            exit(1);
+        }
+        tnFile = path.join(tnDir, "en_tn_" + BBB_NUMBER_DICT[book] + "-" + book + ".tsv");
+    }
 
-getDocuments(pk, book, false, false) // last parameters are "verbose" and "serialize"
-    .then(async () => {
-        // Query Proskomma which now contains the books
-        // Returns the tokens for each verse, accessible by
-        // [abbr][book][chapter:verse]
-        const tokenLookup = await doAlignmentQuery(pk);
-        // Iterate over TSV records
-        let nRecords = 0;
-        let counts = { pass: 0, fail: 0 };
-        const gl = 'ult';
-        let tnFile = path.join(tnDir, "en_tn_" + BBB_NUMBER_DICT[book] + "-" + book + ".tsv");
-        for (const tsvRecord of readTsv(tnFile)) {
-            // console.log(`tsvRecord = ${JSON.stringify(tsvRecord)}`);
-            // if (tsvRecord.chapter === '3') break;
-            // if (tsvRecord.verse === '2') break;
-            nRecords++;
-            const cv = `${tsvRecord.chapter}:${tsvRecord.verse}`;
-            const source = testament === 'OT' ? tokenLookup.uhb : tokenLookup.ugnt;
-            // Get the tokens for this BCV
-            const sourceTokens = source[book][cv];
-            // console.log(`  All OrigL source tokens = (${sourceTokens.length}) ${JSON.stringify(sourceTokens)}`);
-
-            const glTokens = tokenLookup[gl][book][cv];
-            // console.log(`  All GL tokens = (${glTokens.length}) ${JSON.stringify(glTokens)}`);
-            // Do the alignment
-            const highlighted = gl4Source(
-                book,
-                cv,
-                sourceTokens,
-                glTokens,
-                tsvRecord.origQuote,
-                tsvRecord.occurrence, // added by RJH -- it can't work correctly without this info
-                prune
-            );
-            // Returned object has either "data" or "error"
-            if ("data" in highlighted) {
-                console.assert(!highlighted.error);
-                counts.pass++;
-                // console.log(`  After gl4Source(): data = (${highlighted.data.length}) ${highlighted.data}`);
-                // console.log(`    ${gl}: “${highlightedAsString(highlighted.data)}”`);
-                console.log(`${tsvRecord.book}_${cv} ►${tsvRecord.origQuote}◄ “${getTidiedData(highlighted.data)}”`);
-            } else {
-                console.assert(!highlighted.data);
-                counts.fail++;
-                console.error(`  Error: ${book} ${cv} ${tsvRecord.id} ${highlighted.error}`);
-                console.error(`    Verse words: ${JSON.stringify(sourceTokens.filter(t => t.subType === "wordLike").map(t => t.payload))}\n`);
-                // console.error(`    Verse codepoints: ${sourceTokens.filter(t => t.subType === "wordLike").map(t => t.payload).map(s => "|" + Array.from(s).map(c => c.charCodeAt(0).toString(16)))}`);
+    if (! BBB_NUMBER_DICT[book]) {
+        console.error("INVALID BOOK: "+book);
+        exit(1);
+    }
+
+    getDocuments(pk, book, false, false) // last parameters are "verbose" and "serialize"
+        .then(async () => {
+            // Query Proskomma which now contains the books
+            // Returns the tokens for each verse, accessible by
+            // [abbr][book][chapter:verse]
+            const tokenLookup = await doAlignmentQuery(pk);
+            // Iterate over TSV records
+            let counts = { pass: 0, fail: 0 };
+            for (const result of findGLQuotes(tokenLookup, book, tnFile)) {
+                if ("glQuote" in result) {
+                    counts.pass++;
+                    const cv = `${result.record.chapter}:${result.record.verse}`;
+                    console.log(`${result.record.book}_${cv} ►${result.record.origQuote}◄ “${result.glQuote}”`);
+                } else {
+                    counts.fail++;
+                    reportGLQuoteError(book, result);
+                }
             }
-            // }
+            console.log(counts);
         }
-        console.log(counts);
-    }
-    )
+        )
+}
@@ -18,13 +18,15 @@ Quick script to copy TN from 7-column TSV files
 
 NOTE: This requires the addition of the GLQuote column!
 """
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 import os
 from pathlib import Path
 # import random
 import re
 import logging
 import subprocess
+import json
+import contextlib
 
 
 LOCAL_SOURCE_BASE_FOLDERPATH = Path('/Users/richmahn/repos/git.door43.org/')
@@ -49,7 +51,9 @@ BBB_NUMBER_DICT = {'GEN':'01','EXO':'02','LEV':'03','NUM':'04','DEU':'05',
                 '2JN':'64',
                 '3JN':'65', 'JUD':'66', 'REV':'67' }
 
-HELPER_PROGRAM_NAME = 'TN_TSV7_OLQuotes_to_UST_GLQuotes.js'
+HELPER_PROGRAM_NAME = 'TN_TSV7_OLQuotes_to_ULT_GLQuotes.js'
+USE_PROSKOMMA_SERVER = True # Load the Bibles into one node process once, rather than once per book
+BOOKS_TO_PROCESS = None # None for all books, or a list like ['LUK'] to just process those books
 
 
 def get_TSV7_fields(input_folderpath:Path, BBB:str) -> Tuple[str,str,str,str,str,str]:
@@ -84,11 +88,112 @@ def get_TSV7_fields(input_folderpath:Path, BBB:str) -> Tuple[str,str,str,str,str
 # end of get_TSV7_fields function
 
 
+class ProskommaServer:
+    """
+    Runs the JS helper program in its --serve mode,
+        so that one node process loads the UHB/UGNT and ULT into Proskomma once
+        and then finds the GL quotes for as many books as we send it.
+
+    Jobs and replies are newline-delimited JSON over the helper's stdin/stdout.
+    The helper's error output goes straight to our stderr.
+    """
+    def __init__(self, resources_folderpath:Path, BBBs:List[str]) -> None:
+        print(f"    Starting Proskomma server for {len(BBBs)} book{'' if len(BBBs)==1 else 's'}…")
+        self.process = subprocess.Popen(['node', HELPER_PROGRAM_NAME, str(resources_folderpath), '--serve', *BBBs],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        text=True, encoding='utf-8', bufsize=1)
+
+    def find_GL_quotes(self, BBB:str, TSV9_filepath:Path) -> List[Tuple[str,str,str,str,str]]:
+        """
+        Sends one book job to the helper and waits for its reply.
+
+        Returns a list of 5-tuples with:
+            B, C, V, orig_quote, gl_quote
+        """
+        self.process.stdin.write(json.dumps({'book':BBB, 'tsv':str(TSV9_filepath)}) + '\n')
+        self.process.stdin.flush()
+        reply_line = self.process.stdout.readline()
+        if not reply_line: # The helper died (probably while loading the Bibles)
+            raise RuntimeError(f"Proskomma server exited with {self.process.wait()}")
+        try: reply = json.loads(reply_line)
+        except json.JSONDecodeError: reply = None
+        if not isinstance(reply, dict) or reply.get('book') != BBB:
+            # Something other than our reply got onto stdout, so we can't tell which reply goes with which job any more
+            self.kill()
+            raise RuntimeError(f"Proskomma server sent {reply_line.strip()[:200]!r} instead of the reply for {BBB}")
+        if 'error' in reply:
+            raise RuntimeError(f"Proskomma server failed on {BBB}: {reply['error']}")
+        print(f"        Proskomma did: {reply['counts']}")
+        return [tuple(quote) for quote in reply['quotes']]
+
+    def close(self) -> None:
+        """
+        Closing its stdin tells the helper that there's no more jobs.
+        """
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+
+    def kill(self) -> None:
+        """
+        Stops the helper without waiting for it to finish its jobs.
+        """
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # After an error (or Ctrl-C), don't leave a node process holding all the Bibles
+        if exc_type is None: self.close()
+        else: self.kill()
+# end of ProskommaServer class
+
+
+def run_Proskomma(BBB:str, TSV9_filepath:Path) -> List[Tuple[str,str,str,str,str]]:
+    """
+    Runs the JS helper program once for just this book
+        (which has to load the UHB/UGNT and ULT into Proskomma again every time).
+
+    Returns a list of 5-tuples with:
+        B, C, V, orig_quote, gl_quote
+    """
+    completed_process_result = subprocess.run(['node', HELPER_PROGRAM_NAME, LOCAL_SOURCE_BASE_FOLDERPATH, BBB, TSV9_filepath], capture_output=True)
+    print(f"Proskomma {BBB} result was: {completed_process_result}")
+    if completed_process_result.returncode:
+        print(f"      Proskomma {BBB} ERROR result was: {completed_process_result.returncode}")
+    if completed_process_result.stderr:
+        print(f"      Proskomma {BBB} error output was:\n{completed_process_result.stderr.decode()}")
+    proskomma_output_string = completed_process_result.stdout.decode()
+    print(f"Proskomma {BBB} output was: {proskomma_output_string}") # For debugging JS helper program only
+    output_lines = proskomma_output_string.split('\n')
+    if output_lines:
+        # Log any errors that occurred -- not really needed now coz they go to stderr
+        print_next_line_counter = 0
+        for output_line in output_lines:
+            if 'Error:' in output_line:
+                logging.error(output_line)
+                print_next_line_counter = 2 # Log this many following lines as well
+            elif print_next_line_counter > 0:
+                logging.error(output_line)
+                print_next_line_counter -= 1
+        # print(f"      Proskomma got: {' / '.join(output_lines[:9])}") # Displays the UHB/UGNT and ULT loading times
+        print(f"        Proskomma did: {output_lines[-2]}")
+    else: logging.critical("No output from Proskomma!!!")
+    return [match.groups() for match in re.finditer(r'(\w{3})_(\d{1,3}):(\d{1,3}) ►(.+?)◄ “(.+?)”', proskomma_output_string)]
+# end of run_Proskomma function
+
+
 QL_QUOTE_PLACEHOLDER = "NO GLQuote AVAILABLE!!!"
-def convert_TN_TSV(input_folderpath:Path, output_folderpath:Path, BBB:str, nn:str) -> int:
+def convert_TN_TSV(input_folderpath:Path, output_folderpath:Path, BBB:str, nn:str, server:Optional[ProskommaServer]=None) -> int:
     """
     Function to read and write the TN markdown files.
 
+    If a ProskommaServer is given, it finds the GL quotes,
+        otherwise a new node process is run just for this book.
+
     Returns the number of unique GLQuotes that were written in the call.
     """
     testament = 'OT' if int(nn)<40 else 'NT'
@@ -122,33 +227,10 @@ def convert_TN_TSV(input_folderpath:Path, output_folderpath:Path, BBB:str, nn:st
 
     # Now use Proskomma to find the ULT GLQuote fields for the OrigQuotes in the temporary outputted file
     print(f"      Running Proskomma to find GL quotes for {testament} {BBB}… (might take a few minutes)")
-    completed_process_result = subprocess.run(['node', HELPER_PROGRAM_NAME, temp_output_filepath, "LUK"], capture_output=True)
-    print(f"Proskomma {BBB} result was: {completed_process_result}")
-    if completed_process_result.returncode:
-        print(f"      Proskomma {BBB} ERROR result was: {completed_process_result.returncode}")
-    if completed_process_result.stderr:
-        print(f"      Proskomma {BBB} error output was:\n{completed_process_result.stderr.decode()}")
-    proskomma_output_string = completed_process_result.stdout.decode()
-    print(f"Proskomma {BBB} output was: {proskomma_output_string}") # For debugging JS helper program only
-    output_lines = proskomma_output_string.split('\n')
-    if output_lines:
-        # Log any errors that occurred -- not really needed now coz they go to stderr
-        print_next_line_counter = 0
-        for output_line in output_lines:
-            if 'Error:' in output_line:
-                logging.error(output_line)
-                print_next_line_counter = 2 # Log this many following lines as well
-            elif print_next_line_counter > 0:
-                logging.error(output_line)
-                print_next_line_counter -= 1
-        # print(f"      Proskomma got: {' / '.join(output_lines[:9])}") # Displays the UHB/UGNT and ULT loading times
-        print(f"        Proskomma did: {output_lines[-2]}")
-    else: logging.critical("No output from Proskomma!!!")
+    quotes = server.find_GL_quotes(BBB, temp_output_filepath) if server else run_Proskomma(BBB, temp_output_filepath)
     # Put the GL Quotes into a dict for easy access
     match_dict = {}
-    for match in re.finditer(r'(\w{3})_(\d{1,3}):(\d{1,3}) ►(.+?)◄ “(.+?)”', proskomma_output_string):
-        # print(match)
-        B, C, V, orig_quote, gl_quote = match.groups()
+    for B, C, V, orig_quote, gl_quote in quotes:
         assert B == BBB, f"{B} {C}:{V} '{orig_quote}' Should be equal '{B}' '{BBB}'"
         if gl_quote:
             match_dict[(C,V,orig_quote)] = gl_quote
@@ -193,25 +275,30 @@ def main():
     total_lines_read = total_quotes_written = 0
     total_GLQuote_failures = 0
     failed_book_list = []
+    book_list = []
     for BBB,nn in BBB_NUMBER_DICT.items():
-        if BBB != 'LUK': continue # Just process this one book
+        if BOOKS_TO_PROCESS and BBB not in BOOKS_TO_PROCESS: continue
         # if BBB not in ('MAT','MRK','LUK','JHN', 'ACT',
         #                 'ROM','1CO','2CO','GAL','EPH','PHP','COL',
         #                 '1TH','2TH','1TI','2TI','TIT','PHM',
         #                 'HEB','JAS','1PE','2PE','1JN','2JN','3JN','JUD','REV'):
         #     continue # Just process NT books
-        try:
-            lines_read, this_note_count, fail_count = convert_TN_TSV(LOCAL_SOURCE_FOLDERPATH, LOCAL_OUTPUT_FOLDERPATH, BBB, nn)
-        except Exception as e:
-            print(f"   {BBB} got an error: {e}")
-            failed_book_list.append((BBB,str(e)))
-            lines_read = this_note_count = fail_count = 0
-        total_lines_read += lines_read
-        total_files_read += 1
-        if this_note_count:
-            total_quotes_written += this_note_count
-            total_files_written += 1
-        total_GLQuote_failures += fail_count
+        book_list.append((BBB,nn))
+    with ProskommaServer(LOCAL_SOURCE_BASE_FOLDERPATH, [BBB for BBB,nn in book_list]) if USE_PROSKOMMA_SERVER else contextlib.nullcontext() as server:
+        for BBB,nn in book_list:
+            try:
+                lines_read, this_note_count, fail_count = convert_TN_TSV(LOCAL_SOURCE_FOLDERPATH, LOCAL_OUTPUT_FOLDERPATH, BBB, nn, server)
+            except Exception as e:
+                if server and server.process.poll() is not None: raise # The server is gone, so no later book can be done
+                print(f"   {BBB} got an error: {e}")
+                failed_book_list.append((BBB,str(e)))
+                lines_read = this_note_count = fail_count = 0
+            total_lines_read += lines_read
+            total_files_read += 1
+            if this_note_count:
+                total_quotes_written += this_note_count
+                total_files_written += 1
+            total_GLQuote_failures += fail_count
     print(f"  {total_lines_read:,} lines read from {total_files_read} TSV file{'' if total_files_read==1 else 's'}")
     print(f"  {total_quotes_written:,} GL quotes written to {total_files_written} TSV file{'' if total_files_written==1 else 's'} in {LOCAL_OUTPUT_FOLDERPATH}/")
     if total_GLQuote_failures:
@@ -11,12 +11,20 @@
 #
 # Written Apr 2020 by RJH
 #   Last modified: 2021-06-16 by RJH
+#   Modified 2026-10-17 to convert the books in parallel (see --jobs)
 #
 """
 Quick script to copy TW links out of UHB and UGNT
     and put into a TSV file with 6 columns.
+
+Usage: TWL_HebGrk_to_TSV6.py [--jobs N]
+    where N books are converted at once (default one per CPU)
 """
-from typing import List, Tuple
+from typing import List, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import contextlib
+import io
 import os
 from pathlib import Path
 import random
@@ -47,6 +55,8 @@ BBB_NUMBER_DICT = {'GEN':'01','EXO':'02','LEV':'03','NUM':'04','DEU':'05',
                 '2JN':'64',
                 '3JN':'65', 'JUD':'66', 'REV':'67' }
 
+NUM_PROCESSES = None # Default number of books to convert at once -- None means one per CPU, 1 converts them one at a time
+
 
 WORD_FIELD_RE = re.compile(r'(\\w .+?\\w\*)')
 SINGLE_WORD_RE = re.compile(r'\\w (.+?)\|')
@@ -337,23 +347,53 @@ def make_TSV_file(BBB:str, nn:str) -> Tuple[int,int]:
 # end of make_TSV_file function
 
 
-def main():
+def make_TSV_file_in_process(BBB:str, nn:str) -> Tuple[str,Optional[Tuple[int,int]],Optional[str]]:
+    """
+    Runs make_TSV_file in a worker process,
+        keeping its printed output so that main can display it in book order.
+
+    Returns a 3-tuple with:
+        printed_output, (simple_count, complex_count) or None, error message or None
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            counts, error = make_TSV_file(BBB,nn), None
+        except Exception as e:
+            counts, error = None, str(e)
+    return output.getvalue(), counts, error
+# end of make_TSV_file_in_process function
+
+
+def main(num_processes:Optional[int]=NUM_PROCESSES):
     """
+    Converts all the books,
+        num_processes at a time.
     """
     print("TWL_HebGrk_to_TSV6.py")
     print(f"  Source folderpath is {LOCAL_SOURCE_BASE_FOLDERPATH}/")
     print(f"  Output folderpath is {LOCAL_OUTPUT_FOLDERPATH}/")
     total_simple_links = total_multiword_links = 0
     fail_list = []
+    book_list = []
     for BBB,nn in BBB_NUMBER_DICT.items():
         # if BBB != 'MAT': continue
-        try:
-            simple_count, complex_count = make_TSV_file(BBB,nn)
-            total_simple_links += simple_count
-            total_multiword_links += complex_count
-        except Exception as e:
-            fail_list.append(BBB)
-            print(f"ERROR: failed to process {BBB}: {e}")
+        book_list.append((BBB,nn))
+    if not os.path.isdir(LOCAL_OUTPUT_FOLDERPATH): os.mkdir(LOCAL_OUTPUT_FOLDERPATH) # Before the processes race to make it
+    num_processes = min(num_processes or os.cpu_count() or 1, len(book_list) or 1)
+    with ProcessPoolExecutor(max_workers=num_processes) as executor:
+        # The books are submitted (and reported) in order, so the display doesn't depend on which process finishes first
+        futures = [executor.submit(make_TSV_file_in_process, BBB, nn) for BBB,nn in book_list]
+        for (BBB,nn), future in zip(book_list, futures):
+            output, counts, error = future.result()
+            print(output, end='')
+            if error is None:
+                simple_count, complex_count = counts
+                total_simple_links += simple_count
+                total_multiword_links += complex_count
+            else:
+                fail_list.append(BBB)
+                print(f"ERROR: failed to process {BBB}: {error}")
     if fail_list:
         print(f"The following {len(fail_list)} books FAILED: {fail_list}")
         print("PLEASE REVERT THESE CHANGES, FIX THE FAILING BOOKS, AND THEN RERUN!")
@@ -362,5 +402,8 @@ def main():
 # end of main function
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-j', '--jobs', type=int, default=NUM_PROCESSES, help="Number of books to convert at once (default one per CPU)")
+    args = parser.parse_args()
+    main(args.jobs)
 # end of TWL_HebGrk_to_TSV6.py
@@ -11,13 +11,21 @@
 #
 # Written Aug 2021 by RJH
 #   Last modified: 2021-08-10 by RJH
+#   Modified 2026-10-17 to handle the files in parallel (see --jobs)
 #
 """
 Quick script to fix Strongs numbers in TW markdown files.
 
 Note that each run of this script rewrites existing masrkdown files if there's any changes.
+
+Usage: TW_fix_Strongs.py [--jobs N]
+    where N processes handle the files (default one per CPU)
 """
-from typing import List
+from typing import List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import contextlib
+import io
 import os
 from pathlib import Path
 import re
@@ -27,6 +35,8 @@ import re
 LOCAL_SOURCE_BASE_FOLDERPATH = Path('/mnt/Data/uW_dataRepos/')
 LOCAL_SOURCE_FOLDERPATH = LOCAL_SOURCE_BASE_FOLDERPATH.joinpath('en_tw/')
 
+NUM_PROCESSES = None # Default number of processes to handle the files -- None means one per CPU, 1 handles them one at a time
+
 
 def handle_line(line_number:int, line:str) -> str:
     """
@@ -85,25 +95,53 @@ def handle_file(folderpath:str, filename:str) -> int:
 
 
 
+def handle_file_in_process(folderpath:str, filename:str) -> Tuple[str,int]:
+    """
+    Runs handle_file in a worker process,
+        keeping its printed output so that main can display it in file order.
+
+    Returns a 2-tuple with:
+        printed_output, number of files (0 or 1) written
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        num_written = handle_file(folderpath, filename)
+    return output.getvalue(), num_written
+# end of handle_file_in_process function
+
 
-def main():
+def main(num_processes:Optional[int]=NUM_PROCESSES):
     """
+    Handles all the markdown files,
+        using num_processes processes.
     """
     print("TW_fix_Strongs.py")
     print(f"  Source folderpath is {LOCAL_SOURCE_FOLDERPATH}/")
-    num_md_files = num_changed_md_files = 0
+    md_filepaths = []
     for root, dirs, files in os.walk(LOCAL_SOURCE_FOLDERPATH):
         if '.git' in root: continue
         for name in files:
             # print(f"file: {root=} {name=} {os.path.join(root, name)=}")
             if name.lower().endswith('.md'):
-                num_md_files += 1
-                num_changed_md_files += handle_file(root, name)
+                md_filepaths.append((root, name))
         # for name in dirs:
         #     print(f"dir: {root=} {name=} {os.path.join(root, name)=}")
+    num_md_files = len(md_filepaths)
+    num_changed_md_files = 0
+    num_processes = min(num_processes or os.cpu_count() or 1, num_md_files or 1)
+    with ProcessPoolExecutor(max_workers=num_processes) as executor:
+        # map() gives the results in file order, so the display doesn't depend on which process finishes first
+        for output, num_written in executor.map(handle_file_in_process,
+                                                    [root for root,_name in md_filepaths], [name for _root,name in md_filepaths],
+                                                    chunksize=max(1, num_md_files // (num_processes*4))):
+            print(output, end='')
+            num_changed_md_files += num_written
     print(f"    {num_md_files:,} total markdown files found and {num_changed_md_files:,} written in {LOCAL_SOURCE_FOLDERPATH}/")
 # end of main function
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-j', '--jobs', type=int, default=NUM_PROCESSES, help="Number of processes to handle the files (default one per CPU)")
+    args = parser.parse_args()
+    main(args.jobs)
 # end of TW_fix_Strongs.py
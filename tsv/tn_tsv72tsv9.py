@@ -99,23 +99,20 @@ def convertRow(bookId, row7):
 def convertFile(path, fname):
     sys.stdout.write(f"Converting {fname}\n")
     sys.stdout.flush()
-    data7 = tsv.tsvRead(path)
-    strip_quotes(data7)
-    data9 = []
     bookId = getBookId(fname)
     rowno = 1
-    for row in data7:
-        if len(row) != 7:
-            reportError(f"Wrong number of colums ({len(row)}) in row {rowno}")
-            break
-        elif rowno == 1:
-            newrow = ['Book','Chapter','Verse','ID','SupportReference','OrigQuote','Occurrence','GLQuote','OccurrenceNote']
-        else:
-            newrow = convertRow(bookId, row)
-        data9.append(newrow)
-        rowno += 1
-    outpath = makeOutputPath(bookId)
-    tsv.tsvWrite(data9, outpath)
+    with tsv.TsvWriter(makeOutputPath(bookId)) as output:     # one row at a time, so files of any size can be converted
+        for row in tsv.iter_tsv(path):
+            strip_quotes([row])
+            if len(row) != 7:
+                reportError(f"Wrong number of colums ({len(row)}) in row {rowno}")
+                break
+            elif rowno == 1:
+                newrow = ['Book','Chapter','Verse','ID','SupportReference','OrigQuote','Occurrence','GLQuote','OccurrenceNote']
+            else:
+                newrow = convertRow(bookId, row)
+            output.writerow(newrow)
+            rowno += 1
 
 # Converts the file or files contained in the specified folder
 def convert(dir):
@@ -291,6 +291,18 @@ def rowValue(row):
             value += int(row[2])
     return value
 
+# Returns the row of the English notes with the same chapter, verse and ID as the specified row, or None.
+# If there are several, returns the last one.
+def englishRow(english, row):
+    if len(row) < 4 or not (reference := tsv.parseReference(row[1] + ":" + row[2])):
+        return None
+    found = None
+    for english_row in english.lookup(row[0], reference.chapter, reference.verse):
+        strip_quotes([english_row])
+        if english_row[1:4] == row[1:4]:
+            found = english_row
+    return found
+
 def cleanFile(folder, fname):
     path = os.path.join(folder, fname)
     sys.stdout.write(os.path.relpath(path, source_dir) + '\n')
@@ -301,9 +313,7 @@ def cleanFile(folder, fname):
     if not os.path.isfile(englishPath):
         sys.stderr.write(f"Corresponding file does not exist in English: {fname}\n")
         return
-    english_data = tsv.tsvRead(englishPath)
-    strip_quotes(english_data)
-    english = tsv.list2Dict(english_data, [3,2,1])       # dictionary of rows in English
+    english = tsv.TsvTable(englishPath)      # rows in English, indexed by verse
 
     origdata = []
     if len(data) > 2 and data[0][0] == "Book" and len(data[1][0]) == 3:
@@ -311,8 +321,7 @@ def cleanFile(folder, fname):
         data = []
         for row in origdata:
             if len(row) > 1:
-                key = tsv.make_key(row, [3,2,1])
-                cleanRow(row, english[key] if key in english else None)
+                cleanRow(row, englishRow(english, row))
             data.append(row)
         data.sort(key=rowValue)
         bakpath = path.replace(".tsv", ".tsvorig")
@@ -4,35 +4,85 @@
 # The data consists of a list of rows. Each row is a list of field values.
 # Strips leading and trailing spaces from field values.
 # This module also has a tsvWrite function that writes a list of list of strings to a specified file.
+# iter_tsv() and TsvWriter read and write the rows one at a time, for converting files of any size
+# without holding them in memory.
 # The list2Dict function converts a list to a Python dictionary mapping.
 # make_key() generates keys used in the dictionary.
+# The TsvTable class holds the rows of one or more .tsv files by column, with an index
+# of the rows by book, chapter and verse. See TsvTable below.
 
 import io
 import codecs
+import os
+import re
+import shutil
+import sys
+from collections import namedtuple
+import usfm_verses
+
+write_buffer_size = 1024 * 1024
 
 # Each row becomes a list of strings
 # The entire file is returned as a list of lists of strings (rows).
 def tsvRead(inputPath):
+    return list(iter_tsv(inputPath))
+
+# Generates the rows of the file one at a time, each row a list of strings, the same as tsvRead() returns them.
+def iter_tsv(inputPath):
 #    enc = detect_by_bom(inputPath, default="utf-8")
-    f = io.open(inputPath, "tr", 1, encoding="utf-8-sig")
-    data = []
-    lines = f.readlines()
-    for line in lines:
-        line = line.strip(' \n')
-        fields = line.split('\t')
-        fields = [field.strip() for field in fields]
-        data.append(fields)
-    f.close()
-    return data
+    with io.open(inputPath, "tr", encoding="utf-8-sig") as f:
+        for line in f:
+            line = line.strip(' \n')
+            fields = line.split('\t')
+            yield [field.strip() for field in fields]
 
 def tsvWrite(data, tsvPath):
-    tsvFile = io.open(tsvPath, "tw", buffering=1, encoding='utf-8', newline='\n')
-    ustr = ""
-    tab = "\t"
-    for row in data:
-        ustr = tab.join(row)
-        tsvFile.write(ustr + '\n')
-    tsvFile.close()
+    with TsvWriter(tsvPath) as writer:
+        writer.writerows(data)
+
+# Writes rows to a .tsv file through a large buffer.
+# The rows go to a temporary file, which replaces the file at tsvPath when the writer is closed.
+# So a file can be rewritten while its rows are being read with iter_tsv().
+# Use the writer in a with statement, or call close(). Until it is closed nothing is written at tsvPath,
+# and a writer that is never closed leaves only the temporary file.
+# If the with statement ends in an exception, the file is left as it was.
+# A file that is replaced keeps its permissions.
+class TsvWriter:
+    def __init__(self, tsvPath, buffering=write_buffer_size):
+        self.path = tsvPath
+        self.tempPath = f"{tsvPath}.{os.getpid()}.tmp"
+        self.file = io.open(self.tempPath, "tw", buffering=buffering, encoding='utf-8', newline='\n')
+        self.nrows = 0
+
+    def writerow(self, row):
+        self.file.write("\t".join(row) + '\n')
+        self.nrows += 1
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+            if os.path.exists(self.path):
+                shutil.copymode(self.path, self.tempPath)
+            os.replace(self.tempPath, self.path)
+
+    # Closes the file without replacing the file at tsvPath.
+    def discard(self):
+        if not self.file.closed:
+            self.file.close()
+            os.remove(self.tempPath)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type:
+            self.discard()
+        else:
+            self.close()
 
 # Maps each element of the list to a dictionary key, based on values in the key columns of the list.
 # keycolumns is a list of column numbers which will serve as the unique key for all rows.
@@ -57,4 +107,157 @@ def make_key(list, keycolumns):
             key += list[col]
         key += '.'
     return key[:-1]     # remove final period
-    
\ No newline at end of file
+    
+# Chapter and verse of a row. verse and lastVerse are the same unless the row is for a range or list of verses.
+# verses lists every verse of the row in this chapter, so "1:3,5" has verses (3, 5) and "1:3-5" has (3, 4, 5).
+# Numbers are ints; other values, like "front" and "intro", are lowercase strings.
+Reference = namedtuple('Reference', ['chapter', 'verse', 'lastVerse', 'verses'])
+
+reference_re = re.compile(r'([^:]+):(.+)')
+verse_range_re = re.compile(r'([^-–]+)(?:[-–](?:([^:]+):)?(.+))?')
+bookid_re = re.compile(r'(?<![A-Z0-9])[1-3A-Z][A-Z][A-Z0-9](?![A-Z0-9])')
+short_field_length = 32     # shorter fields are interned, because most of them repeat
+
+# Returns the value of a chapter or verse field as an int if it is a number, otherwise as a lowercase string.
+def referencePart(value):
+    value = value.strip()
+    return int(value) if value.isdigit() else value.lower()
+
+# Returns the Reference for a "chapter:verse" string, like "1:3", "1:3-5", "1:3,5", "front:intro", or None.
+# A comma separates a list of verses or ranges; '-' and '–' make a range.
+# The last verse of a reference that ends in another chapter is not known; such a Reference has lastVerse None.
+def parseReference(text):
+    if not (match := reference_re.fullmatch(text.strip())):
+        return None
+    chapter = referencePart(match.group(1))
+    verses = []
+    lastVerse = None
+    for part in match.group(2).split(','):
+        if not (rangeMatch := verse_range_re.fullmatch(part.strip())):
+            return None
+        first = referencePart(rangeMatch.group(1))
+        last = referencePart(rangeMatch.group(3)) if rangeMatch.group(3) else first
+        if rangeMatch.group(2) and referencePart(rangeMatch.group(2)) != chapter:    # range ends in another chapter
+            verses.append(first)
+            lastVerse = None
+            break
+        if isinstance(first, int) and isinstance(last, int) and last > first:
+            verses.extend(range(first, last + 1))
+        else:
+            verses.append(first)
+        lastVerse = last
+    return Reference(chapter, verses[0], lastVerse, tuple(verses))
+
+# Returns the book id in a TSV file name like en_tn_41-MAT.tsv or tn_GEN.tsv, or "".
+def bookIdFromName(path):
+    for word in reversed(bookid_re.findall(os.path.basename(path).upper())):
+        if word in usfm_verses.verseCounts:
+            return word
+    return ""
+
+# The rows of one or more .tsv files of the same format, stored by column.
+# The files are read when the table is first used, not when it is made.
+# The first row of each file is the header. The headers of the files should all be the same.
+# Rows are padded with empty fields to the width of the header.
+# Rows are indexed by (book, chapter, verse), from either a Reference column or Book, Chapter and Verse columns.
+# Files without a Book column take the book id from the file name.
+# A row for a range of verses is indexed under each verse in the range.
+#
+#   table = tsv.TsvTable(["en_tn_01-GEN.tsv", "en_tn_02-EXO.tsv"])
+#   for row in table.lookup("GEN", 1, 3):
+#       ...
+class TsvTable:
+    def __init__(self, paths):
+        self.paths = [paths] if isinstance(paths, (str, os.PathLike)) else list(paths)
+        self.header = None
+        self.columns = None     # list of lists of field values
+        self.books = None       # book id of each row
+        self.references = None  # Reference of each row, or None
+        self.index = None       # (book, chapter, verse) => list of row numbers
+
+    def __len__(self):
+        self.load()
+        return len(self.books)
+
+    def __iter__(self):
+        self.load()
+        return (self.row(i) for i in range(len(self.books)))
+
+    # Reads the files, if they have not been read yet.
+    def load(self):
+        if self.columns is not None:
+            return
+        self.columns = []
+        self.books = []
+        self.references = []
+        self.index = {}
+        for path in self.paths:
+            self.loadFile(path)
+
+    def loadFile(self, path):
+        bookId = bookIdFromName(path)
+        rows = iter_tsv(path)
+        if (header := next(rows, None)) is not None:
+            if self.header is None:
+                self.header = header
+                self.columns = [[] for name in header]
+            elif header != self.header:
+                sys.stderr.write(f"Columns of {path} differ from those of {self.paths[0]}\n")
+            bookColumn = self.columnNumber('Book')
+            referenceColumn = self.columnNumber('Reference')
+            (chapterColumn, verseColumn) = (self.columnNumber('Chapter'), self.columnNumber('Verse'))
+            ncolumns = len(self.columns)
+            references = dict()     # intern the references too
+            for fields in rows:
+                if len(fields) < ncolumns:
+                    fields += [""] * (ncolumns - len(fields))
+                for (column, field) in zip(self.columns, fields):
+                    column.append(sys.intern(field) if len(field) < short_field_length else field)
+                book = fields[bookColumn].upper() if bookColumn is not None else bookId
+                if referenceColumn is not None:
+                    text = fields[referenceColumn]
+                elif chapterColumn is not None and verseColumn is not None:
+                    text = fields[chapterColumn] + ":" + fields[verseColumn]
+                else:
+                    text = ""
+                if text not in references:
+                    references[text] = parseReference(text)
+                self.addRow(sys.intern(book), references[text])
+
+    def addRow(self, book, reference):
+        n = len(self.books)
+        self.books.append(book)
+        self.references.append(reference)
+        if reference:
+            for verse in versesOf(reference):
+                self.index.setdefault((book, reference.chapter, verse), []).append(n)
+
+    # Returns the number of the named column, or None if there is no such column.
+    def columnNumber(self, name):
+        self.load()
+        return self.header.index(name) if name in self.header else None
+
+    # Returns the list of values in the named column.
+    def column(self, name):
+        self.load()
+        return self.columns[self.header.index(name)]
+
+    # Returns row n as a list of strings.
+    def row(self, n):
+        self.load()
+        return [column[n] for column in self.columns]
+
+    # Returns the numbers of the rows for the specified verse, in file order.
+    # The chapter and verse may be ints or strings, like 3 or "3" or "intro".
+    def rowNumbers(self, book, chapter, verse):
+        self.load()
+        key = (book.upper(), referencePart(str(chapter)), referencePart(str(verse)))
+        return self.index.get(key, [])
+
+    # Returns the rows for the specified verse, as lists of strings, in file order.
+    def lookup(self, book, chapter, verse):
+        return [self.row(n) for n in self.rowNumbers(book, chapter, verse)]
+
+# Returns the verses of a Reference, for indexing.
+def versesOf(reference):
+    return reference.verses
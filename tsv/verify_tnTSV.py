@@ -18,6 +18,9 @@
 #      Leading spaces before markdown headers.
 #      Translation of links.
 # A lot of these checks are done by tsv2rc.py as well.
+# The tA articles and OBS stories that links may refer to are listed once, at the start, instead of
+# looking for each one in the file system. The files in a folder are verified in jobs worker processes,
+# and their issues are reported in the same order as verifying the files one at a time.
 
 # Globals
 source_dir = r'C:\DCS\Kannada\work'
@@ -25,6 +28,7 @@ language_code = 'kn'
 source_language = 'en'         # The language that the notes are translated from, usually en
 ta_dir = r'C:\DCS\Kannada\kn_ta.STR'    # Use Target language tA if available
 obs_dir = r'C:\DCS\Hindi\hi_obs.STR\content'
+jobs = 0        # Number of worker processes for verifying the files in a folder, 0 for one per CPU
 
 suppress1 = False    # Suppress warnings about text before first heading and TA page references in headings
 suppress2 = False    # Suppress warnings about blank headings
@@ -50,6 +54,9 @@ book = None
 chapter = 0
 rowno = 0
 issuesfile = None
+issues = None       # list of issues of the file being verified in a worker process
+ta_targets = None   # TargetIndex of ta_dir
+obs_targets = None  # TargetIndex of obs_dir
 
 # Markdown line types
 HEADING = 1
@@ -63,12 +70,56 @@ import os
 import io
 import re
 import tsv
+from concurrent.futures import ProcessPoolExecutor
 
 listitem_re = re.compile(r'[ \t]*[\*\-][ \t]')
 olistitem_re = re.compile(r'[ \t]*[0-9]+\. ')
 badolistitem_re = re.compile(r'[ \t]*[0-9]+[\)]')
 badheading_re = re.compile(r' +#')
 
+# The folders and files under a root folder, listed once, for checking links without a file system call each.
+# Paths outside the root folder are looked up in the file system.
+class TargetIndex:
+    def __init__(self, root):
+        self.root = os.path.normpath(root)
+        self.folders = set()
+        self.files = set()
+        for (dir, subdirs, names) in os.walk(self.root, followlinks=True):
+            subdirs[:] = [name for name in subdirs if name != ".git"]
+            rel = os.path.relpath(dir, self.root)
+            self.folders.update(os.path.normcase(os.path.normpath(os.path.join(rel, name))) for name in subdirs)
+            self.files.update(os.path.normcase(os.path.normpath(os.path.join(rel, name))) for name in names)
+        if os.path.isdir(self.root):
+            self.folders.add(os.curdir)
+
+    # Returns the path relative to the root, in normal case, or None if the path is outside the root.
+    def relpath(self, path):
+        path = os.path.normpath(path)
+        try:
+            inside = os.path.normcase(os.path.commonpath([self.root, path])) == os.path.normcase(self.root)
+        except ValueError:      # on different drives
+            inside = False
+        if not inside or ".git" in path.split(os.sep):
+            return None
+        return os.path.normcase(os.path.relpath(path, self.root))
+
+    # Same as os.path.isdir()
+    def isdir(self, path):
+        rel = self.relpath(path)
+        return os.path.isdir(path) if rel is None else rel in self.folders
+
+    # Same as os.path.isfile()
+    def isfile(self, path):
+        rel = self.relpath(path)
+        return os.path.isfile(path) if rel is None else rel in self.files
+
+# Lists the tA articles and OBS stories once, for all the files to be verified.
+def loadTargets():
+    global ta_targets
+    global obs_targets
+    ta_targets = TargetIndex(ta_dir)
+    obs_targets = TargetIndex(obs_dir)
+
 class State:        # State information about a single note (a single column 9 value)
     def setPath(self, path ):
         State.path = path
@@ -209,6 +260,12 @@ def reportError(msg, reportlocation = True):
             issue = shortpath + ": row " + str(rowno) + ": " + msg + ".\n"
     else:
         issue = shortpath + ": " + msg + "\n"
+    if issues is not None:
+        issues.append(issue)
+    else:
+        writeIssue(issue)
+
+def writeIssue(issue):
     sys.stderr.write(issue)
     issuesFile().write(issue)
 
@@ -371,7 +428,7 @@ def checkTALinks(line):
         manpage = page.group(1)
         if not suppress16:
             path = os.path.join(ta_dir, manpage)
-            if not os.path.isdir(path):
+            if not ta_targets.isdir(path):
                 reportError("invalid tA page reference: " + manpage)
         page = tapage_re.search(page.group(2))
 
@@ -386,7 +443,7 @@ def checkTALinks(line):
             path = os.path.join(ta_dir, manpage)
             if path[-3:].lower() == '.md':
                 path = path[:-3]
-            if not os.path.isdir(path):
+            if not ta_targets.isdir(path):
                 reportError("invalid tA link: " + manpage)
             link = talink_re.search(link.group(3))
     return found
@@ -440,7 +497,7 @@ def checkOBSLinks(line):
             reportError("invalid language code in OBS link")
         elif not suppress6:
             obsPath = os.path.join(obs_dir, link.group(4)) + ".md"
-            if not os.path.isfile(obsPath):
+            if not obs_targets.isfile(obsPath):
                 reportError("invalid OBS link: " + link.group(1) + link.group(2) + link.group(3) + link.group(4) + link.group(5))
         link = obslink_re.search(link.group(6))
     return found
@@ -532,7 +589,7 @@ def verifySupportRef(supportref, note):
             folder = parts[0]
             article = parts[-1]
         path = os.path.join(ta_dir, os.path.join(folder, article))
-        if not suppress16 and not os.path.isdir(path):
+        if not suppress16 and not ta_targets.isdir(path):
             reportError("Invalid SupportReference value: " + supportref)
         elif not suppress14 and "rc://" in note and not supportref in note:
             reportError("SupportReference value does not match any tA articles mentioned in note")
@@ -617,6 +674,8 @@ def verifyFile(path):
     state.setPath(path)
 
     rowno = 0
+    book = None     # each file starts afresh, whether or not it has a header row, and in any worker process
+    chapter = 0
     data = tsv.tsvRead(path)  # The entire file is returned as a list of lists of strings (rows).
     heading = True
     for row in data:
@@ -632,8 +691,6 @@ def verifyFile(path):
                 if rowno == 1:
                     checkHeader(row)
                     state.addRow(row[0:4])
-                    book = None
-                    chapter = 0
 #                    verse = 0
                 else:
                     if state.locator and state.locator[3] == row[3]:
@@ -654,22 +711,64 @@ def verifyFile(path):
     if state.nBlanknotes > 0:
         reportError("has " + str(state.nBlanknotes) + " blank notes", False)
 
-def verifyDir(dirpath):
+# Returns the paths of the .tsv files in the specified folder, recursively.
+def tsvPaths(dirpath):
+    paths = []
     for f in os.listdir(dirpath):
         path = os.path.join(dirpath, f)
         if os.path.isdir(path) and path[-4:] != ".git":
             # It's a directory, recurse into it
-            verifyDir(path)
+            paths += tsvPaths(path)
         elif os.path.isfile(path) and f[-4:].lower() == '.tsv':
+            paths.append(path)
+    return paths
+
+def verifyDir(dirpath):
+    global nChecked
+    paths = tsvPaths(dirpath)
+    njobs = jobs or os.cpu_count() or 1
+    if njobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=njobs, initializer=initWorker,
+                                 initargs=(source_dir, ta_targets, obs_targets)) as pool:
+            pending = [pool.submit(verifyFileInWorker, path) for path in paths]
+            try:
+                for future in pending:
+                    for issue in future.result():
+                        writeIssue(issue)
+                    sys.stdout.flush()
+                    nChecked += 1
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+    else:
+        for path in paths:
             verifyFile(path)
             sys.stdout.flush()
-            global nChecked
             nChecked += 1
 
+# Sets the source folder and link targets of a worker process to those of the main process.
+def initWorker(source, ta, obs):
+    global source_dir
+    global ta_targets
+    global obs_targets
+    source_dir = source
+    ta_targets = ta
+    obs_targets = obs
+
+# Verifies the specified file in a worker process.
+# Returns the list of issues found.
+def verifyFileInWorker(path):
+    global issues
+    issues = []
+    verifyFile(path)
+    return issues
+
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] != 'hard-coded-path':
         source_dir = sys.argv[1]
 
+    loadTargets()
     if os.path.isdir(source_dir):
         verifyDir(source_dir)
     elif os.path.isfile(source_dir):
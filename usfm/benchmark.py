@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+# Measures the speed and memory use of the usfm tools on a synthetic corpus.
+# The corpus is made by synthetic_usfm.py, in each of its variants, from the specified books.
+# Each tool runs from its main entry point, with its usual configuration, in a fresh process
+# whose home folder is a scratch folder. So each run starts with empty parse and verify caches,
+# and the real tools_config.ini is not touched.
+# Reports the throughput of each tool on each variant in verses per second, and the peak RSS
+# of the process that ran it. Writes the results as JSON, to be compared with earlier runs.
+#
+# Usage: python benchmark.py [-o results.json] [--books RUT MRK ...] [--tools verifyUSFM ...]
+#                            [--variants plain poetry ...] [--repeat N] [--seed N]
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import synthetic_usfm
+
+# Tool name => (config section, variants the tool can process)
+# usfm_cleanup and mark_paragraphs do not process aligned usfm.
+tools = {
+    'parseUsfm': (None, synthetic_usfm.variants),
+    'verifyUSFM': ('VerifyUSFM', synthetic_usfm.variants),
+    'usfm2usx': ('Usfm2Usx', synthetic_usfm.variants),
+    'usfm_cleanup': ('UsfmCleanup', ('plain', 'footnotes', 'poetry')),
+    'mark_paragraphs': ('MarkParagraphs', ('plain', 'footnotes', 'poetry')),
+}
+
+# Returns the peak resident set size of this process in KB, or None if it cannot be known.
+def peakRss():
+    try:
+        import resource
+    except ImportError:     # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset // 1024
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss     # bytes on macOS, KB elsewhere
+
+# Returns the current git commit of the tools, if known.
+def gitCommit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+# Writes the books to be processed into work_dir/source.
+# Writes whatever else the tool needs, and returns the config section values for the tool.
+def prepare(tool, variant, books, seed, work_dir):
+    source_dir = os.path.join(work_dir, "source")
+    os.mkdir(source_dir)
+    for bookId in books:
+        with io.open(os.path.join(source_dir, synthetic_usfm.fileName(bookId)), "tw", encoding="utf-8", newline='\n') as output:
+            output.write(synthetic_usfm.makeBook(bookId, variant, seed, paragraphs = (tool != 'mark_paragraphs')))
+    values = {'source_dir': source_dir, 'filename': ""}
+    if tool == 'verifyUSFM':
+        values.update({'language_code': "en", 'usfm_version': "3.0" if variant == 'aligned' else "2.0"})
+    elif tool == 'usfm2usx':
+        rc_dir = os.path.join(work_dir, "rc")
+        os.mkdir(rc_dir)
+        for bookId in books:
+            makeEnglishBook(rc_dir, bookId)
+        values.update({'rc_dir': rc_dir, 'language_name': "Benchmark", 'language_code': "xx",
+                       'bible_name': "Synthetic Bible", 'bible_id': "reg", 'pub_date': "2024-01-01",
+                       'license': "CC BY-SA 4.0", 'version': "1"})
+    elif tool == 'mark_paragraphs':
+        model_dir = os.path.join(work_dir, "model")
+        os.mkdir(model_dir)
+        for bookId in books:
+            with io.open(os.path.join(model_dir, synthetic_usfm.fileName(bookId)), "tw", encoding="utf-8", newline='\n') as output:
+                output.write(synthetic_usfm.makeBook(bookId, variant, seed))
+        values['model_dir'] = model_dir
+    return values
+
+# Makes the minimal English resource container for one book that usfm2usx copies from.
+def makeEnglishBook(rc_dir, bookId):
+    book_dir = os.path.join(rc_dir, "en_" + bookId.lower() + "_ulb")
+    os.makedirs(os.path.join(book_dir, "content"))
+    with io.open(os.path.join(book_dir, "package.json"), "tw", encoding="utf-8") as output:
+        json.dump({'language': {}, 'project': {}, 'resource': {'status': {}}}, output)
+    for name in ("LICENSE.md", "content/config.yml", "content/toc.yml"):
+        with io.open(os.path.join(book_dir, name), "tw", encoding="utf-8") as output:
+            output.write("---\n")
+
+# Runs the specified tool on the specified variant, in this process.
+# Called in a child process, whose home folder is work_dir.
+# Writes the results as JSON to result_path.
+def measure(tool, variant, books, seed, work_dir, result_path):
+    import configmanager
+    section = tools[tool][0]
+    values = prepare(tool, variant, books, seed, work_dir)
+    if section:
+        os.makedirs(os.path.join(work_dir, "AppData", "Local"), exist_ok=True)    # where configmanager expects it
+        configs = configmanager.ToolsConfigManager()
+        sec = configs.default_section(section)
+        sec.update(values)
+        configs.write_section(section, sec)
+    startRss = peakRss()
+    if tool == 'parseUsfm':
+        import parseUsfm
+        def run():
+            for name in sorted(os.listdir(values['source_dir'])):
+                with io.open(os.path.join(values['source_dir'], name), "tr", encoding="utf-8-sig") as input:
+                    parseUsfm.parseString(input.read())
+    else:
+        run = __import__(tool).main
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    result = {'seconds': seconds, 'peak_rss_kb': peakRss(), 'start_rss_kb': startRss}
+    with io.open(result_path, "tw", encoding="utf-8") as output:
+        json.dump(result, output)
+
+# Runs the specified tool on the specified variant in a child process, repeat times.
+# Returns the result of the fastest run, or the error of a failed run.
+def benchmark(tool, variant, books, seed, repeat):
+    nverses = sum(synthetic_usfm.verseCount(bookId) for bookId in books)
+    result = {'tool': tool, 'variant': variant, 'verses': nverses}
+    best = None
+    for i in range(repeat):
+        work_dir = tempfile.mkdtemp(prefix="usfm_benchmark_")
+        try:
+            result_path = os.path.join(work_dir, "result.json")
+            env = dict(os.environ, HOME=work_dir, USERPROFILE=work_dir)
+            command = [sys.executable, os.path.abspath(__file__), "--measure", tool, variant, str(seed), work_dir,
+                       result_path] + list(books)
+            process = subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                                     cwd=os.path.dirname(os.path.abspath(__file__)))
+            if process.returncode != 0 or not os.path.isfile(result_path):
+                lines = process.stderr.strip().splitlines()
+                result['error'] = lines[-1] if lines else f"exit code {process.returncode}"
+                return result
+            with io.open(result_path, "tr", encoding="utf-8") as input:
+                run = json.load(input)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        if best is None or run['seconds'] < best['seconds']:
+            best = run
+    result.update(best)
+    result['verses_per_sec'] = round(nverses / best['seconds'], 1) if best['seconds'] > 0 else None
+    return result
+
+def report(result):
+    name = f"{result['tool']} ({result['variant']})"
+    if 'error' in result:
+        print(f"{name:32} FAILED: {result['error']}")
+    else:
+        rss = f"{result['peak_rss_kb'] / 1024:8.1f} MB" if result['peak_rss_kb'] is not None else "unknown"
+        print(f"{name:32} {result['seconds']:8.3f}s {result['verses_per_sec']:10.1f} verses/sec  peak RSS {rss}")
+    sys.stdout.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the usfm tools on a synthetic corpus.")
+    parser.add_argument('-o', '--output', help="JSON file for the results (default: benchmark-<date-time>.json)")
+    parser.add_argument('--books', nargs='+', default=list(synthetic_usfm.default_books), help="book ids of the corpus")
+    parser.add_argument('--tools', nargs='+', choices=list(tools), default=list(tools))
+    parser.add_argument('--variants', nargs='+', choices=synthetic_usfm.variants, default=list(synthetic_usfm.variants))
+    parser.add_argument('--repeat', type=int, default=3, help="runs of each tool, of which the fastest is reported")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the synthetic text")
+    parser.add_argument('--measure', nargs='+', help=argparse.SUPPRESS)      # internal, in the child process
+    args = parser.parse_args()
+
+    if args.measure:
+        (tool, variant, seed, work_dir, result_path) = args.measure[:5]
+        measure(tool, variant, args.measure[5:], int(seed), work_dir, result_path)
+        return
+
+    books = [id.upper() for id in args.books]
+    for bookId in books:
+        if bookId not in synthetic_usfm.usfm_verses.verseCounts:
+            parser.error(f"unknown book id: {bookId}")
+    started = datetime.now()
+    results = []
+    for tool in args.tools:
+        for variant in args.variants:
+            if variant in tools[tool][1]:
+                results.append(benchmark(tool, variant, books, args.seed, max(args.repeat, 1)))
+                report(results[-1])
+
+    output = args.output or started.strftime("benchmark-%Y%m%d-%H%M%S.json")
+    summary = {'date': started.isoformat(timespec='seconds'),
+               'commit': gitCommit(),
+               'python': platform.python_version(),
+               'platform': platform.platform(),
+               'books': books,
+               'seed': args.seed,
+               'repeat': args.repeat,
+               'results': results}
+    with io.open(output, "tw", encoding="utf-8", newline='\n') as file:
+        json.dump(summary, file, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
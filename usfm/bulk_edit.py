@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+# Bulk edit engine: applies the edits in a rules file to every matching file under a folder.
+# Does the same kind of edits as the streamEdit.py templates, without editing any code.
+#
+# Usage: python bulk_edit.py <rules file> <folder or file> [--dry-run] [--jobs N] [--diff <file>]
+#
+# The rules file is a Python module, like bulk_edit_rules.py. It defines:
+#   rules - an ordered list of (pattern, replacement) or (pattern, replacement, options).
+#       The pattern is a regular expression string or a compiled regular expression.
+#       The replacement is a re.sub() replacement string, or a function of the match.
+#       options is a string of words:
+#           line - apply the rule to each line separately, like inlinekey in streamEdit.py
+#           repeat - replace the first match, then search again from the start, until there is no match
+#           once - replace only the first match in the file (or in each line)
+#   filename - regular expression of the file names to edit (default r'.*\.md$')
+#   backup - True to keep the original of each changed file as <name>.orig (default True)
+#   max_changes - stop after changing this many files (default 0, no limit)
+#
+# Each file is read once and searched with one regular expression that combines all the patterns.
+# Files without a match are not edited further, which is most of them in a typical run.
+# The other files are edited in worker processes. The changed files are written back by
+# writing a temporary file and renaming it over the original, so a file is never left half written.
+# With --dry-run, nothing is written. A unified diff of the changes is output instead,
+# followed by a summary.
+
+import argparse
+import difflib
+import importlib.util
+import io
+import os
+import re
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Flags that can be scoped to one part of a regular expression
+scopedFlags = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x'))
+defaultFlags = re.UNICODE
+
+backreference_re = re.compile(r'\\[1-9]')
+
+class Rule:
+    def __init__(self, pattern, replacement, options=""):
+        self.regex = pattern if isinstance(pattern, re.Pattern) else re.compile(pattern)
+        self.replacement = replacement
+        words = options.split()
+        for word in words:
+            if word not in ('line', 'repeat', 'once'):
+                raise ValueError(f"Unknown rule option: {word}")
+        self.byLine = 'line' in words
+        self.repeat = 'repeat' in words
+        self.count = 1 if 'once' in words else 0
+
+    # Returns the text with this rule applied.
+    def apply(self, text):
+        if self.byLine:
+            return "".join(self.applyTo(line) for line in text.splitlines(keepends=True))
+        return self.applyTo(text)
+
+    def applyTo(self, text):
+        if self.repeat:
+            n = 1
+            while n:
+                (text, n) = self.regex.subn(self.replacement, text, count=1)
+            return text
+        return self.regex.sub(self.replacement, text, count=self.count)
+
+    # Returns True if this rule matches somewhere in the text.
+    def matches(self, text):
+        if self.byLine:
+            return any(self.regex.search(line) for line in text.splitlines(keepends=True))
+        return self.regex.search(text) is not None
+
+    # Returns the pattern of this rule, to be combined with the patterns of other rules, or None if it cannot be.
+    # Line rules are combined in multiline mode, so that ^ and $ match at the ends of each line.
+    def scopedPattern(self):
+        flags = self.regex.flags & ~defaultFlags
+        if self.byLine:
+            flags |= re.MULTILINE
+        letters = ""
+        for (flag, letter) in scopedFlags:
+            if flags & flag:
+                letters += letter
+                flags &= ~flag
+        if flags:
+            return None
+        return f"(?{letters}:{self.regex.pattern})" if letters else f"(?:{self.regex.pattern})"
+
+# The contents of a rules file.
+class RuleSet:
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        spec = importlib.util.spec_from_file_location("bulk_edit_rules_file", self.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        self.rules = [rule if isinstance(rule, Rule) else Rule(*rule) for rule in module.rules]
+        self.filename_re = re.compile(getattr(module, 'filename', r'.*\.md$'))
+        self.backup = getattr(module, 'backup', True)
+        self.max_changes = getattr(module, 'max_changes', 0)
+        self.prefilter = self.combine()
+
+    # Returns one regular expression that matches wherever any of the rules match, or None.
+    # Patterns with numbered backreferences, which would refer to other groups in the combined
+    # expression, are not combined; nor are patterns with flags that cannot be scoped.
+    def combine(self):
+        patterns = [rule.scopedPattern() for rule in self.rules]
+        if not patterns or None in patterns or any(backreference_re.search(p) for p in patterns):
+            return None
+        try:
+            return re.compile("|".join(patterns))
+        except re.error:    # such as the same group name in two patterns
+            return None
+
+    # Returns True if some rule may change the text.
+    # The text could only be changed by a later rule if some earlier rule changed it first,
+    # so if no rule matches the original text, the text does not change.
+    def mayChange(self, text):
+        if self.prefilter:
+            return self.prefilter.search(text) is not None
+        return any(rule.matches(text) for rule in self.rules)
+
+    def apply(self, text):
+        for rule in self.rules:
+            text = rule.apply(text)
+        return text
+
+ruleSet = None      # the RuleSet of the worker process
+
+def loadRules(path):
+    global ruleSet
+    ruleSet = RuleSet(path)
+
+# Edits the text of one file, without writing anything.
+# Returns (path, new text, diff), with None for the new text if the file does not change.
+# The diff is made only in a dry run.
+def editFile(path, dryRun):
+    with io.open(path, "tr", encoding="utf-8-sig") as input:
+        text = input.read()
+    if not ruleSet.mayChange(text):
+        return (path, None, None)
+    newtext = ruleSet.apply(text)
+    if newtext == text:
+        return (path, None, None)
+    diff = None
+    if dryRun:
+        diff = "".join(difflib.unified_diff(text.splitlines(keepends=True), newtext.splitlines(keepends=True),
+                                            fromfile=path, tofile=path + " (edited)"))
+    return (path, newtext, diff)
+
+def editChunk(paths, dryRun):
+    return [editFile(path, dryRun) for path in paths]
+
+# Writes the new text of a file atomically, after saving the original as a backup if required.
+# The file keeps its permissions.
+def writeFile(path, newtext, backup):
+    if backup:
+        bakpath = path + ".orig"
+        if not os.path.isfile(bakpath):
+            shutil.copy2(path, bakpath)     # keeps the time stamp, as renaming the original did
+    temppath = f"{path}.{os.getpid()}.tmp"
+    try:
+        with io.open(temppath, "tw", encoding='utf-8', newline='\n') as output:
+            output.write(newtext)
+        shutil.copymode(path, temppath)     # the edited file keeps its permissions
+        os.replace(temppath, path)
+    except BaseException:
+        if os.path.exists(temppath):
+            os.remove(temppath)
+        raise
+
+# Returns the paths of the files to edit under the specified folder, in a repeatable order.
+# Skips files and folders whose names start with a period, as the streamEdit.py templates do.
+def filePaths(folder, filename_re):
+    paths = []
+    for (dir, subdirs, names) in os.walk(folder):
+        subdirs[:] = sorted(name for name in subdirs if name[0] != '.')
+        paths.extend(os.path.join(dir, name) for name in sorted(names)
+                     if name[0] != '.' and filename_re.match(name))
+    return paths
+
+# Generates the results of editFile() for the paths, in order, using the specified number of processes.
+def editFiles(rulesPath, paths, dryRun, jobs):
+    if jobs <= 1 or len(paths) < 2:
+        loadRules(rulesPath)
+        for path in paths:
+            yield editFile(path, dryRun)
+        return
+    size = max(1, min(64, len(paths) // (jobs * 4)))     # chunks, so there is not a message per file
+    chunks = [paths[i:i+size] for i in range(0, len(paths), size)]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=loadRules, initargs=(rulesPath,)) as pool:
+        pending = [pool.submit(editChunk, chunk, dryRun) for chunk in chunks]
+        try:
+            for future in pending:
+                yield from future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+def shortname(longpath, source_dir):
+    if longpath.startswith(source_dir) and longpath != source_dir:
+        return longpath[len(source_dir)+1:]
+    return longpath
+
+# Applies the rules file to the files under source, which may be a folder or a single file.
+# Returns the number of files changed, or that would be changed in a dry run.
+def bulkEdit(rulesPath, source, dryRun=False, jobs=1, diffOutput=None):
+    rules = RuleSet(rulesPath)
+    if os.path.isdir(source):
+        source_dir = source
+        paths = filePaths(source, rules.filename_re)
+    else:
+        source_dir = os.path.dirname(source)
+        paths = [source]
+    nChanged = 0
+    nAdded = nRemoved = 0
+    for (path, newtext, diff) in editFiles(rules.path, paths, dryRun, jobs):
+        if newtext is None:
+            continue
+        nChanged += 1
+        if dryRun:
+            diffOutput.write(diff)
+            for line in diff.splitlines()[2:]:
+                if line.startswith("+"):
+                    nAdded += 1
+                elif line.startswith("-"):
+                    nRemoved += 1
+        else:
+            writeFile(path, newtext, rules.backup)
+            sys.stdout.write("Converted " + shortname(path, source_dir) + "\n")
+        if rules.max_changes and nChanged >= rules.max_changes:
+            break
+    if dryRun:
+        sys.stdout.write(f"Dry run: {nChanged} of {len(paths)} files would change, "
+                         f"{nAdded} line(s) added, {nRemoved} line(s) removed.\n")
+    return nChanged
+
+def main():
+    parser = argparse.ArgumentParser(description="Applies the edits in a rules file to every matching file under a folder.")
+    parser.add_argument('rules', help="rules file, like bulk_edit_rules.py")
+    parser.add_argument('source', help="folder or file to edit")
+    parser.add_argument('-n', '--dry-run', action='store_true', help="output a diff instead of changing any file")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument('--diff', help="file for the diff of a dry run (default: standard output)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        sys.stderr.write(f"No such file or folder: {args.source}\n")
+        return
+    if args.diff:
+        with io.open(args.diff, "tw", encoding='utf-8', newline='\n') as diffOutput:
+            nChanged = bulkEdit(args.rules, args.source, args.dry_run, args.jobs, diffOutput)
+    else:
+        nChanged = bulkEdit(args.rules, args.source, args.dry_run, args.jobs, sys.stdout)
+    if not args.dry_run:
+        sys.stdout.write("Done. Changed " + str(nChanged) + " files.\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Example rules file for bulk_edit.py.
+# Copy this file, change the rules, then run:
+#     python bulk_edit.py my_rules.py <folder> --dry-run
+# to see what would change, and the same without --dry-run to change the files.
+#
+# The rules are applied in order, so the result of one rule is the input to the next.
+# Each rule is (pattern, replacement) or (pattern, replacement, options),
+# where options is a string of words: line, repeat, once.
+
+import re
+
+filename = r'.*\.usfm$'
+backup = True
+max_changes = 0
+
+rules = [
+    # Converts { [text] } to a footnote, on each line, one at a time (inlinekey in usfm/streamEdit.py)
+    (r'\{ \[([^\]]+)\] \}', r'\\f + \\ft \1 \\f*', 'line repeat'),
+
+    # Removes empty \em spans (sub_re in usfm/streamEdit.py)
+    (r'\\em \\em\*', ''),
+
+    # Removes the ## from the start of headings (inlinekey in md/streamEdit.py), with filename = r'.*\.md$'
+#    (r'^##+ ', '', 'line once'),
+
+    # Removes empty headings in .md files
+#    (r'# *\n', ''),
+
+    # Changes rc://en/ links to rc://*/
+#    (r'rc://en/', 'rc://*/'),
+
+    # A replacement may be a function of the match
+#    (re.compile(r'& *nbsp;', re.IGNORECASE), lambda match: ' '),
+]
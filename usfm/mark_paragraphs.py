@@ -39,6 +39,8 @@ class State:
         self.reference = ""
         self.paragraphs_model = []   # list of {mark, chapter, verse, located}
         self.sections_model = []
+        self.paragraphs_index = {}   # (chapter, verse) => paragraph mark, see indexModel()
+        self.sections_index = {}
         self.expectText = False
 
     def __repr__(self):
@@ -54,6 +56,8 @@ class State:
         self.reference = fname
         self.paragraphs_model = []
         self.sections_model = []
+        self.paragraphs_index = {}
+        self.sections_index = {}
         self.expectText = False
         ## Open output USFM file for writing.
         global config
@@ -106,14 +110,22 @@ class State:
             already = self.pVerse == self.verse + 1 and self.pChapter == self.chapter
         return already
 
+    # Indexes the located paragraph and section marks of the model file by (chapter, verse).
+    # Where the model has more than one mark at a location, the first one is indexed.
+    # Called after the model file is scanned.
+    def indexModel(self):
+        self.paragraphs_index = {}
+        for pp in self.paragraphs_model:
+            if pp['located']:
+                self.paragraphs_index.setdefault((pp['chapter'], pp['verse']), pp['mark'])
+        self.sections_index = {}
+        for s in self.sections_model:
+            if s['located']:
+                self.sections_index.setdefault((s['chapter'], s['verse']), s['mark'])
+
     # Returns the paragraph mark that occurred in the model file at the current location.
     def pmarkInModel(self):
-        pmark = None
-        for pp in self.paragraphs_model:
-            if pp['chapter'] == self.chapter and pp['verse'] == self.verse and pp['located']:
-                pmark = pp['mark']
-                break
-        return pmark
+        return self.paragraphs_index.get((self.chapter, self.verse))
 
     # Returns True immediately after a verse or paragraph marker or footnote.
     def expectingText(self):
@@ -121,12 +133,7 @@ class State:
 
     # Returns the section mark that occurred in the model file at the current location.
     def smarkInModel(self):
-        smark = None
-        for s in self.sections_model:
-            if s['chapter'] == self.chapter and s['verse'] == self.verse and s['located']:
-                smark = s['mark']
-                break
-        return smark
+        return self.sections_index.get((self.chapter, self.verse))
 
     # Returns True if current verse is the last verse in a chapter
     def isEndOfChapter(self):
@@ -483,6 +490,7 @@ def scanModelFile(modelpath, fname):
             tokens = parseUsfm.parseString(str)
             for token in tokens:
                 scan(token)
+            state.indexModel()
     return success
 
 def countParagraphs(path):
@@ -1,6 +1,14 @@
 # -*- coding: utf-8 -*-
 
+import io
+import os
+import re
 import sys
+import threading
+import parse_cache
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pyparsing import Word, OneOrMore, nums, Literal, White, Group, \
         Suppress, NoMatch, Optional, CharsNotIn, MatchFirst
 
@@ -337,9 +345,285 @@ element =  MatchFirst([ide, id,
                        unknown])
 
 usfm    = OneOrMore(element)
+# The pyparsing grammar no longer parses anything. It is kept as the test oracle for tokenize(), see test_parseUsfm.py.
+
+# Marker kinds for the hand-written tokenizer, mirroring the pyparsing helpers above.
+PLAIN = 1       # usfmToken
+VALUE = 2       # usfmTokenValue(key, phrase)
+PLUS = 3        # usfmTokenValue(key, plus)
+NUMBER = 4      # usfmTokenNumber
+END = 5         # usfmEndToken
+
+# Maps each marker recognized by the grammar to its kind.
+# \toc is in the grammar but has no token class, so the tokenizer treats it as unknown.
+markerKinds = {
+    'id': VALUE, 'ide': VALUE, 'usfm': VALUE, 'h': VALUE,
+    'toc1': VALUE, 'toc2': VALUE, 'toc3': VALUE,
+    'mt': VALUE, 'mt1': VALUE, 'mt2': VALUE, 'mt3': VALUE, 'mte': VALUE,
+    'ms': VALUE, 'ms1': VALUE, 'ms2': VALUE, 'mr': VALUE,
+    'imt': VALUE, 'imt1': VALUE, 'imt2': VALUE, 'imt3': VALUE,
+    'ie': PLAIN,
+    's': VALUE, 's1': VALUE, 's2': VALUE, 's3': VALUE, 's4': VALUE, 's5': VALUE,
+    'sr': VALUE, 'sts': VALUE, 'r': VALUE,
+    'p': PLAIN, 'pc': PLAIN, 'pi': PLAIN, 'pi1': PLAIN, 'pi2': PLAIN, 'cls': PLAIN, 'mi': PLAIN,
+    'b': PLAIN,
+    'ca': PLAIN, 'ca*': END,
+    'c': NUMBER,
+    'cl': VALUE, 'cp': VALUE,
+    'va': PLAIN, 'va*': END, 'vp': PLAIN, 'vp*': END,
+    'v': NUMBER,
+    'wj': PLAIN, 'wj*': END,
+    'nd': PLAIN, 'nd*': END,
+    'q': PLAIN, 'q1': PLAIN, 'q2': PLAIN, 'q3': PLAIN, 'q4': PLAIN,
+    'qa': PLAIN, 'qac': PLAIN, 'qc': PLAIN,
+    'qm': PLAIN, 'qm1': PLAIN, 'qm2': PLAIN, 'qm3': PLAIN, 'qr': PLAIN,
+    'qs': PLAIN, 'qs*': END, 'qt': PLAIN, 'qt*': END,
+    'nb': PLAIN, 'm': PLAIN,
+    'f': PLUS, 'f*': END, 'fe': PLUS, 'fe*': END,
+    'fr': VALUE, 'fk': VALUE, 'ft': VALUE, 'fq': VALUE,
+    'fqa': VALUE, 'fqa*': END,
+    'fp': PLAIN,
+    'fv': VALUE, 'fv*': END, 'fdc': VALUE, 'fdc*': END,
+    'x': PLUS, 'x*': END, 'xdc': PLAIN, 'xdc*': END,
+    'xo': VALUE, 'xq': VALUE,
+    'xt': VALUE, 'xt*': END, '+xt': VALUE, '+xt*': END,
+    'it': PLAIN, 'it*': END,
+    'bd': PLAIN, 'bd*': END, 'bdit': PLAIN, 'bdit*': END,
+    'li': PLAIN, 'li1': PLAIN, 'li2': PLAIN, 'li3': PLAIN, 'li4': PLAIN,
+    'd': VALUE, 'sp': VALUE,
+    'add': PLAIN, 'add*': END,
+    'pn': PLAIN, 'pn*': END,
+    'rq': VALUE, 'rq*': END,
+    'w': PLAIN, 'w*': END,
+    'tl': PLAIN, 'tl*': END,
+    'is': VALUE, 'is1': VALUE, 'is2': VALUE, 'is3': VALUE,
+    'ip': PLAIN, 'ipi': PLAIN, 'im': PLAIN, 'imi': PLAIN,
+    'iot': PLAIN, 'io': PLAIN, 'io1': PLAIN, 'io2': PLAIN,
+    'ior': PLAIN, 'ior*': END,
+    'k': PLAIN, 'k*': END,
+    'bk': PLAIN, 'bk*': END,
+    'sc': PLAIN, 'sc*': END,
+    'rem': VALUE,
+    'tr': PLAIN,
+    'th1': PLAIN, 'th2': PLAIN, 'th3': PLAIN, 'th4': PLAIN, 'th5': PLAIN, 'th6': PLAIN,
+    'thr1': PLAIN, 'thr2': PLAIN, 'thr3': PLAIN, 'thr4': PLAIN, 'thr5': PLAIN, 'thr6': PLAIN,
+    'tc1': PLAIN, 'tc2': PLAIN, 'tc3': PLAIN, 'tc4': PLAIN, 'tc5': PLAIN, 'tc6': PLAIN,
+    'tcr1': PLAIN, 'tcr2': PLAIN, 'tcr3': PLAIN, 'tcr4': PLAIN, 'tcr5': PLAIN, 'tcr6': PLAIN,
+    'periph': VALUE,
+}
+
+space_re = re.compile(r'[ \t\r\n]*')        # pyparsing default whitespace
+phrase_re = re.compile(r'[^\n\\]*')          # same as phrase
+marker_re = re.compile(r'[^ \t\r\n\\]*')     # marker name, up to White() or the next backslash
+unknown_re = re.compile(r'[^ \n\t\\]*')      # same as unknown
+number_re = re.compile(r'([0-9\-]+)[ \t\r\n]+')
+
+# Scans a cleaned usfm string on backslash boundaries.
+# Returns the same token groups that the pyparsing grammar returns, as tuples.
+def tokenize(s):
+    s = s.expandtabs()      # pyparsing does this by default
+    groups = []
+    pos = 0
+    n = len(s)
+    while True:
+        pos = space_re.match(s, pos).end()
+        if pos >= n:
+            break
+        if s[pos] != '\\':
+            end = phrase_re.match(s, pos).end()
+            groups.append(('text', s[pos:end]))
+            pos = end
+            continue
+        if s.startswith('\\', pos+1):
+            groups.append(('\\\\',))
+            pos += 2
+            continue
+
+        end = marker_re.match(s, pos+1).end()
+        name = s[pos+1:end]
+        star = name.find('*')
+        if star >= 0:
+            name = name[:star+1]
+            if markerKinds.get(name) == END:
+                groups.append((name,))
+                pos += star + 2
+                continue
+        elif end < n and s[end] != '\\' and (kind := markerKinds.get(name)):
+            start = space_re.match(s, end).end()
+            if kind == PLAIN:
+                groups.append((name,))
+                pos = start
+                continue
+            if kind == VALUE:
+                end = phrase_re.match(s, start).end()
+                groups.append((name, s[start:end]) if end > start else (name,))
+                pos = end
+                continue
+            if kind == PLUS:
+                if s.startswith('+', start):
+                    groups.append((name, '+'))
+                    pos = start + 1
+                else:
+                    groups.append((name,))
+                    pos = start
+                continue
+            if number := number_re.match(s, start):
+                groups.append((name, number.group(1)))
+                pos = number.end()
+                continue
+        # Unrecognized marker, or a chapter/verse marker without a valid number
+        end = unknown_re.match(s, pos+1).end()
+        groups.append(('unknown', s[pos+1:end]))
+        pos = end
+    return groups
+
+# Increment whenever a change to clean() or tokenize() changes the token groups they produce,
+# so that parse_cache entries written by the older parser are not used.
+parserVersion = 1
 
 # input string
-def parseString(unicodeString):
+# Token groups are read from the parse cache if this string has been parsed before.
+# If jobs > 1, a long string is parsed a chapter at a time by that many worker processes.
+def parseString(unicodeString, jobs=1):
+    try:
+        key = parse_cache.textKey(unicodeString, parserVersion)
+        tokens = parse_cache.load(key)
+        if tokens is None:
+            if jobs > 1 and len(unicodeString) >= parallel_min_length:
+                tokens = []
+                for groups in parseChunks(io.StringIO(unicodeString), jobs):
+                    tokens.extend(groups)
+            else:
+                s = clean(unicodeString)
+                tokens = tokenize(s)
+            parse_cache.save(key, tokens)
+    except Exception as e:
+        print(e)
+        print(repr(unicodeString[:50]))
+        sys.exit()
+    return [createToken(t) for t in tokens]
+
+chapter_re = re.compile(r'\\c[ \t\r\n]')
+
+# Generates the tokens of a usfm file one chapter at a time, without reading the whole file first.
+# Accepts a file path or an open text stream.
+# Yields the same tokens that parseString() returns for the whole file.
+# Only files given by path use the parse cache, because a stream cannot be hashed in advance.
+# See parseString() about jobs.
+def iter_tokens(path_or_stream, jobs=1):
+    if isinstance(path_or_stream, (str, os.PathLike)):
+        key = parse_cache.fileKey(path_or_stream, parserVersion)
+        if jobs > 1 and os.path.getsize(path_or_stream) < parallel_min_length:
+            jobs = 1
+        with io.open(path_or_stream, "tr", encoding="utf-8-sig") as input:
+            yield from iterLines(input, key, jobs)
+    else:
+        yield from iterLines(path_or_stream, None, jobs)
+
+# Same as iter_tokens(), for usfm text that is already in memory.
+def iterString(unicodeString, jobs=1):
+    key = parse_cache.textKey(unicodeString, parserVersion)
+    if len(unicodeString) < parallel_min_length:
+        jobs = 1
+    yield from iterLines(io.StringIO(unicodeString), key, jobs)
+
+# Generates the tokens of the usfm text in lines, one chapter at a time.
+# Replays the parse cache entry for the specified key if there is one, otherwise parses
+# the lines and writes the cache entry as it goes.
+def iterLines(lines, key, jobs=1):
+    nYielded = 0
+    if cached := parse_cache.records(key):
+        try:
+            for groups in cached:
+                for t in groups:
+                    yield createToken(t)
+                    nYielded += 1
+            return
+        except parse_cache.readErrors:
+            parse_cache.remove(key)     # unreadable entry; parse the text instead
+            key = None
+
+    writer = parse_cache.Writer(key)
+    try:
+        for groups in parseChunks(lines, jobs):
+            writer.add(groups)
+            for t in groups:
+                if nYielded > 0:
+                    nYielded -= 1       # already yielded from the cache
+                else:
+                    yield createToken(t)
+        writer.commit()
+    finally:
+        writer.discard()
+
+# Generates the usfm text in lines, in pieces that can be tokenized separately.
+# Each piece after the first starts with a \c line. This is safe because
+# a backslash at the start of a line always starts a new token.
+def chapterChunks(lines):
+    chunk = []
+    for line in lines:
+        if chunk and chapter_re.match(line):
+            yield ''.join(chunk)
+            chunk = []
+        chunk.append(line)
+    if chunk:
+        yield ''.join(chunk)
+
+# Generates the token groups of the usfm text in lines, one chapter at a time.
+# If jobs > 1, the chapters are parsed in parallel by that many worker processes,
+# unless a footnote, cross reference or milestone crosses a chapter boundary.
+def parseChunks(lines, jobs=1):
+    if jobs <= 1:
+        yield from map(tokenizeChunk, chapterChunks(lines))
+        return
+
+    chunks = list(chapterChunks(lines))
+    if len(chunks) < 2 or any(crossesChunk(chunk) for chunk in chunks):
+        yield from map(tokenizeChunk, chunks)
+        return
+    try:
+        results = list(getPool(jobs).map(tokenizeChunk, chunks, chunksize=len(chunks) // (jobs * 4) + 1))
+    except (OSError, BrokenProcessPool):
+        shutdownPool()
+        results = map(tokenizeChunk, chunks)     # no worker processes, parse here instead
+    yield from results
+
+def tokenizeChunk(chunk):
+    return tokenize(clean(chunk))
+
+span_start_re = re.compile(r'\\(f|fe|x)[ \t\r\n]|\\([a-z0-9]+)-s[ \t\r\n\\]')
+span_end_re = re.compile(r'\\(f|fe|x)\*|\\([a-z0-9]+)-e[ \t\r\n\\]')
+
+# Returns True if the chunk starts a note or milestone that it does not end, or ends one that it does not start.
+# Books with such chunks are parsed serially, as a precaution.
+def crossesChunk(chunk):
+    starts = Counter(m.group(1) or m.group(2) for m in span_start_re.finditer(chunk))
+    ends = Counter(m.group(1) or m.group(2) for m in span_end_re.finditer(chunk))
+    return starts != ends
+
+parallel_min_length = 200000     # shorter texts parse faster than the worker processes can be started
+processPools = dict()     # jobs => worker pool
+poolLock = threading.Lock()
+
+# Returns the worker pool for parallel parsing, starting it if needed.
+# The pool is kept for the life of the process, so that parsing a folder of books pays
+# the cost of starting the workers only once.
+# There is one pool per number of jobs, so that callers in different threads do not replace each other's pool.
+def getPool(jobs):
+    with poolLock:
+        if jobs not in processPools:
+            processPools[jobs] = ProcessPoolExecutor(max_workers=jobs)
+        return processPools[jobs]
+
+def shutdownPool():
+    with poolLock:
+        for pool in processPools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        processPools.clear()
+
+# Same as parseString(), but uses the pyparsing grammar. Much slower.
+# Only kept as the test oracle for parseString(), see test_parseUsfm.py.
+def parseStringPyparsing(unicodeString):
     try:
         s = clean(unicodeString)
         tokens = usfm.parseString(s, parseAll=True)
@@ -379,175 +663,29 @@ def clean(unicodeString):
 
     return ret_value
 
+# Returns a new token for the specified token group: (key,) or (key, value).
+# The token class comes from tokenClasses, which is defined after the classes.
 def createToken(t):
-    options = {
-        'id':   IDToken,
-        'ide':  IDEToken,
-        'usfm': USFMVersionToken,
-        'h':    HToken,
-        'toc1': TOC1Token,
-        'toc2': TOC2Token,
-        'toc3': TOC3Token,
-        'mt':   MTToken,
-        'mt1':  MTToken,
-        'mt2':  MT2Token,
-        'mt3':  MT3Token,
-        'mte':  MTEToken,
-        'imt':  IMTToken,
-        'imt1': IMTToken,
-        'imt2': IMT2Token,
-        'imt3': IMT3Token,
-        'ie':   IEToken,
-
-        'ms':   MSToken,
-        'ms1':  MSToken,
-        'ms2':  MS2Token,
-        'mr':   MRToken,
-        'p':    PToken,
-        'pc':   PCToken,
-        'pi':   PIToken,
-        'pi1':  PI1Token,
-        'pi2':  PI2Token,
-        'cls':  CLSToken,
-
-        'b':    BToken,
-
-        's':    SToken,
-        's1':   SToken,
-        's2':   S2Token,
-        's3':   S3Token,
-        's4':   S4Token,
-        's5':   S5Token,
-
-        'sr':   SRToken,
-        'sts':  STSToken,
-        'mi':   MIToken,
-        'r':    RToken,
-        'c':    CToken,
-        'ca':   CAStartToken, 'ca*':  CAEndToken,
-        'cl':   CLToken,
-        'cp':   CPToken,
-        'v':    VToken,
-        'va':   VAStartToken, 'va*':  VAEndToken,
-        'vp':   VPStartToken, 'vp*':  VPEndToken,
-        'q':    QToken,
-        'q1':   Q1Token,
-        'q2':   Q2Token,
-        'q3':   Q3Token,
-        'q4':   Q4Token,
-        'qa':   QAToken,
-        'qac':  QACToken,
-        'qc':   QCToken,
-        'qm':   QMToken,
-        'qm1':  QM1Token,
-        'qm2':  QM2Token,
-        'qm3':  QM3Token,
-        'qr':   QRToken,
-        'qs':   QSStartToken, 'qs*':  QSEndToken,
-        'qt':   QTStartToken, 'qt*':  QTEndToken,
-        'nb':   NBToken,
-        'f':    FStartToken, 'f*':   FEndToken,
-        'fe':   FEStartToken,  # Footnote intended as an end note
-        'fe*':  FEEndToken,
-        'fr':   FRToken,
-        'fk':   FKToken,
-        'ft':   FTToken,
-        'fq':   FQToken,
-        'fqa':  FQAToken, 'fqa*': FQAEndToken,
-        'fv':   FVStartToken, 'fv*':  FVEndToken,
-        'fdc':  FDCStartToken, 'fdc*': FDCEndToken,
-        'fp':   FPToken,
-        'x':    XStartToken, 'x*':   XEndToken,
-        'xdc':  XDCStartToken, 'xdc*': XDCEndToken,
-        'xo':   XOToken,
-        'xq':   XQToken,
-        'xt':   XTToken, 'xt*': XTEndToken,
-        '+xt':  XTToken, '+xt*': XTEndToken,
-        'wj':   WJStartToken, 'wj*':  WJEndToken,
-        'tl':   TLStartToken, 'tl*':  TLEndToken,
-        'it':   ITStartToken, 'it*':  ITEndToken,
-        'bd':   BDStartToken, 'bd*':  BDEndToken,
-        'bdit': BDITStartToken, 'bdit*': BDITEndToken,
-
-        'li':   LIToken,
-        'li1':  LI1Token,
-        'li2':  LI2Token,
-        'li3':  LI3Token,
-        'li4':  LI4Token,
-        'd':    DToken,
-        'sp':   SPToken,
-#        'i*':   IEndToken,
-        'add':  ADDStartToken, 'add*': ADDEndToken,
-        'nd':   NDStartToken, 'nd*':  NDEndToken,
-        'pn':   PNStartToken, 'pn*': PNEndToken,
-        'rq':   RQStartToken, 'rq*': RQEndToken,
-        'w':    WStartToken, 'w*': WEndToken,
-        'sc':   SCStartToken, 'sc*':  SCEndToken,
-        'm':    MToken,
-        '\\\\': EscapedToken,
-        'rem':  REMToken,
-        'tr':   TRToken,
-        'th1':  TH1Token,
-        'th2':  TH2Token,
-        'th3':  TH3Token,
-        'th4':  TH4Token,
-        'th5':  TH5Token,
-        'th6':  TH6Token,
-        'thr1': THR1Token,
-        'thr2': THR2Token,
-        'thr3': THR3Token,
-        'thr4': THR4Token,
-        'thr5': THR5Token,
-        'thr6': THR6Token,
-        'tc1':  TC1Token,
-        'tc2':  TC2Token,
-        'tc3':  TC3Token,
-        'tc4':  TC4Token,
-        'tc5':  TC5Token,
-        'tc6':  TC6Token,
-        'tcr1': TCR1Token,
-        'tcr2': TCR2Token,
-        'tcr3': TCR3Token,
-        'tcr4': TCR4Token,
-        'tcr5': TCR5Token,
-        'tcr6': TCR6Token,
-        'toc1': TOC1Token,
-        'toc2': TOC2Token,
-        'toc3': TOC3Token,
-
-        'is':   ISToken,
-        'is1':  ISToken,
-        'is2':  IS2Token,
-        'is3':  IS3Token,
-
-        'ip':   IPToken,
-        'ipi':  IPIToken,
-        'im':   IMToken,
-        'imi':  IMIToken,
-        'iot':  IOTToken,
-        'io':   IOToken,
-        'io1':  IOToken,
-        'io2':  IO2Token,
-        'ior':  IORStartToken, 'ior*': IOREndToken,
-        'k':    KStartToken, 'k*':  KEndToken,
-        'bk':   BKStartToken, 'bk*':  BKEndToken,
-        'text': TEXTToken,
-        'periph': PeriphToken,
-        'unknown': UnknownToken
-    }
-    for k, v in options.items():
-        if t[0] == k:
-            if len(t) == 1:
-                token = v()
-            else:
-                token = v(t[1])
-            token.type = k
-            return token
-    raise Exception(t[0])
+    key = t[0]
+    try:
+        token = tokenClasses[key](t[1]) if len(t) > 1 else tokenClasses[key]()
+    except KeyError:
+        raise Exception(key)
+    token.type = key
+    return token
 
 
+# Gives every token class an empty __slots__ unless it declares its own,
+# so that token instances carry no per-instance __dict__.
+class UsfmTokenType(type):
+    def __new__(mcls, name, bases, namespace):
+        namespace.setdefault('__slots__', ())
+        return super().__new__(mcls, name, bases, namespace)
+
 # noinspection PyMethodMayBeStatic
-class UsfmToken:
+class UsfmToken(metaclass=UsfmTokenType):
+    __slots__ = ('value', 'type')
+
     def __init__(self, value=''):
         self.value = value
         self.type = None
@@ -1451,3 +1589,157 @@ class BKEndToken(UsfmToken):
 class PeriphToken(UsfmToken):
     def renderOn(self, printer):  return printer.render_periph(self)
     def is_periph(self):          return True
+
+# Maps each token key to its token class
+tokenClasses = {
+    'id':   IDToken,
+    'ide':  IDEToken,
+    'usfm': USFMVersionToken,
+    'h':    HToken,
+    'toc1': TOC1Token,
+    'toc2': TOC2Token,
+    'toc3': TOC3Token,
+    'mt':   MTToken,
+    'mt1':  MTToken,
+    'mt2':  MT2Token,
+    'mt3':  MT3Token,
+    'mte':  MTEToken,
+    'imt':  IMTToken,
+    'imt1': IMTToken,
+    'imt2': IMT2Token,
+    'imt3': IMT3Token,
+    'ie':   IEToken,
+
+    'ms':   MSToken,
+    'ms1':  MSToken,
+    'ms2':  MS2Token,
+    'mr':   MRToken,
+    'p':    PToken,
+    'pc':   PCToken,
+    'pi':   PIToken,
+    'pi1':  PI1Token,
+    'pi2':  PI2Token,
+    'cls':  CLSToken,
+
+    'b':    BToken,
+
+    's':    SToken,
+    's1':   SToken,
+    's2':   S2Token,
+    's3':   S3Token,
+    's4':   S4Token,
+    's5':   S5Token,
+
+    'sr':   SRToken,
+    'sts':  STSToken,
+    'mi':   MIToken,
+    'r':    RToken,
+    'c':    CToken,
+    'ca':   CAStartToken, 'ca*':  CAEndToken,
+    'cl':   CLToken,
+    'cp':   CPToken,
+    'v':    VToken,
+    'va':   VAStartToken, 'va*':  VAEndToken,
+    'vp':   VPStartToken, 'vp*':  VPEndToken,
+    'q':    QToken,
+    'q1':   Q1Token,
+    'q2':   Q2Token,
+    'q3':   Q3Token,
+    'q4':   Q4Token,
+    'qa':   QAToken,
+    'qac':  QACToken,
+    'qc':   QCToken,
+    'qm':   QMToken,
+    'qm1':  QM1Token,
+    'qm2':  QM2Token,
+    'qm3':  QM3Token,
+    'qr':   QRToken,
+    'qs':   QSStartToken, 'qs*':  QSEndToken,
+    'qt':   QTStartToken, 'qt*':  QTEndToken,
+    'nb':   NBToken,
+    'f':    FStartToken, 'f*':   FEndToken,
+    'fe':   FEStartToken,  # Footnote intended as an end note
+    'fe*':  FEEndToken,
+    'fr':   FRToken,
+    'fk':   FKToken,
+    'ft':   FTToken,
+    'fq':   FQToken,
+    'fqa':  FQAToken, 'fqa*': FQAEndToken,
+    'fv':   FVStartToken, 'fv*':  FVEndToken,
+    'fdc':  FDCStartToken, 'fdc*': FDCEndToken,
+    'fp':   FPToken,
+    'x':    XStartToken, 'x*':   XEndToken,
+    'xdc':  XDCStartToken, 'xdc*': XDCEndToken,
+    'xo':   XOToken,
+    'xq':   XQToken,
+    'xt':   XTToken, 'xt*': XTEndToken,
+    '+xt':  XTToken, '+xt*': XTEndToken,
+    'wj':   WJStartToken, 'wj*':  WJEndToken,
+    'tl':   TLStartToken, 'tl*':  TLEndToken,
+    'it':   ITStartToken, 'it*':  ITEndToken,
+    'bd':   BDStartToken, 'bd*':  BDEndToken,
+    'bdit': BDITStartToken, 'bdit*': BDITEndToken,
+
+    'li':   LIToken,
+    'li1':  LI1Token,
+    'li2':  LI2Token,
+    'li3':  LI3Token,
+    'li4':  LI4Token,
+    'd':    DToken,
+    'sp':   SPToken,
+#    'i*':   IEndToken,
+    'add':  ADDStartToken, 'add*': ADDEndToken,
+    'nd':   NDStartToken, 'nd*':  NDEndToken,
+    'pn':   PNStartToken, 'pn*': PNEndToken,
+    'rq':   RQStartToken, 'rq*': RQEndToken,
+    'w':    WStartToken, 'w*': WEndToken,
+    'sc':   SCStartToken, 'sc*':  SCEndToken,
+    'm':    MToken,
+    '\\\\': EscapedToken,
+    'rem':  REMToken,
+    'tr':   TRToken,
+    'th1':  TH1Token,
+    'th2':  TH2Token,
+    'th3':  TH3Token,
+    'th4':  TH4Token,
+    'th5':  TH5Token,
+    'th6':  TH6Token,
+    'thr1': THR1Token,
+    'thr2': THR2Token,
+    'thr3': THR3Token,
+    'thr4': THR4Token,
+    'thr5': THR5Token,
+    'thr6': THR6Token,
+    'tc1':  TC1Token,
+    'tc2':  TC2Token,
+    'tc3':  TC3Token,
+    'tc4':  TC4Token,
+    'tc5':  TC5Token,
+    'tc6':  TC6Token,
+    'tcr1': TCR1Token,
+    'tcr2': TCR2Token,
+    'tcr3': TCR3Token,
+    'tcr4': TCR4Token,
+    'tcr5': TCR5Token,
+    'tcr6': TCR6Token,
+
+    'is':   ISToken,
+    'is1':  ISToken,
+    'is2':  IS2Token,
+    'is3':  IS3Token,
+
+    'ip':   IPToken,
+    'ipi':  IPIToken,
+    'im':   IMToken,
+    'imi':  IMIToken,
+    'iot':  IOTToken,
+    'io':   IOToken,
+    'io1':  IOToken,
+    'io2':  IO2Token,
+    'ior':  IORStartToken, 'ior*': IOREndToken,
+    'k':    KStartToken, 'k*':  KEndToken,
+    'bk':   BKStartToken, 'bk*':  BKEndToken,
+    'text': TEXTToken,
+    'periph': PeriphToken,
+    'unknown': UnknownToken
+}
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# On-disk cache of parsed usfm, shared by all the usfm tools that use parseUsfm.
+# Each entry holds the token groups for one usfm text, as a series of records.
+# A record is the marshalled and compressed token groups for a piece of the text, usually one chapter,
+# so that parseUsfm.iter_tokens() can read and write entries without holding a whole book in memory.
+# Entries are keyed by a hash of the usfm text and the parser version, so an edited file
+# or a changed parser never sees a stale entry.
+
+import hashlib
+import io
+import marshal
+import os
+import struct
+import tempfile
+import zlib
+
+cache_dir = os.path.expanduser("~/AppData/Local/usfm_wizard/parse_cache")
+enabled = True
+min_length = 4096       # shorter texts parse faster than the cache can be read
+max_entries = 400       # oldest entries are removed beyond this number
+
+recordHeader = struct.Struct('<I')     # length of the compressed record that follows
+
+def newHash(version):
+    return hashlib.sha1(f"{version}.{marshal.version}\n".encode('utf-8'))
+
+# Returns the cache key for the specified usfm text, or None if the text should not be cached.
+def textKey(text, version):
+    if not enabled or len(text) < min_length:
+        return None
+    h = newHash(version)
+    h.update(text.encode('utf-8', 'surrogatepass'))
+    return h.hexdigest()
+
+# Returns the cache key for the specified usfm file, or None if the file should not be cached.
+# Reads the file the same way the tools do, so the key is the same as textKey() of the file contents.
+def fileKey(path, version):
+    if not enabled or os.path.getsize(path) < min_length:
+        return None
+    h = newHash(version)
+    with io.open(path, "tr", encoding="utf-8-sig") as input:
+        while block := input.read(1 << 20):
+            h.update(block.encode('utf-8', 'surrogatepass'))
+    return h.hexdigest()
+
+def entryPath(key):
+    return os.path.join(cache_dir, key + ".bin")
+
+# Errors that mean a cache entry is unreadable
+readErrors = (OSError, ValueError, EOFError, TypeError, struct.error, zlib.error)
+
+# Generates the token group lists of the cache entry for the specified key, one record at a time.
+# Returns None if there is no such entry.
+def records(key):
+    if key is None:
+        return None
+    path = entryPath(key)
+    try:
+        input = open(path, 'rb')
+        os.utime(path)     # keeps recently used entries from being pruned
+    except OSError:
+        return None
+    return readRecords(input)
+
+def readRecords(input):
+    with input:
+        while header := input.read(recordHeader.size):
+            (length,) = recordHeader.unpack(header)
+            yield marshal.loads(zlib.decompress(input.read(length)))
+
+# Returns the token groups cached for the specified key, or None if they are not cached.
+def load(key):
+    groups = None
+    if reader := records(key):
+        try:
+            groups = []
+            for record in reader:
+                groups.extend(record)
+        except readErrors:
+            remove(key)
+            groups = None
+    return groups
+
+# Saves the token groups for the specified key.
+def save(key, groups):
+    writer = Writer(key)
+    writer.add(groups)
+    writer.commit()
+
+# Writes a cache entry one record at a time.
+# The entry appears in the cache only when commit() is called.
+# Failure to write the cache is not an error; the text just gets parsed again next time.
+class Writer:
+    def __init__(self, key):
+        self.output = None
+        self.temppath = None
+        if key is not None:
+            self.path = entryPath(key)
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                # A unique name, so that threads and processes writing the same entry do not collide
+                (fd, self.temppath) = tempfile.mkstemp(suffix=".tmp", prefix=os.path.basename(self.path) + ".", dir=cache_dir)
+                self.output = os.fdopen(fd, 'wb')
+            except OSError:
+                self.output = None
+
+    def add(self, groups):
+        if self.output:
+            try:
+                record = zlib.compress(marshal.dumps(groups), 1)
+                self.output.write(recordHeader.pack(len(record)))
+                self.output.write(record)
+            except (OSError, ValueError):
+                self.discard()
+
+    def commit(self):
+        if self.output:
+            try:
+                self.output.close()
+                self.output = None
+                os.replace(self.temppath, self.path)     # atomic, in case another tool is reading the same entry
+                prune()
+            except OSError:
+                self.discard()
+
+    # Abandons the entry. Does nothing if the entry has been committed.
+    def discard(self):
+        if self.output:
+            self.output.close()
+            self.output = None
+        try:
+            if self.temppath and os.path.exists(self.temppath):
+                os.remove(self.temppath)
+        except OSError:
+            pass
+
+# Removes the entry for the specified key, typically because it is unreadable.
+def remove(key):
+    try:
+        os.remove(entryPath(key))
+    except OSError:
+        pass
+
+# Removes the least recently used entries when there are too many.
+def prune():
+    entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith(".bin")]
+    if len(entries) > max_entries:
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - max_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+# Removes all entries from the cache.
+def clear():
+    if os.path.isdir(cache_dir):
+        for entry in os.scandir(cache_dir):
+            if entry.name.endswith(".bin"):
+                os.remove(entry.path)
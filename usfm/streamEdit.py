@@ -2,6 +2,8 @@
 # This program may be modified to do any kind of stream operation on a folder full of files.
 # Backs up the .md file being modified.
 # Outputs .md files of the same name in the same location.
+# For edits that are regular expression substitutions, usfm/bulk_edit.py does the same without editing code,
+# and faster, with a rules file like usfm/bulk_edit_rules.py.
 
 import re       # regular expression module
 import io
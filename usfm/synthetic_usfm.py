@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# Generates synthetic usfm books for benchmarking the usfm tools.
+# Each book has the chapters and verses that usfm_verses.verseCounts gives for it,
+# filled with random but repeatable text. The variants of a book differ in their markup:
+#   plain - paragraphs and section headings, like a typical unaligned translation
+#   aligned - usfm 3 with every word aligned, like unfoldingWord ULT and UST
+#   footnotes - plain, with footnotes in about half the verses
+#   poetry - verses in \q1 and \q2 lines, with stanza breaks
+# Usage: python synthetic_usfm.py <target folder> [book ids]
+# The target folder gets a subfolder for each variant.
+
+import io
+import os
+import random
+import sys
+import usfm_verses
+
+variants = ('plain', 'aligned', 'footnotes', 'poetry')
+default_books = ('RUT', 'JON', 'MRK', 'PHP', 'JUD')
+
+words = ("the", "and", "of", "to", "he", "his", "in", "that", "them", "they", "for", "you", "with",
+         "people", "said", "Yahweh", "God", "land", "king", "son", "house", "day", "will", "came",
+         "went", "all", "who", "were", "from", "your", "when", "this", "upon", "city", "hand",
+         "father", "brothers", "heard", "answered", "covenant", "servant", "mountain", "water",
+         "bread", "life", "spirit", "law", "name", "word", "heart", "altar", "gold", "silver",
+         "Israel", "Jerusalem", "Judah", "Moses", "David", "Jesus", "Paul", "elders", "prophet")
+ends = ('.', '.', '.', '.', '?', '!')
+
+# Returns the file name for the specified book, like 41-MAT.usfm
+def fileName(bookId):
+    return f"{usfm_verses.verseCounts[bookId]['usfm_number']}-{bookId}.usfm"
+
+# Returns the number of verses in the specified book
+def verseCount(bookId):
+    return sum(usfm_verses.verseCounts[bookId]['verses'])
+
+# Returns a sentence of random words.
+def sentence(rng, minWords=4, maxWords=14):
+    sent = [rng.choice(words) for i in range(rng.randint(minWords, maxWords))]
+    sent[0] = sent[0].capitalize()
+    if rng.random() < 0.15:
+        sent[-1] += ","
+        sent.append("“" + rng.choice(words).capitalize())
+        sent.extend(rng.choice(words) for i in range(rng.randint(2, 6)))
+        return " ".join(sent) + rng.choice(ends) + "”"
+    return " ".join(sent) + rng.choice(ends)
+
+# Returns the text of one verse, one or more sentences.
+def verseText(rng):
+    return " ".join(sentence(rng) for i in range(rng.randint(1, 3)))
+
+def footnote(rng):
+    text = sentence(rng, 3, 10)
+    if rng.random() < 0.3:
+        return f"\\f + \\ft {text} \\fqa {rng.choice(words)} {rng.choice(words)} \\fqa*\\f*"
+    return f"\\f + \\ft {text}\\f*"
+
+# Returns the aligned form of the specified text, one word per line.
+def align(rng, text):
+    lines = []
+    for word in text.split():
+        strong = f"H{rng.randint(1, 8674):04d}"
+        lines.append(f'\\zaln-s |x-strong="{strong}" x-lemma="דָּבָר" x-morph="He,Ncmsa" x-occurrence="1" '
+                     f'x-occurrences="1" x-content="דָּבָר"\\*\\w {word}|x-occurrence="1" x-occurrences="1"\\w*\\zaln-e\\*')
+    return "\n".join(lines)
+
+def header(bookId, variant):
+    name = usfm_verses.verseCounts[bookId]['en_name']
+    lines = [f"\\id {bookId} Synthetic {variant} text for benchmarks",
+             "\\usfm 3.0" if variant == 'aligned' else None,
+             "\\ide UTF-8",
+             f"\\h {name}",
+             f"\\toc1 The Book of {name}",
+             f"\\toc2 {name}",
+             f"\\toc3 {bookId[0]}{bookId[1:].lower()}",
+             f"\\mt {name}",
+             ""]
+    return [line for line in lines if line is not None]
+
+# Returns the usfm text of the specified book and variant.
+# The same seed gives the same text.
+# If paragraphs is False, the text has no paragraph or poetry marks,
+# but is otherwise the same as with paragraphs, which makes a source for mark_paragraphs.
+def makeBook(bookId, variant, seed=0, paragraphs=True):
+    rng = random.Random(f"{seed}:{bookId}:{variant}")
+    lines = header(bookId, variant)
+    for (c, nverses) in enumerate(usfm_verses.verseCounts[bookId]['verses'], 1):
+        lines.append(f"\\c {c}")
+        split = False
+        for v in range(1, nverses + 1):
+            lastSplit = split       # ended with a \q2 line
+            split = variant == 'poetry' and rng.random() < 0.5     # over a \q1 and a \q2 line
+            mark = None
+            if v == 1:
+                mark = "\\q1" if variant == 'poetry' else "\\p"
+            elif rng.random() < 0.2:
+                if variant == 'poetry':
+                    mark = "\\b\n\\q1"
+                else:
+                    heading = sentence(rng, 2, 5).rstrip(".?!”") if rng.random() < 0.3 else None
+                    if heading and paragraphs:
+                        lines.append("\\s " + heading)
+                    mark = "\\p"
+            elif variant == 'poetry':
+                mark = "\\q1" if split or lastSplit else rng.choice(("\\q1", "\\q2"))
+            if mark and paragraphs:
+                lines.append(mark)
+            text = verseText(rng)
+            if variant == 'aligned':
+                lines.append(f"\\v {v}\n{align(rng, text)}")
+            elif variant == 'footnotes' and rng.random() < 0.5:
+                lines.append(f"\\v {v} {text}{footnote(rng)}")
+            elif split:
+                half = text.split(" ")
+                middle = len(half) // 2
+                second = "\n\\q2 " if paragraphs else " "
+                lines.append(f"\\v {v} {' '.join(half[:middle])}{second}{' '.join(half[middle:])}")
+            else:
+                lines.append(f"\\v {v} {text}")
+    return "\n".join(lines) + "\n"
+
+# Writes the specified books in each variant to subfolders of target_dir.
+# Returns the number of verses written per variant.
+def makeCorpus(target_dir, books=default_books, seed=0, variants=variants):
+    for variant in variants:
+        dir = os.path.join(target_dir, variant)
+        os.makedirs(dir, exist_ok=True)
+        for bookId in books:
+            with io.open(os.path.join(dir, fileName(bookId)), "tw", encoding="utf-8", newline='\n') as output:
+                output.write(makeBook(bookId, variant, seed))
+    return sum(verseCount(bookId) for bookId in books)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.stderr.write("Usage: python synthetic_usfm.py <target folder> [book ids]\n")
+    else:
+        books = [id.upper() for id in sys.argv[2:]] or default_books
+        nverses = makeCorpus(sys.argv[1], books)
+        print(f"Wrote {len(books)} books, {nverses} verses, in each of {', '.join(variants)} to {sys.argv[1]}")
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# Checks the hand-written tokenizer in parseUsfm.py against the pyparsing grammar it replaced.
+# Run with: python -m pytest test_parseUsfm.py
+
+import random
+import warnings
+import pytest
+import parse_cache
+import parseUsfm
+
+# A short book with most kinds of markers, including word attributes and footnotes.
+sample_usfm = """\\id GEN unfoldingWord Literal Text
+\\usfm 3.0
+\\ide UTF-8
+\\h Genesis
+\\toc1 The Book of Genesis
+\\toc2 Genesis
+\\toc3 Gen
+\\mt Genesis
+
+\\c 1
+\\p
+\\v 1 In the beginning, God created the heavens and the earth.
+\\v 2 The earth was without form and empty.\\f + \\ft Or \\fqa void\\fqa*.\\f*
+\\q1 Darkness was on the surface of the deep.
+\\q2 \\w Spirit|strong="H7307"\\w* of God
+\\v 3-4 God said, \\wj "Let there be light,"\\wj* and there was light.
+\\s5
+\\c 2
+\\s1 The seventh day
+\\m
+\\v 1 Then the heavens and the earth were finished, and all of their hosts.
+\\v 2 \\add On\\add* the seventh day\\\\ God finished his work.
+\\bogus marker
+\\v x not a verse number
+"""
+
+# Pieces of usfm that random strings are made from.
+# \\toc alone is left out because the tokenizer treats it as unknown (see test_toc_is_unknown).
+markers = [m for m in parseUsfm.markerKinds] + ['zaln-s', 'zaln-e', 'w', 'qx', 'q5', '+w', 'xt', 'ca', 'bogus']
+pieces = ['\\' + m for m in markers] + ['\\' + m + '*' for m in markers] + \
+         [' ', '\n', '\t', '\r', '\r\n', '12', '1-2', 'abc', 'x y', '+', '\\', '\\\\', '*', '|a="b"', '\xa0', '-', ' 3 ', '3']
+
+@pytest.fixture(autouse=True)
+def noParseCache(monkeypatch):
+    monkeypatch.setattr(parse_cache, 'enabled', False)
+
+# Returns the token groups of the pyparsing grammar, as tuples.
+def pyparsingGroups(s):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')     # parseString is deprecated in newer pyparsing versions
+        return [tuple(group) for group in parseUsfm.usfm.parseString(s, parseAll=True)]
+
+def tokenPairs(tokens):
+    return [(type(token), token.type, token.value) for token in tokens]
+
+def test_sample_matches_pyparsing():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        expected = tokenPairs(parseUsfm.parseStringPyparsing(sample_usfm))
+    assert tokenPairs(parseUsfm.parseString(sample_usfm)) == expected
+
+def test_fuzz_matches_pyparsing():
+    rand = random.Random(1)
+    for _ in range(1000):
+        s = parseUsfm.clean(''.join(rand.choice(pieces) for _ in range(rand.randint(1, 12))))
+        if not s.strip(' \t\r\n'):
+            continue    # see test_blank_input
+        assert parseUsfm.tokenize(s) == pyparsingGroups(s), repr(s)
+
+# The grammar matches \toc, but there is no token class for it, so parseStringPyparsing() failed on it.
+def test_toc_is_unknown():
+    tokens = parseUsfm.parseString('\\toc Title\n')
+    assert [(token.type, token.value) for token in tokens] == [('unknown', 'toc'), ('text', 'Title')]
+    assert tokens[0].isUnknown()
+
+# The grammar needs at least one element, so blank input was a parse error.
+@pytest.mark.parametrize('s', ['', '   \n', '\r\n', '\xa0'])
+def test_blank_input(s):
+    assert parseUsfm.parseString(s) == []
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# Checks unalign_usfm() in usfm_utils.py and in its general_tools copy against the original implementation,
+# which made one regular expression pass per step.
+# Run with: python -m pytest test_usfm_utils.py
+
+import importlib.util
+import os
+import random
+import re
+import pytest
+import usfm_utils
+
+# The general_tools copy only differs in how it pairs up quotes.
+spec = importlib.util.spec_from_file_location('general_tools_usfm_utils',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'general_tools', 'usfm_utils.py'))
+general_tools_usfm_utils = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(general_tools_usfm_utils)
+
+modules = [(usfm_utils, r'[ \t]*"([^"]+)"[ \t]*'),
+           (general_tools_usfm_utils, r'\s*"\s*([^"]+)\s*"\s*')]
+
+# Pieces of aligned usfm that random strings are made from, including irregular markers
+# that make remove_alignment() fall back to one pass per marker.
+pieces = ['\\zaln-s |x-strong="H1" x-occurrence="1"\\*', '\\zaln-e\\*', '\\w word|x-occurrence="1"\\w*', '\\w a b|x="1"\\w*',
+          '\\k-s | key\\*', '\\k-e\\*', '\\ts\\*', '\\ts-s \\*', '\\c ', '\\v 1 ', '\\p', '\\q1', '\n', '\n\n', ' ', '  ',
+          '"', "'", "' s", 'x', 'word', ',', '.', '(', ')', '\\s5', '\\fqa x \\fqa', '\\f + \\ft y\\f*', '\\', '*', '|',
+          '\\w ', '\\zaln-s', '\t', '\r', '-', '\\q1"', "\\w it|x\\w*'s", '\\zaln-s |a\\w b|c\\w*\\*', '\\k-s |\n\\*']
+
+# The original unalign_usfm(), one regular expression pass at a time. Only kept as the test oracle.
+def unalignStepwise(aligned_usfm, quotes_pattern):
+    # Remove all tags used for alignments and words
+    usfm = re.sub(r'\\ts(-s)*\s*\\\*\s*', r'', aligned_usfm, flags=re.UNICODE | re.MULTILINE)
+    usfm = re.sub(r'\\zaln-s[^*]*?\*', r'', usfm, flags=re.UNICODE | re.MULTILINE)
+    usfm = re.sub(r'\\zaln-e\\\*', r'', usfm, flags=re.UNICODE | re.MULTILINE)
+    usfm = re.sub(r'\\k-s.*?\\\*', r'', usfm, flags=re.UNICODE | re.MULTILINE)
+    usfm = re.sub(r'\\k-e\\\*', r'', usfm, flags=re.UNICODE | re.MULTILINE)
+    usfm = re.sub(r'\\w ([^|]+)\|.*?\\w\*', r'\1', usfm, flags=re.UNICODE | re.MULTILINE)
+    usfm = re.sub(r'^\n', '', usfm, flags=re.UNICODE | re.MULTILINE)
+    usfm = re.sub(r'^([^\\].*)\n(?=[^\\])', r'\1 ', usfm, flags=re.UNICODE | re.MULTILINE)
+    usfm = re.sub(r'^\\(.*)\n(?=[^\\])', r'\\\1 ', usfm, flags=re.UNICODE | re.MULTILINE)
+    usfm = re.sub(r'  +', ' ', usfm, flags=re.UNICODE | re.MULTILINE)
+
+    # Clean up bad USFM data and fixing punctuation
+    usfm = re.sub(r"\s*' s(?!\w)", "'s", usfm, flags=re.UNICODE | re.MULTILINE)
+    usfm = re.sub(r'\\s5', '', usfm, flags=re.UNICODE | re.MULTILINE)
+    usfm = re.sub(r'\\fqa([^*]+)\\fqa(?![*])', r'\\fqa\1\\fqa*', usfm, flags=re.UNICODE | re.MULTILINE)
+
+    # Pair up quotes by chapter
+    chapters = re.compile(r'\\c ').split(usfm)
+    usfm = chapters[0]
+    for chapter in chapters[1:]:
+        chapter = re.sub(quotes_pattern, r' "\1" ', chapter, flags=re.UNICODE | re.MULTILINE | re.DOTALL)
+        usfm += '\\c {0}'.format(chapter)
+    usfm = re.sub(r'\\(\w+\**)([^\w* \n])', r'\\\1 \2', usfm, flags=re.UNICODE | re.MULTILINE)  # \\q1" => \q1 "
+    usfm = re.sub(r" ' ", r" '", usfm, flags=re.UNICODE | re.MULTILINE)
+    usfm = re.sub(r' +([:;.?,!\]})-])', r'\1', usfm, flags=re.UNICODE | re.MULTILINE)
+    usfm = re.sub(r'([{(\[-]) +', r'\1', usfm, flags=re.UNICODE | re.MULTILINE)
+
+    return usfm.strip()
+
+@pytest.mark.parametrize('module, quotes_pattern', modules)
+def test_fuzz_matches_stepwise(module, quotes_pattern):
+    rand = random.Random(1)
+    for _ in range(3000):
+        s = ''.join(rand.choice(pieces) for _ in range(rand.randint(1, 30)))
+        assert module.unalign_usfm(s) == unalignStepwise(s, quotes_pattern), repr(s)
+
+@pytest.mark.parametrize('module, quotes_pattern', modules)
+def test_aligned_verse(module, quotes_pattern):
+    s = '\\c 1\n\\p\n\\v 1 \\zaln-s |x-strong="H1"\\*\\w In|x-occurrence="1"\\w*\\zaln-e\\* ' \
+        '\\zaln-s |x-strong="H2"\\*\\w the|x-occurrence="1"\\w*\n\\w beginning|x-occurrence="1"\\w*\\zaln-e\\*,\n' \
+        '\\ts\\*\n\\v 2 \\k-s | key\\*"Yes" he said\\k-e\\*\n\\q1"no"\n'
+    assert module.unalign_usfm(s) == '\\c 1\n\\p\n\\v 1 In the beginning,\n\\v 2 "Yes" he said\n\\q1 "no"'
+    assert module.unalign_usfm(s) == unalignStepwise(s, quotes_pattern)
+
+# A backslash inside a marker, or a marker formed by removing another, makes the single pass give up.
+@pytest.mark.parametrize('module, quotes_pattern', modules)
+@pytest.mark.parametrize('s', ['\\zaln-s |a\\w b|c\\w*\\*x', '\\k-s |\n\\*y', '\\zal\\zaln-e\\*n-e\\*z', '\\w \\w a|b\\w*|c\\w*'])
+def test_irregular_markers(module, quotes_pattern, s):
+    assert module.unalign_usfm(s) == unalignStepwise(s, quotes_pattern)
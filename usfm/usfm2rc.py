@@ -10,6 +10,11 @@
 #    file           Leave blank to process all files in source_dir
 #    mark_chunks      True or False, to mark chunks in output USFM files
 #    chunk_model_dir   Folder containing model text for placement of \s5 chunk markers
+#    convert_jobs     (optional) Number of worker processes for converting the books in source_dir
+#
+# Each book is read and parsed once. The same tokens give the chunks of the input text and the output.
+# With convert_jobs greater than 1, the books are converted in worker processes, and the projects,
+# contributors and issues are gathered from the results in the same order as converting one book at a time.
 
 import configreader
 import sys
@@ -21,6 +26,7 @@ import parseUsfm
 import io
 import re
 import yaml
+from concurrent.futures import ProcessPoolExecutor
 
 projects = []
 translators = []
@@ -28,6 +34,7 @@ source_versions = []
 lastToken = None
 issuesFile = None
 max_chunk_size = 8
+messages = None     # list of (kind, message) when converting in a worker process: kind is error or progress
 
 class State:
     ID = ""
@@ -211,6 +218,35 @@ def loadChunksUsfm(usfmpath):
     chapters.append(chunks)
     return chapters
 
+# Returns the same list of lists as loadChunksUsfm(), from the tokens of a book.
+# Unlike loadChunksUsfm(), counts the verse and chunk markers that do not start a line.
+def loadChunksTokens(tokens, usfmpath):
+    chapters = []
+    chunks = []
+    nv = 1
+    for token in tokens:
+        if token.isS5() and nv > 1:
+            chunks.append(nv)
+        elif token.isV():
+            if rangematch := vv_re.match(token.value):
+                nv = int(rangematch.group(2)) + 1
+            elif versematch := number_re.match(token.value):
+                nv = int(versematch.group(0)) + 1
+        elif token.isC() and (chaptermatch := number_re.match(token.value)):
+            chunks.append(nv)
+            nc = int(chaptermatch.group(0))
+            if nc > 1 and len(chapters) != nc - 2:
+                reportError("Chapter (" + str(nc) + ") out of order in: " + usfmpath)
+            if nc > 1:
+                chapters.append(chunks)
+            chunks = [1]    # verse 1 is assumed to always start a chunk
+            nv = 1
+    chunks.append(nv)
+    chapters.append(chunks)
+    return chapters
+
+number_re = re.compile(r'[0-9]+')
+
 # Returns None if there are no long chunks in arr after the specified starting position.
 # Returns a (start, next, index) tuple specifying the next long chunk found.
 # (starting verse, starting verse of next chunk or 999, and index of next starting verse in arr)
@@ -533,7 +569,6 @@ def isParseable(str, fname):
 def convertFile(usfmpath, fname):
     state = State()
     state.reset()
-    state.recordInputChunks( loadChunksUsfm(usfmpath) )
     input = io.open(usfmpath, "tr", 1, encoding="utf-8-sig")
     str = input.read(-1)
     input.close()
@@ -541,29 +576,105 @@ def convertFile(usfmpath, fname):
     sys.stdout.flush()
     success = isParseable(str, fname)
     if success:
-        print("CONVERTING " + fname + ":")
+        reportProgress("CONVERTING " + fname + ":")
         tokens = parseUsfm.parseString(str)
+        state.recordInputChunks( loadChunksTokens(tokens, usfmpath) )
         for token in tokens:
             take(token)
         state.usfmFile.write("\n")
         state.usfmFile.close()
     return success
 
-# Converts the book or books contained in the specified folder
-def convertFolder(folder):
-    if not os.path.isdir(folder):
-        reportError("Invalid folder path given: " + folder)
-        return
+# Returns a list of (path, fname, folder) for the usfm files in the specified folder, recursively.
+def usfmFiles(folder):
+    files = []
     for fname in os.listdir(folder):
         path = os.path.join(folder, fname)
         if fname[0] != '.' and os.path.isdir(path):
-            convertFolder(path)
+            files += usfmFiles(path)
         elif fname.endswith('sfm'):
-            if convertFile(path, fname):
-                appendToProjects()
-                getContributors(folder)
-            else:
-                reportError("File cannot be converted: " + fname)
+            files.append((path, fname, folder))
+    return files
+
+# Converts the book or books contained in the specified folder
+def convertFolder(folder, jobs=1):
+    if not os.path.isdir(folder):
+        reportError("Invalid folder path given: " + folder)
+        return
+    if jobs > 1:
+        convertFolderParallel(folder, jobs)
+        return
+    for (path, fname, dir) in usfmFiles(folder):
+        if convertFile(path, fname):
+            appendToProjects()
+            getContributors(dir)
+        else:
+            reportError("File cannot be converted: " + fname)
+
+idcode_re = re.compile(r'\\id +([\w][\w][\w])')
+
+# Converts the books in the specified folder in worker processes.
+# Gathers the projects and contributors, and reports the messages of each book,
+# in the same order as converting them one at a time.
+# A file whose book id cannot be read in advance, or whose book was already submitted,
+# is converted in this process when its turn comes, so that two processes never write the same file.
+def convertFolderParallel(folder, jobs):
+    settings = {'target_dir': target_dir, 'mark_chunks': mark_chunks, 'chunk_model_dir': chunk_model_dir}
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initWorker, initargs=(settings,)) as pool:
+        pending = []
+        submitted = set()
+        for (path, fname, dir) in usfmFiles(folder):
+            with io.open(path, "tr", encoding="utf-8-sig") as input:
+                idcode = idcode_re.search(input.read(4096))
+            bookId = idcode.group(1).upper() if idcode else None
+            future = None
+            if bookId and bookId not in submitted:
+                submitted.add(bookId)
+                future = pool.submit(convertFileInWorker, path, fname)
+            pending.append((path, fname, dir, future))
+        try:
+            for (path, fname, dir, future) in pending:
+                if future:
+                    (success, project, bookMessages) = future.result()
+                    reportMessages(bookMessages)
+                else:
+                    success = convertFile(path, fname)
+                    project = makeProject() if success else None
+                if success:
+                    projects.append(project)
+                    getContributors(dir)
+                else:
+                    reportError("File cannot be converted: " + fname)
+        except BaseException:
+            for (path, fname, dir, future) in pending:
+                if future:
+                    future.cancel()
+            raise
+
+# Sets the configuration of a worker process to that of the main process.
+def initWorker(settings):
+    global target_dir
+    global mark_chunks
+    global chunk_model_dir
+    target_dir = settings['target_dir']
+    mark_chunks = settings['mark_chunks']
+    chunk_model_dir = settings['chunk_model_dir']
+
+# Converts the specified file in a worker process.
+# Returns (success, project, messages).
+def convertFileInWorker(path, fname):
+    global messages
+    messages = []
+    success = convertFile(path, fname)
+    return (success, makeProject() if success else None, messages)
+
+# Reports the messages collected in a worker process.
+def reportMessages(bookMessages):
+    for (kind, msg) in bookMessages:
+        if kind == 'error':
+            reportError(msg)
+        else:
+            reportProgress(msg)
 
 # Reads list of contributors (translators) from manifest.yaml file if it exists.
 # Also gets source version.
@@ -598,7 +709,10 @@ def dumpContributors(path):
 
 # Appends information about the current book to the global projects list.
 def appendToProjects():
-    global projects
+    projects.append(makeProject())
+
+# Returns the information about the current book that goes in projects.yaml.
+def makeProject():
     state = State()
 
     sort = usfm_verses.verseCounts[state.ID]["sort"]
@@ -608,7 +722,7 @@ def appendToProjects():
     project = { "title": state.title, "id": state.ID.lower(), "sort": sort, \
                 "path": "./" + makeUsfmFilename(state.ID), \
                 "categories": "[ 'bible-" + testament + "' ]" }
-    projects.append(project)
+    return project
 
 # Sort the list of projects and write to projects.yaml
 def dumpProjects(path):
@@ -648,6 +762,9 @@ def closeIssuesFile():
 
 # Writes error message to stderr and to issues.txt.
 def reportError(msg):
+    if messages is not None:
+        messages.append(('error', msg))
+        return
     try:
         sys.stderr.write(msg + "\n")
     except UnicodeEncodeError as e:
@@ -655,6 +772,12 @@ def reportError(msg):
         sys.stderr.write(state.reference + ": (Unicode...)\n")
     issues.write(msg + "\n")
 
+def reportProgress(msg):
+    if messages is not None:
+        messages.append(('progress', msg))
+        return
+    print(msg)
+
 # Processes each directory and its files one at a time
 if __name__ == "__main__":
     config = configreader.get_config(sys.argv, 'usfm2rc')
@@ -678,7 +801,7 @@ if __name__ == "__main__":
             else:
                 reportError(f"No such file: {path}")
         else:
-            convertFolder(source_dir)
+            convertFolder(source_dir, config.getint('convert_jobs', fallback=1))
             if projects:
                 dumpProjects( os.path.join(target_dir, "projects.yaml") )
                 dumpContributors( os.path.join(target_dir, "translators.txt") )
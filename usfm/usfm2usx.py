@@ -9,6 +9,9 @@
 # It has also been used for the Danish 'Hellig Bibel'.
 # The input file(s) should be verified, correct USFM.
 # Before running the script, set the global variables below.
+# Uses the optional convert_jobs config value: if greater than 1, the books in the source folder are
+# converted in that many worker processes, and the manifest, toc and title files of the books
+# are written at the end, after all the books are converted.
 
 # Global variables
 # source_dir = r'C:\DCS\Persian\pes_opcb'
@@ -16,6 +19,7 @@ config = None
 gui = None
 state = None
 nConverted = 0
+messages = None     # list of (kind, message) when converting in a worker process: kind is error, status or progress
 # rc_dir = r'C:\Users\lvers\AppData\Local\BTT-Writer\library\resource_containers'
 
 # Values to be written into each of the package.json files
@@ -39,11 +43,14 @@ import codecs
 import re
 import json
 import yaml
+from concurrent.futures import ProcessPoolExecutor
 from shutil import copy
 from datetime import date
+from xml.sax.saxutils import escape
 
 lastToken = parseUsfm.UsfmToken(None)
 vv_re = re.compile(r'([0-9]+)-([0-9]+)')
+attribute_entities = {'"': "&quot;"}     # to escape in attribute values, besides & < >
 
 class State:
     def __init__(self):
@@ -137,6 +144,40 @@ class State:
     def saveSection(self, s):
         self.sectionPending = s
 
+# Writes the usx of one chunk file as it is converted.
+# Escapes the text and attribute values, and closes any elements still open when the file is closed,
+# so that each file is well formed.
+class UsxWriter:
+    def __init__(self, path):
+        self.output = io.open(path, "tw", encoding="utf-8", newline='\n')
+        self.openElements = []
+
+    def attributes(self, attrs):
+        return "".join(f' {name}="{escape(value, attribute_entities)}"' for (name, value) in attrs.items())
+
+    def emptyElement(self, name, attrs):
+        self.output.write(f"<{name}{self.attributes(attrs)} />")
+
+    def startElement(self, name, attrs):
+        self.output.write(f"<{name}{self.attributes(attrs)}>")
+        self.openElements.append(name)
+
+    # Closes the most recently opened element, which should be the named one.
+    def endElement(self, name):
+        if not self.openElements or self.openElements[-1] != name:
+            reportError(f"Unmatched end of {name} at {state.reference}")
+        else:
+            self.output.write(f"</{self.openElements.pop()}>")
+
+    def text(self, t):
+        self.output.write(escape(t))
+
+    def close(self):
+        while self.openElements:
+            self.endElement(self.openElements[-1])
+            self.output.write("\n")
+        self.output.close()
+
 # def printToken(token):
 #     if token.isV():
 #         print("Verse number " + token.value)
@@ -176,19 +217,24 @@ def takeC(c):
     makeChapterDir(state.chapterPad)
     createChapterTitleFile(str(state.chapter))  # default, in case \cl does not follow
     path = os.path.join(state.target_chapter_dir, "01.usx")
-    state.setUsxOutput( io.open(path, "tw", encoding="utf-8", newline='\n') )
+    state.setUsxOutput( UsxWriter(path) )
 
 def takeCL(value):
     createChapterTitleFile(value)
 
 def takeF(value):
-    state.usxOutput.write('<note style="f" caller="+"> ')
+    state.usxOutput.startElement("note", {'style': "f", 'caller': "+"})
+    state.usxOutput.text(" ")
 
 def takeFTFQA(type, value):
-    state.usxOutput.write(f'<char style="{type}">\n{value} </char>\n')
+    state.usxOutput.startElement("char", {'style': type})
+    state.usxOutput.text(f"\n{value} ")
+    state.usxOutput.endElement("char")
+    state.usxOutput.text("\n")
 
 def takeFE():
-    state.usxOutput.write('</note>\n')
+    state.usxOutput.endElement("note")
+    state.usxOutput.text("\n")
 
 # Currently this function does nothing, as paragraphs are not relevant to tStudio/BTTW (confirmed 3/29/22).
 def takeP(type):
@@ -199,7 +245,7 @@ def takeP(type):
 # Saves the section heading if it occurs after the first verse in a chapter.
 def takeS(s):
     if state.verse == 0:    # section heading is at the start of the chapter
-        state.usxOutput.write(s)
+        state.usxOutput.text(s)
     else:
         state.saveSection(s)
 
@@ -209,14 +255,14 @@ def takeV(v):
     state.addVerses(v)
     if not state.usxOutput:
         path = os.path.join(state.target_chapter_dir, state.versePad + ".usx")
-        state.setUsxOutput( io.open(path, "tw", encoding="utf-8", newline='\n') )
-    state.usxOutput.write('<verse number="' + v + '" style="v" />')
+        state.setUsxOutput( UsxWriter(path) )
+    state.usxOutput.emptyElement("verse", {'number': v, 'style': "v"})
 
 # Writes the specified text to the current usx file.
 def takeText(t):
     if state.verse > 0:
         if state.usxOutput:
-            state.usxOutput.write(t + "\n\n")
+            state.usxOutput.text(t + "\n\n")
     else:
         reportError("Unhandled text before verse 1. See " + state.reference)
     state.addText()
@@ -265,6 +311,9 @@ def closeUsx():
         state.setUsxOutput(None)
 
 def reportError(msg):
+    if messages is not None:
+        messages.append(('error', msg))
+        return
     reportToGui(msg, '<<ScriptMessage>>')
     sys.stderr.write(msg + '\n')
     # sys.stderr.flush()
@@ -272,10 +321,16 @@ def reportError(msg):
 # Sends a progress report to the GUI.
 # To be called only if the gui is set.
 def reportStatus(msg):
+    if messages is not None:
+        messages.append(('status', msg))
+        return
     reportToGui(msg, '<<ScriptMessage>>')
     print(msg)
 
 def reportProgress(msg):
+    if messages is not None:
+        messages.append(('progress', msg))
+        return
     reportToGui(msg, '<<ScriptProgress>>')
     print(msg)
 
@@ -303,15 +358,18 @@ idcode_re = re.compile(r'\\id +([\w][\w][\w])')
 
 # Parses the book identifier from the \id tag, which should be on the first line of the usfm file
 def getBookId(usfmpath):
+    if not (bookId := readBookId(usfmpath)):
+        reportError("USFM file does not start with standard \\id marker.")
+    return bookId
+
+# Returns the book identifier from the \id tag, or "" if the file does not start with one.
+def readBookId(usfmpath):
     input = io.open(usfmpath, "tr", encoding="utf-8-sig")
     str = input.readline()
     input.close()
     if idcode := idcode_re.match(str):
-        bookId = idcode.group(1)
-    else:
-        reportError("USFM file does not start with standard \\id marker.")
-        bookId = ""
-    return bookId
+        return idcode.group(1)
+    return ""
 
 # Makes a custom package.json file in the specified target folder.
 # Modifies a copy of an English manifest.
@@ -369,30 +427,42 @@ def createToc(en_content_dir, content_dir):
     # TODO: implement a better solution
     path = os.path.join(content_dir, "toc.yaml")
 
-# Converts a single usfm file to a usx resource container.
-def convertFile(usfmpath, bookId):
+# Converts the chapters of a single usfm file to .usx files in a resource container.
+# Returns True if the book was converted.
+def convertChapters(usfmpath, bookId):
     rc_dir = config['rc_dir']
     en_book_dir = os.path.join(rc_dir, "en_" + bookId.lower() + "_ulb")
     target_book_dir = os.path.join(rc_dir, config['language_code'] + "_" + bookId.lower() + "_" + config['bible_id'])
     if not os.path.isdir(en_book_dir):
         reportError("English book folder not found: " + en_book_dir)
-    else:
-        makeTargetDirs(target_book_dir)
-        en_content_dir = os.path.join(en_book_dir, "content")
-
-        reportProgress("CONVERTING " + usfmpath)
-        # sys.stdout.flush()
-        input = io.open(usfmpath, "tr", encoding="utf-8-sig")
-        str = input.read()
-        input.close()
-        for token in parseUsfm.parseString(str):
-            take(token)
-        closeUsx()
-        copy(os.path.join(en_book_dir, 'LICENSE.md'), target_book_dir)
-        createManifest(en_book_dir, target_book_dir)
-        copy(os.path.join(en_content_dir, 'config.yml'), state.target_content_dir)    # copy() is from shutil
-        createToc(en_content_dir, state.target_content_dir)
-        createBookTitleFile()
+        return False
+    makeTargetDirs(target_book_dir)
+    reportProgress("CONVERTING " + usfmpath)
+    # sys.stdout.flush()
+    for token in parseUsfm.iter_tokens(usfmpath):
+        take(token)
+    closeUsx()
+    return True
+
+# Writes the files that go with the chapters of a converted book:
+# LICENSE.md, package.json, config.yml, toc.yml and the book title file.
+def finishBook(bookId, title):
+    state.addID(bookId)
+    state.title = title
+    rc_dir = config['rc_dir']
+    en_book_dir = os.path.join(rc_dir, "en_" + bookId.lower() + "_ulb")
+    target_book_dir = os.path.join(rc_dir, config['language_code'] + "_" + bookId.lower() + "_" + config['bible_id'])
+    en_content_dir = os.path.join(en_book_dir, "content")
+    copy(os.path.join(en_book_dir, 'LICENSE.md'), target_book_dir)
+    createManifest(en_book_dir, target_book_dir)
+    copy(os.path.join(en_content_dir, 'config.yml'), state.target_content_dir)    # copy() is from shutil
+    createToc(en_content_dir, state.target_content_dir)
+    createBookTitleFile()
+
+# Converts a single usfm file to a usx resource container.
+def convertFile(usfmpath, bookId):
+    if convertChapters(usfmpath, bookId):
+        finishBook(state.ID, state.title)
         global nConverted
         nConverted += 1
 
@@ -404,15 +474,88 @@ def processFile(usfmpath):
     else:
         convertFile(usfmpath, bookId)
 
-# Processes a whole folder of usfm files, recursively.
-def convertDir(dir):
+# Generates the paths of the usfm files in the specified folder, recursively.
+def usfmPaths(dir):
     for entry in os.listdir(dir):
         path = os.path.join(dir, entry)
         if entry[0] != '.' and os.path.isdir(path):
-            convertDir(path)
+            yield from usfmPaths(path)
         elif entry.endswith("sfm") and os.path.isfile(path):
+            yield path
+
+# Processes a whole folder of usfm files, recursively.
+# If jobs > 1, the books are converted in that many worker processes.
+def convertDir(dir, jobs=1):
+    if jobs > 1:
+        convertDirParallel(dir, jobs)
+    else:
+        for path in usfmPaths(dir):
             processFile(path)
 
+# Converts the chapters of the books in the specified folder in worker processes,
+# reporting the messages of each book in the same order as converting them one at a time.
+# Then writes the manifest, toc and title files of all the converted books.
+# A second file of the same book is converted in this process, after the first one is done,
+# so that two processes never write the same folder.
+def convertDirParallel(dir, jobs):
+    global nConverted
+    configValues = dict(config)
+    converted = dict()      # book id => title, in the order converted
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = []
+        submitted = set()
+        for path in usfmPaths(dir):
+            bookId = readBookId(path)
+            if bookId and bookId.lower() not in submitted:
+                submitted.add(bookId.lower())
+                pending.append((path, bookId, pool.submit(convertChaptersInWorker, path, bookId, configValues)))
+            else:
+                pending.append((path, bookId, None))
+        try:
+            for (path, bookId, future) in pending:
+                if not bookId:
+                    processFile(path)       # reports the invalid file
+                    continue
+                if future:
+                    (id, title, bookMessages) = future.result()
+                    reportMessages(bookMessages)
+                else:
+                    (id, title) = (state.ID, state.title) if convertChapters(path, bookId) else (None, None)
+                if id:
+                    converted.pop(id, None)
+                    converted[id] = title
+                    nConverted += 1
+        except BaseException:
+            for (path, bookId, future) in pending:
+                if future:
+                    future.cancel()
+            raise
+    for (id, title) in converted.items():
+        finishBook(id, title)
+
+# Reports the messages collected in a worker process.
+def reportMessages(bookMessages):
+    for (kind, msg) in bookMessages:
+        if kind == 'error':
+            reportError(msg)
+        elif kind == 'status':
+            reportStatus(msg)
+        elif kind == 'progress':
+            reportProgress(msg)
+
+# Converts the chapters of a book in a worker process, with the config values of the main process.
+# Returns (book id, title, messages), with None for the book id if the book was not converted.
+def convertChaptersInWorker(usfmpath, bookId, configValues):
+    global config
+    global state
+    global messages
+    config = configValues
+    state = State()
+    messages = []
+    if not convertChapters(usfmpath, bookId):
+        return (None, None, messages)
+    return (state.ID, state.title, messages)
+
 # Creates the specified folder if necessary.
 # Fails if the parent folder does not exist.
 # Returns False if not possible.
@@ -448,7 +591,7 @@ def main(app = None):
             else:
                 reportError(f"No such file: {path}")
         else:
-            convertDir(source_dir)
+            convertDir(source_dir, config.getint('convert_jobs', fallback = 1))
         if nConverted > 0:
             reportStatus(f"\nDone. Converted {nConverted} book(s).")
         else:
@@ -7,23 +7,15 @@
 #   language_code
 #   standard_chapter_title (optional)
 #   suppress1 thru suppress11 (optional)
+#   verify_jobs (optional) - worker processes for verifying the files in a folder
+#   incremental (optional) - only verify the files that changed since the last run; see verify_cache.py
 # Detects whether files are aligned USFM.
-
-config = None
-suppress = [False]*12
-std_titles = None
-state = None
-gui = None
-
-lastToken = None
-aligned_usfm = False
-usfm_version = 2
-issuesFile = None
-issues: dict = {}   # Can't put in State because we want to accumulate issues across all files.
-wordlist = dict()
+# The verifying is done by a UsfmVerifier, which holds all the state for one run,
+# so that other modules can verify any number of folders at the same time, in different threads.
 
 import configmanager
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import sys
 import parseUsfm
@@ -35,6 +27,7 @@ import re
 import unicodedata
 import usfm_utils
 import sentences
+import verify_cache
 from datetime import date
 
 # Marker types
@@ -45,11 +38,14 @@ C = 4       # \c
 OTHER = 9
 
 # Manages the verify state for a single usfm file.
+# UsfmVerifier.verify_text() starts each file with a new State, so that the findings for a file
+# do not depend on which file was verified before it.
 class State:
     def __init__(self):
         self.IDs = []
         self.ID = ""
         self.titles = []
+        self.booktitles = []
         self.chaptertitles = []
         self.nChapterLabels = 0
         self.nParagraphs = 0
@@ -77,6 +73,9 @@ class State:
         self.prevMarkerType = OTHER
         self.currMarker = None
         self.prevMarker = None
+        self.toc3 = None
+        self.upperCaseReported = False
+        self.asciiVerse = False
 
     def __repr__(self):
         return f'State({self.reference})'
@@ -145,7 +144,7 @@ class State:
     def addChapterLabel(self, title):
         tokens = title.split()
         for token in tokens:
-            if decimal_value(token) == state.chapter:
+            if decimal_value(token) == self.chapter:
                 pos = title.find(token)
                 title = (title[:pos] + title[pos+len(token):]).strip()
                 if title not in self.chaptertitles:
@@ -326,30 +325,6 @@ def nVerses(id, chap):
 def bookTitleEnglish(id):
     return usfm_verses.verseCounts[id]['en_name']
 
-def shortname(longpath):
-    source_dir = Path(config['source_dir'])
-    shortname = Path(longpath)
-    if shortname.is_relative_to(source_dir):
-        shortname = shortname.relative_to(source_dir)
-    return str(shortname)
-
-# If issues.txt file is not already open, opens it for writing.
-# First renames existing issues.txt file to issues-oldest.txt unless
-# issues-oldest.txt already exists.
-# Returns file pointer.
-def openIssuesFile():
-    global issuesFile
-    if not issuesFile:
-        source_dir = config['source_dir']
-        path = os.path.join(source_dir, "issues.txt")
-        if os.path.exists(path):
-            bakpath = os.path.join(source_dir, "issues-oldest.txt")
-            if not os.path.exists(bakpath):
-                os.rename(path, bakpath)
-        issuesFile = io.open(path, "tw", encoding='utf-8', newline='\n')
-        issuesFile.write(f"Issues detected by verifyUSFM, {date.today()}, {source_dir}\n-------------------\n")
-    return issuesFile
-
 # Returns the longest common substring at the start of s1 and s2
 def long_substring(s1, s2):
     if s1.startswith(s2):
@@ -359,517 +334,19 @@ def long_substring(s1, s2):
         i += 1
     return s1[0:i]
 
-# Writes error message to stderr and to issues.txt.
-# Keeps track of how many errors of each type.
-def reportError(msg, errorId=0, summarize_only=False):
-    if not summarize_only:
-        reportToGui('<<ScriptMessage>>', msg)
-        write(msg, sys.stderr)
-        openIssuesFile().write(msg + "\n")
-
-    if errorId > 0:
-        global issues
-        if errorId in issues:
-            newmsg = long_substring(msg, issues[errorId][0])
-            newcount = issues[errorId][1] + 1
-        else:
-            newmsg = msg
-            newcount = 1
-        issues[errorId] = (newmsg, newcount)
-
-# Sends a progress message to the GUI, and to stdout.
-def reportProgress(msg):
-    reportToGui('<<ScriptProgress>>', msg)
-    write(msg, sys.stdout)
-
-# Sends a status message to the GUI, and to stdout.
-def reportStatus(msg):
-    reportToGui('<<ScriptMessage>>', msg)
-    write(msg, sys.stdout)
-
-def reportToGui(event, msg):
-    if gui:
-        with gui.progress_lock:
-            gui.progress = msg if not gui.progress else f"{gui.progress}\n{msg}"
-        gui.event_generate(event, when="tail")
-
-# This little function streams the specified message and handles UnicodeEncodeError
-# exceptions, which are common in Indian language texts. 2/5/24.
-def write(msg, stream):
-    try:
-        stream.write(msg + "\n")
-    except UnicodeEncodeError as e:
-        stream.write(state.reference + ": (Unicode...)\n")
-
-# Write summary of issues to issuesFile
-def reportIssues():
-    global issues
-    total = 0
-    issuesfile = openIssuesFile()
-    issuesfile.write("\nSUMMARY:\n")
-    for issue in sorted(issues.items(), key=lambda kv: kv[1][1], reverse=True):
-        total += issue[1][1]
-        issuesfile.write(f"{issue[1][0]}...:  {issue[1][1]} occurrence(s).\n")
-    issuesfile.write(f"\n{total} issues found.")
-
-# Writes the word list to a file.
-def dumpWords():
-    path = os.path.join(config['source_dir'], "wordlist.txt")
-    with io.open(path, "tw", encoding='utf-8', newline = '\n') as file:
-        file.write("For better viewing, used a fixed-width font if available.\n")
-        file.write("---------------------------------------------------------\n")
-
-        for entry in sorted(wordlist.items(), key=wordkey):
-            line = f"{entry[0]:20}  {entry[1][0]}"
-            if entry[1][0] < 3:
-                line = line + ",   " + entry[1][1]
-            file.write(line + '\n')
-
-# Returns sort key for the specified item. 
+# Returns sort key for the specified item.
 def wordkey(item):
     word = item[0].lstrip("' .,:;!?-[]{}()<>\"“‘’”*/")
     word2 = item[0].lstrip("'")
     assert(word == word2)
     return str.lower(word)
 
-# Report missing text or all ASCII text, in previous verse
-def previousVerseCheck():
-    if not isOptional(state.reference) and state.getTextLength() < 10 and state.verse != 0:
-        if state.getTextLength() == 0:
-            reportError("Empty verse: " + state.reference, 1)
-        elif not isShortVerse(state.reference):
-            reportError("Verse fragment: " + state.reference, 2)
-    if not suppress[9] and state.asciiVerse and state.getTextLength() > 0:
-        reportError("Verse is entirely ASCII: " + state.reference, 3)
-
-def longChunkCheck():
-    max_chunk_length = 400  # set lower if this is ever needed again
-    if not aligned_usfm and state.verse - (max_chunk_length-1) > state.startChunkVerse:
-        reportError("Long chunk: " + state.startChunkRef + "-" + str(state.verse) + "   (" + str(state.verse-state.startChunkVerse+1) + " verses)", 4)
-
-
-# Verifies that at least one book title is specified, other than the English book title.
-# This method is called just before chapter 1 begins, so there has been every
-# opportunity for the book title to be specified.
-def verifyBookTitle():
-    title_ok = False
-    en_name = bookTitleEnglish(state.ID)
-    for title in state.booktitles:
-        if title and title != en_name:
-            title_ok = True
-    if not title_ok:
-        reportError("No non-English book title for " + state.ID, 5)
-
-# Reports inconsistent chapter titling
-def verifyChapterTitles():
-    global std_titles
-    if len(state.chaptertitles) > 1 and len(state.chaptertitles) != len(std_titles):
-        reportError(f"Inconsistent chapter titling: {state.chaptertitles} in {state.ID}", 6)
-    if state.nChapterLabels > 1 and state.nChapterLabels != state.chapter:
-        reportError(f"Some chapters do not have chapter labels but {state.nChapterLabels} do.", 7)
-
-# Verifies correct number of verses for the current chapter.
-# This method is called just before the next chapter begins.
-def verifyVerseCount():
-    if state.chapter > 0 and state.verse != nVerses(state.ID, state.chapter):
-        # Acts may have 40 o4 41 verses, normally 41.
-        # 2 Cor. may have 13 or 14 verses, normally 14.
-        # 3 John may have 14 or 15 verses, normally 14.
-        # Revelation 12 may have 17 or 18 verses, normally 17.
-        if state.reference != 'REV 12:18' and state.reference != '3JN 1:15' and state.reference != '2CO 13:13' \
-            and state.reference != 'ACT 19:40':
-            reportError(f"Chapter normally has {nVerses(state.ID, state.chapter)} verses: {state.reference}", 8)
-
-def verifyFootnotes():
-    if state.footnote_starts != state.footnote_ends:
-        reportError("Mismatched footnote tags (" + str(state.footnote_starts) + " started and " + str(state.footnote_ends) + " ended) in " + state.ID, 9)
-    if state.endnote_starts != state.endnote_ends:
-        reportError("Mismatched endnote tags (" + str(state.endnote_starts) + " started and " + str(state.endnote_ends) + " ended) in " + state.ID, 10)
-
-# Checks whether the entire file was empty or unreadable
-def verifyNotEmpty(filename):
-    if not state.ID or state.chapter == 0:
-        if not state.ID in {'FRT','BAK'}:
-            reportError("File may be empty, or open in another program: " + filename, 11)
-
-def verifyChapterCount():
-    if state.ID and state.chapter != nChapters(state.ID):
-        reportError("There should be " + str(nChapters(state.ID)) + " chapters in " + state.ID + " but " + str(state.chapter) + " chapters are found.", 12)
-
-# \b is used to indicate additional white space between paragraphs.
-# No text or verse marker should follow this marker
-# and it should not be used before or after titles to indicate white space.
-def takeB():
-    state.addB()
-
-# Processes a chapter tag
-def takeC(c):
-    # Report missing text in previous verse
-    if c != "1":
-        previousVerseCheck()
-        # longChunkCheck()
-    state.addChapter(c)
-    if len(state.IDs) == 0:
-        reportError("Missing ID before chapter: " + c, 13)
-    if state.chapter < state.lastChapter:
-        reportError("Chapter out of order: " + state.reference, 14)
-    elif state.chapter == state.lastChapter:
-        reportError("Duplicate chapter: " + state.reference, 15)
-    elif state.chapter > state.lastChapter + 2:
-        reportError("Missing chapters before: " + state.reference, 16)
-    elif state.chapter > state.lastChapter + 1:
-        reportError("Missing chapter(s) between: " + state.lastRef + " and " + state.reference, 17)
-
-# Processes a chapter label
-def takeCL(label):
-    global std_titles
-    # Report missing text in previous verse
-    title = state.addChapterLabel(label.rstrip())   # gets title without chapter number, but spacing unchanged
-    if len(std_titles) > 0:
-        if title not in std_titles:
-            reportError(f"Non-standard chapter label at {state.reference}: {label}", 42)
-
-# Handles all the footnote and endnote token types
-def takeFootnote(token):
-    if token.isF_S() or token.isRQS():
-        if state.footnote_starts != state.footnote_ends:
-            reportError(f"Footnote starts before previous one is terminated at {state.reference}", 18)
-        state.addFootnoteStart()
-    elif token.isFE_S():
-        if state.endnote_starts != state.endnote_ends:
-            reportError(f"Endnote starts before previous one is terminated at {state.reference}", 19)
-        reportError(f"Warning: endnote \\fe ... \\fe* at {state.reference} may break USFM Converter and Scripture App Builder.", 20)
-        state.addEndnoteStart()
-    elif token.isF_E() or token.isRQE():
-        state.addFootnoteEnd()
-    elif token.isFE_E():
-        state.addEndnoteEnd()
-    else:
-        if not state.inFootnote():
-            reportError(f"Footnote marker ({token.type}) not between \\f ... \\f* pair at {state.reference}", 21)
-    takeText(token.value, footnote=True)
-
-def takeID(id):
-    if len(id) < 3:
-        reportError("Invalid ID: " + id, 22)
-    id = id[0:3].upper()
-    if id in state.getIDs():
-        reportError("Duplicate ID: " + id, 23)
-    state.addID(id)
-
-def reportParagraphMarkerErrors(type):
-    if state.currMarkerType in {QQ,PP} and not suppress[4]:
-        reportError("Warning: back to back paragraph/poetry markers after: " + state.reference, 24)
-    if state.needText() and not isOptional(state.reference):
-        reportError("Paragraph marker after verse marker, or empty verse: " + state.reference, 25)
-    if type == 'nb' and state.currMarkerType != C:
-        reportError("\\nb marker should follow chapter marker: " + state.reference, 25.1)
-
-def takeP(type):
-    reportParagraphMarkerErrors(type)
-    if not aligned_usfm and not suppress[3] and not state.sentenceEnded():
-        if state.verse > 0:
-            reportError(f"Punctuation missing at end of paragraph: {state.reference}", 26, suppress[11])
-        else:
-            reportError(f"Punctuation missing at end of paragraph before {state.reference}", 26.1, suppress[11])
-    state.addParagraph() if type != 'nb' else state.addNB()
-
-def takeQ(type):
-    reportParagraphMarkerErrors(type)
-    state.addPoetry()
-
-def takeS5():
-    # longChunkCheck()
-    state.addS5()
-    takeSection('s5')
-
-def takeSection(tag):
-    if not suppress[4]:
-        if state.currMarkerType == PP:
-            reportError(f"Warning: useless paragraph (p,m,nb) marker before \\{tag} marker at: {state.reference}", 27)
-        elif state.currMarkerType == QQ:
-            reportError(f"Warning: useless \q before \\{tag} marker at: {state.reference}", 28)
-        elif state.currMarkerType == B:
-            reportError(f"\\b may not be used before or after section heading. {state.reference}", 29)
-    state.addSection()
-
-def takeTitle(token):
-    if token.isTOC3():
-        state.addToc3(token.value)
-        global usfm_version
-        if usfm_version == 2:
-            if (len(token.value) != 3 or not token.value.isascii()):
-                reportError("Invalid toc3 value in " + state.reference, 64)
-            elif token.value.upper() != state.ID:
-                reportError(f"toc3 value ({token.value}) not the same as book ID in {state.reference}", 64.5)
-    else:
-        state.addTitle(token.value)
-    if token.isMT() and token.value.isascii() and not suppress[9]:
-        reportError("mt token has ASCII value in " + state.reference, 30)
-    if token.value.isupper() and not state.upperCaseReported and not suppress[8]:
-        reportError("Upper case book title in " + state.reference, 31)
-        state.reportedUpperCase()
-    if token.value.startswith("Ii"):
-        reportError(f"Mixed case roman numerals in \\{token.type} field", 31.1)
-    if state.currMarkerType == B:
-        reportError("\\b may not be used before or after titles or headings. " + state.reference, 32)
-
-vv_re = re.compile(r'([0-9]+)-([0-9]+)')
-vinvalid_re = re.compile(r'[^\d\-]')
-
-# Receives a string containing a verse number or range of verse numbers.
-# Reports missing text in previous verse.
-# Reports errors related to the verse number(s), such as missing or duplicated verses.
-def takeV(vstr):
-    if state.currMarkerType == B:
-        reportError(f"\\b should be used only between paragraphs. {state.reference}", 33)
-    if vstr != "1":
-        previousVerseCheck()   # Checks previous verse
-    vlist = []
-    if vstr.find('-') > 0:
-        vv_range = vv_re.search(vstr)
-        if vv_range:
-            vnStart = int(vv_range.group(1))
-            vnEnd = int(vv_range.group(2))
-            # while vn <= vnEnd:
-            #     vlist.append(vn)
-            #     vn += 1
-            for vn in range(vnStart, vnEnd + 1):
-                vlist.append(vn)
-        else:
-            reportError("Problem in verse range near " + state.reference, 34)
-    else:
-        vlist.append(int(vstr))
-
-    for vn in vlist:
-        v = str(vn)
-        state.addVerse(str(vn))
-        if len(state.IDs) == 0 and state.chapter == 0:
-            reportError("Missing ID before verse: " + v, 35)
-        if state.chapter == 0:
-            reportError("Missing chapter tag: " + state.reference, 36)
-        if state.verse == 1 and state.needPP:
-            reportError("Need paragraph marker before: " + state.reference, 37, suppress[2])
-        if state.needQQ:
-            reportError("Need \\q or \\p after acrostic heading before: " + state.reference, 38)
-            state.resetPoetry()
-        if state.verse < state.lastVerse and state.addError(state.lastRef):
-            reportError("Verse out of order: " + state.reference + " after " + state.lastRef, 39)
-            state.addError(state.reference)
-        elif state.verse == state.lastVerse:
-            reportError("Duplicated verse number: " + state.reference, 40)
-        elif state.verse == state.lastVerse + 2 and not isOptional(state.reference, True):
-            if state.addError(state.lastRef):
-                reportError("Missing verse between: " + state.lastRef + " and " + state.reference, 41)
-        elif state.verse > state.lastVerse + 2 and state.addError(state.lastRef):
-            reportError("Missing verses between: " + state.lastRef + " and " + state.reference, 41.1)
-
-reference_re = re.compile(r'[\d]+[\s]*:[\s]*[\d]+', re.UNICODE)
-bracketed_re = re.compile(r'\[ *([^\]]+) *\]', re.UNICODE)
-
-# Looks for possible verse references and square brackets in the text, not preceded by a footnote marker.
-# This function is only called when parsing a piece of text preceded by a verse marker.
-def reportFootnotes(text):
-    global lastToken
-    if not isFootnote(lastToken):
-        if ref := reference_re.search(text):
-            reportFootnote(ref.group(0))
-        elif ('(' in text or '[' in text or ')' in text) and (isOptional(state.reference) or state.reference in footnoted_verses.footnotedVerses):
-            reportFootnote('(')
-        elif "[" in text:
-            fn = bracketed_re.search(text)
-            if not fn or ' ' in fn.group(1):    # orphan [, or more than one word between brackets
-                reportFootnote('[')
-
-def reportFootnote(trigger):
-    reference = state.reference
-    if ':' in trigger:
-        reportError(f"Probable chapter:verse reference ({trigger}) at {reference} belongs in a footnote", 43)
-    elif isOptional(reference) or reference in footnoted_verses.footnotedVerses:
-        reportError(f"Bracket or parens found in {reference}, a verse that is often footnoted", 43.1)
-    else:
-        reportError(f"Optional text or untagged footnote at {reference}", 43.2)
-
-# Warns when a paragraph break appears in what seems to be the middle of a sentence.
-# Warns when the specified string is supposed to start a sentence but the first word is not capitalized.
-# Warns when a sentence later in the string does not start with a capital letter.
-def reportCaps(s):
-    if state.needCaps():
-        word = sentences.firstword(s)
-        if word and word[0].islower():
-            if state.currMarkerType == PP or state.prevMarkerType == PP:
-                reportError(f"First word of paragraph not capitalized near {state.reference}", 44, suppress[10])
-            else:
-                reportError(f"First word in sentence is not capitalized: \"{word}\" at {state.reference}", 44.1, suppress[10])
-    for word in sentences.nextfirstwords(s):
-        if word[0].islower():
-            reportError(f"First word in sentence is not capitalized: \"{word}\" in {state.reference}", 44.1, suppress[10])
-
 # Returns a string containing text preceding specified start position and following end position
 def context(text, start, end):
     start = 0 if start < 0 else 1 + text.rfind(' ', 0, start)
     end = text.find(' ', end, -1)
     return text[start:end] if end > start else text[start:]
 
-#adjacent_re = re.compile(r'([\.\?!;\:,][\.\?!;\:,])', re.UNICODE)
-punctuation_re = re.compile(r'([.?!;:,][^\s\u200b\)\]\'"’”»›])', re.UNICODE)     # phrase ending punctuation that doesn't actually end
-# note: \u200b indicates word boundaries in scripts that do not use explicit spacing, but is used (seemingly incorrectly) like a space in Laotian
-spacey_re = re.compile(r'[\s\n]([\.\?!;\:,\)’”»›])', re.UNICODE)    # space before phrase-ending mark
-spacey2_re = re.compile(r'[\s][\[\]\(\'"«“‘’”»›][\s]', re.UNICODE)    # free floating marks
-spacey3_re = re.compile(r'[\(\'"«“‘’”»›][\s]', re.UNICODE)       # quote-space at beginning of verse
-spacey4_re = re.compile(r'[\s][\(\'"«“‘’”»›]$', re.UNICODE)       # quote-space at end of verse
-#wordmedial_punct_re = re.compile(r'[\w][\.\?!;\:,\(\)\[\]"«“‘’”»›][\.\?!;\:,\(\)\[\]\'"«“‘’”»›]*[\w]', re.UNICODE)
-wordmedial_punct_re = re.compile(r'[\w][.?!;:,()\[\]"«“‘”»›][.?!;:,()\[\]\'"«“‘’”»›]*[\w]')
-outsidequote_re = re.compile(r'([\'"’”»›][\.!])', re.UNICODE)   # Period or exclamation outside closing quote.
-
-def reportPunctuation(text):
-    global lastToken
-    if bad := punctuation_re.search(text):
-        i = bad.start()
-        if text[i:i+3] != '...' or text[i:i+4] == "....":
-            chars = bad.group(1)
-            if not (chars[0] in ',.' and chars[1] in "0123456789"):   # it's a number
-                if not (chars[0] == ":" and chars[1] in "0123456789"):
-                    reportError("Check the punctuation at " + state.reference + ": " + chars, 45)
-                elif not (state.inFootnote() or lastToken.getType().startswith('io') \
-                          or lastToken.getType().startswith('ip')):
-                    s = context(text, bad.start()-2, bad.end()+1)
-                    reportError(f"Untagged footnote (probable) at {state.reference}: {s}", 46)
-    #if bad := adjacent_re.search(text):
-        #i = bad.start()
-        #if text[i:i+3] != "..." or text[i:i+4] == "....":   # Don't report proper ellipses ...
-            #reportError("Check repeated punctuation at " + state.reference + ": " + bad.group(1), 47)
-    if bad := spacey_re.search(text):
-        reportError("Space before phrase ending mark at " + state.reference + ": " + bad.group(1), 48)
-    if bad := outsidequote_re.search(text):
-        i = bad.start()
-        if text[i+1:i+4] != "...":
-            reportError(f"Punctuation after quote mark at {state.reference}: {bad.group(1)}", 50)
-
-    if bad := spacey2_re.search(text):
-        s = context(text, bad.start()-2, bad.end()+2)
-    elif bad := spacey3_re.match(text):
-        s = context(text, 0, bad.end()+2)
-    elif bad := spacey4_re.search(text):
-        s = context(text, bad.start()-2, len(text))
-    if bad:
-        reportError(f"Free floating mark at {state.reference}: {s}", 49)
-
-    if "''" in text or '""' in text:
-        reportError("Repeated quotes at " + state.reference, 51)
-    bad = wordmedial_punct_re.search(text)
-    if bad and text[bad.end()-1] not in "0123456789":
-        s = context(text, bad.start(), bad.end())
-        reportError(f"Word medial punctuation in {state.reference}: {s}", 52)
-    if '/' in text:
-        reportError(f"Forward slash in {state.reference}", 52.1)
-    if '\\' in text:
-        reportError(f"Backslash in {state.reference}", 52.2)
-    if '=' in text:
-        reportError(f"Equals sign (=) in {state.reference}", 52.3)
-
-numberembed_re = re.compile(r'[^\s,:\.\d\(\[\-]+[\d]+[^\s,;\.\d\)\]]+')
-numberprefix_re = re.compile(r'[^\s,\.\d\(\[][\d]+', re.UNICODE)
-numbersuffix_re = re.compile(r'[\d]+[^\s,;:.\-?!"\d\)\]]', re.UNICODE)
-unsegmented_re = re.compile(r'[\d][\d][\d][\d]+')
-numberformat_re = re.compile(r'[\d]+[.,]?\s[.,]?[\d]+')    # space between digits
-leadingzero_re = re.compile(r'[\s]0[0-9,]*', re.UNICODE)
-number_re = re.compile(r'[^\d](\d+)[^\d,]')       # possible verse number in text
-chapverse_re = re.compile(r'(\d+)([:\-])(\d+)')
-
-def reportNumbers(t, footnote):
-    verseflag = False
-    if not footnote:
-        if t.startswith(str(state.verse) + " "):
-            reportError("Verse number in text (probable): " + state.reference, 59)
-            verseflag = True
-        elif v := number_re.search(t):
-            while v:
-                if v.group(1) == str(state.verse) or v.group(1) == str(state.verse+1):
-                    reportError(f"Possible verse number ({v.group(1)}) in text at {state.reference}", 59.1)
-                    verseflag = True
-                v = number_re.search(t, v.end()-1)
-        if not verseflag:
-            chapverse = chapverse_re.search(t)
-            while chapverse:
-                if chapverse.group(2) == ":" or int(chapverse.group(3)) > int(chapverse.group(1)):
-                    reportError(f"Likely verse reference ({chapverse.group(0)}) in text at {state.reference}", 59.2)
-                    verseflag = True
-                chapverse = chapverse_re.search(t, chapverse.end())
-    if embed := numberembed_re.search(t):
-        reportError(f"Embedded number in word: {embed.group(0)} at {state.reference}", 60)
-    elif not verseflag:
-        if suffixed := numbersuffix_re.search(t):
-            if not footnote:
-                reportError(f"Invalid number suffix: {suffixed.group(0)} at {state.reference}", 60.2)
-        if prefixed := numberprefix_re.search(t):
-            if not footnote or (prefixed.group(0)[0] not in {':','-'}):
-                reportError(f"Invalid number prefix: {prefixed.group(0)} at {state.reference}", 60.1)
-    if unsegmented := unsegmented_re.search(t):
-        if len(unsegmented.group(0)) > 4:
-            reportError(f"Unsegmented number: {unsegmented.group(0)} at {state.reference}", 61.5)
-    if fmt := numberformat_re.search(t):
-        reportError(f"Space in number {fmt.group(0)} at {state.reference}", 61.6)
-    elif leadzero := leadingzero_re.search(t):
-        reportError(f"Invalid leading zero: {leadzero.group(0)} at {state.reference}", 61)
-
-period_re = re.compile(r'[\s]*[\.,;:!\?]', re.UNICODE)  # detects phrase-ending punctuation standing alone or starting a phrase
-
-# Performs checks on some text, at most a verse in length.
-def takeText(t, footnote=False):
-    global lastToken
-    if not state.textOkay() and not isTextCarryingToken(lastToken):
-        if t[0] == '\\':
-            reportError("Uncommon or invalid marker near " + state.reference, 53)
-        else:
-            # print u"Missing verse marker before text: <" + t.encode('utf-8') + u"> around " + state.reference
-            # reportError(u"Missing verse marker or extra text around " + state.reference + u": <" + t[0:10] + u'>.')
-            reportError("Missing verse marker or extra text near " + state.reference, 54)
-        if lastToken:
-            reportError("  preceding Token was \\" + lastToken.getValue(), 0)
-        else:
-            reportError("  no preceding Token", 0)
-    if state.textOkay() and state.verse == 0:
-        reportError(f"Unmarked text before {state.reference + ':1'}", 76)
-    if "<" in t and not ">" in t:
-        if "<< HEAD" in t:
-            reportError("Unresolved translation conflict near " + state.reference, 55)
-        else:
-            reportError("Angle bracket not closed at " + state.reference, 56)
-    if "Conflict Parsing Error" in t:
-        reportError("BTT Writer artifact in " + state.reference, 57)
-    if not suppress[3] and not aligned_usfm:    # report punctuation issues
-        reportPunctuation(t)
-    if period := period_re.match(t):    # text starts with a period
-        if len(t) <= period.end() + 1:
-            reportError(f"Orphaned punctuation at {state.reference}", 58)
-        else:
-            reportError("Text begins with phrase-ending punctuation in " + state.reference, 58.1)
-    if lastToken.isV() and not aligned_usfm:
-        reportFootnotes(t)
-    if not suppress[1]:
-        reportNumbers(t, footnote)
-    if not footnote:
-        reportCaps(t)
-        state.endSentence( sentences.endsSentence(t) )
-    state.addText(t)
-    addWords(t)
-
-allpunc = ".,:;!?-\[\]{}()<>'\"“‘’”`*/"
-quoteend_re = re.compile(r"[.,:;!?-\[\]{}()<>'\"“‘’”`*/]'$")
-notnumberinfootnote_re = re.compile(r'[^\d:\-.,]')
-
-def addWords(t):
-    for item in t.split():
-        word = item.strip(".,:;!?+-[]{}()<>\"“‘’”*/")
-        if quoteend_re.search(word):
-            word = word.rstrip(allpunc)
-        if word:
-            if not state.inFootnote() or notnumberinfootnote_re.search(word):
-                (count, ref) = wordlist.get(word, (0, None))
-                ref = state.reference if count == 0 else ""
-                wordlist[word] = (count+1, ref)
-
 # Returns true if token is part of a footnote
 def isFootnote(token):
     return (token.getType().startswith("f") and token.getType() != "fig") or token.getType().startswith("rq")
@@ -921,64 +398,48 @@ def isTitleToken(token):
 def isNumericCandidate(token):
     return token.isTEXT() or isTitleToken(token) or token.isCL() or token.isCP() or token.isFT()
 
-def take(token):
-    global lastToken
-    global usfm_version
+# Generates the paths of all .usfm files under the specified folder, in the order they are verified.
+def usfmPaths(dir):
+    dirpath = Path(dir)
+    for path in dirpath.iterdir():
+        if path.name[0] != '.':         # ignore hidden files
+            if path.is_dir():
+                # It's a directory, recurse into it
+                yield from usfmPaths(path)
+            elif path.is_file() and path.name[-3:].lower() == 'sfm':
+                yield path
 
-    if not token.isTEXT():
-        if not state.addMarker(token.type):
-            reportError(f"Back to back markers of type {token.type} at {state.reference}", 62)
-    else:
-        takeText(token.value, state.inFootnote())
-
-    if token.isID():
-        takeID(token.value)
-    elif token.isC():
-        if not suppress[5]:
-            verifyVerseCount()  # for the preceding chapter
-        if not state.ID:
-            reportError("Missing book ID: " + state.reference, 62.1)
-            sys.exit(-1)
-        if token.value == "1":
-            verifyBookTitle()
-        takeC(token.value)
-    elif token.isCL():
-        takeCL(token.value)
-    elif token.isP() or token.isPI() or token.isPC() or token.isNB() or token.isM():
-        takeP(token.type)
-        if token.value:     # paragraph markers can be followed by text
-            reportError("Unexpected: text returned as part of paragraph token." +  state.reference, 63)
-            takeText(token.value)
-    elif token.isV():
-        takeV(token.value)
-    elif isFootnote(token):
-        takeFootnote(token)
-    elif token.isS5():
-        takeS5()
-    elif token.isS() or token.isMR() or token.isMS() or token.isD() or token.isSP():
-        takeSection(token.type)
-    elif token.isQA():
-        state.addAcrosticHeading()
-    elif isPoetry(token):
-        takeQ(token.type)
-    elif token.isB():
-        takeB()
-    elif isTitleToken(token):
-        takeTitle(token)
-    elif token.isUSFM():    # non-standard USFM token but is used by UnfoldingWord software
-        usfm_version = int(token.value[0])
-    elif token.isUnknown():
-        if token.value == "p":
-            reportError("Orphaned paragraph marker after " + state.reference, 65)
-        elif token.value == "v":
-            reportError("Unnumbered verse after " + state.reference, 66)
-        elif usfm_version == 2:
-            reportError("Invalid USFM token (\\" + token.value + ") near " + state.reference, 67)
-
-    if config['language_code'] in {"ur"} and isNumericCandidate(token) and re.search(r'[0-9]', token.value):
-        reportError("Arabic numerals in footnote at " + state.reference, 68)
-
-    lastToken = token
+vv_re = re.compile(r'([0-9]+)-([0-9]+)')
+vinvalid_re = re.compile(r'[^\d\-]')
+
+reference_re = re.compile(r'[\d]+[\s]*:[\s]*[\d]+', re.UNICODE)
+bracketed_re = re.compile(r'\[ *([^\]]+) *\]', re.UNICODE)
+
+#adjacent_re = re.compile(r'([\.\?!;\:,][\.\?!;\:,])', re.UNICODE)
+punctuation_re = re.compile(r'([.?!;:,][^\s\u200b\)\]\'"’”»›])', re.UNICODE)     # phrase ending punctuation that doesn't actually end
+# note: \u200b indicates word boundaries in scripts that do not use explicit spacing, but is used (seemingly incorrectly) like a space in Laotian
+spacey_re = re.compile(r'[\s\n]([\.\?!;\:,\)’”»›])', re.UNICODE)    # space before phrase-ending mark
+spacey2_re = re.compile(r'[\s][\[\]\(\'"«“‘’”»›][\s]', re.UNICODE)    # free floating marks
+spacey3_re = re.compile(r'[\(\'"«“‘’”»›][\s]', re.UNICODE)       # quote-space at beginning of verse
+spacey4_re = re.compile(r'[\s][\(\'"«“‘’”»›]$', re.UNICODE)       # quote-space at end of verse
+#wordmedial_punct_re = re.compile(r'[\w][\.\?!;\:,\(\)\[\]"«“‘’”»›][\.\?!;\:,\(\)\[\]\'"«“‘’”»›]*[\w]', re.UNICODE)
+wordmedial_punct_re = re.compile(r'[\w][.?!;:,()\[\]"«“‘”»›][.?!;:,()\[\]\'"«“‘’”»›]*[\w]')
+outsidequote_re = re.compile(r'([\'"’”»›][\.!])', re.UNICODE)   # Period or exclamation outside closing quote.
+
+numberembed_re = re.compile(r'[^\s,:\.\d\(\[\-]+[\d]+[^\s,;\.\d\)\]]+')
+numberprefix_re = re.compile(r'[^\s,\.\d\(\[][\d]+', re.UNICODE)
+numbersuffix_re = re.compile(r'[\d]+[^\s,;:.\-?!"\d\)\]]', re.UNICODE)
+unsegmented_re = re.compile(r'[\d][\d][\d][\d]+')
+numberformat_re = re.compile(r'[\d]+[.,]?\s[.,]?[\d]+')    # space between digits
+leadingzero_re = re.compile(r'[\s]0[0-9,]*', re.UNICODE)
+number_re = re.compile(r'[^\d](\d+)[^\d,]')       # possible verse number in text
+chapverse_re = re.compile(r'(\d+)([:\-])(\d+)')
+
+period_re = re.compile(r'[\s]*[\.,;:!\?]', re.UNICODE)  # detects phrase-ending punctuation standing alone or starting a phrase
+
+allpunc = ".,:;!?-\[\]{}()<>'\"“‘’”`*/"
+quoteend_re = re.compile(r"[.,:;!?-\[\]{}()<>'\"“‘’”`*/]'$")
+notnumberinfootnote_re = re.compile(r'[^\d:\-.,]')
 
 bad_chapter_re1 = re.compile(r'[^\n](\\c\s*\d+)', re.UNICODE)
 bad_chapter_re2 = re.compile(r'(\\c[0-9]+)', re.UNICODE)
@@ -987,178 +448,971 @@ bad_verse_re1 = re.compile(r'([^\n\r\s]\\v\s*\d+)', re.UNICODE)
 bad_verse_re2 = re.compile(r'(\\v[0-9]+)', re.UNICODE)
 bad_verse_re3 = re.compile(r'(\\v\s*[-0-9]+[^-\d\s])', re.UNICODE)
 
-# Receives the text of an entire book as input.
-# Reports bad patterns.
-def verifyChapterAndVerseMarkers(text, path):
-    for badactor in bad_chapter_re1.finditer(text):
-        reportError("Missing newline before chapter marker: " + badactor.group(1) + " in " + path, 69)
-    for badactor in bad_chapter_re2.finditer(text):
-        reportError("Missing space before chapter number: " + badactor.group(0) + " in " + path, 70)
-    for badactor in bad_chapter_re3.finditer(text):
-        reportError("Missing space after chapter number: " + badactor.group(1) + " in " + path, 71)
-    for badactor in bad_verse_re1.finditer(text):
-        s = badactor.group(1)
-        if s[0] < ' ' or s[0] > '~': # not printable ascii
-            s = s[1:]
-        reportError("Missing white space before verse marker: " + s + " in " + path, 72)
-    for badactor in bad_verse_re2.finditer(text):
-        reportError("Missing space before verse number: " + badactor.group(0) + " in " + path, 73)
-    for badactor in bad_verse_re3.finditer(text):
-        s = badactor.group(1)
-#        if s[-1] < ' ' or s[-1] > '~': # not printable ascii
-#            s = s[:-1]
-        reportError("Missing space after verse number: " + s + " in " + path, 74)
-
-def verifyParagraphCount():
-    if state.nParagraphs / state.chapter <= 2.5 and state.nPoetry / state.chapter <= 15:
-        reportError(f"Low paragraph count ({state.nParagraphs + state.nPoetry}) for {state.ID}", 73.5)
-
-orphantext_re = re.compile(r'\n\n[^\\]', re.UNICODE)
-embeddedquotes_re = re.compile(r"\w'\w")
-
-# Receives the text of an entire book as input.
-# Verifies things that are better done as a whole file.
-# Can't report verse references because we haven't started to parse the book yet.
-def verifyWholeFile(contents, path):
-    verifyChapterAndVerseMarkers(contents, path)
-
-    lines = contents.split('\n')
-    orphans = orphantext_re.search(contents)
-    if orphans:
-        reportOrphans(lines, path)
-
-    if not suppress[6]:
-        nembedded = len(embeddedquotes_re.findall(contents))
-        nsingle = contents.count("'") - nembedded
-        ndouble = contents.count('"')
-        if ndouble > 0:
-            if nsingle == 0 or suppress[7]:
-                reportError(f"Straight quotes in {shortname(path)}: {ndouble} doubles.", 75)
-            else:
-                reportError(f"Straight quotes in {shortname(path)}: {ndouble} doubles, {nsingle} singles not counting {nembedded} word-medial.", 75)
-        elif nsingle > 0 and not suppress[7]:
-            reportError(f"Straight quotes in {shortname(path)}: {nsingle} singles not counting {nembedded} word-medial.", 75)
+# The chapter and verse marker checks, with the offset of their matches from the marker
+marker_checks = {'c': ((bad_chapter_re1, -1), (bad_chapter_re2, 0), (bad_chapter_re3, 0)),
+                 'v': ((bad_verse_re1, -1), (bad_verse_re2, 0), (bad_verse_re3, 0))}
 
+embeddedquotes_re = re.compile(r"\w'\w")
 
 conflict_re = re.compile(r'<+ HEAD', re.UNICODE)   # conflict resolution tag
 
-def reportOrphans(lines, path):
-    prevline = "xx"
-    lineno = 0
-    for line in lines:
-        lineno += 1
-        if not prevline and line and line[0] != '\\':
-            if not conflict_re.match(line):
-                reportError("Unmarked text at line " + str(lineno) + " in " + path, 76)
-            # else:
-                #  Will be reported later as an unresolved translation conflict
-        prevline = line
-
 wjwj_re = re.compile(r' \\wj +\\wj\*', flags=re.UNICODE)
 backslasheol_re = re.compile(r'\\ *\n')
 
-# Corresponding entry point in tx-manager code is verify_contents_quiet()
-def verifyFile(path):
-    global aligned_usfm
-    input = io.open(path, "r", buffering=1, encoding="utf-8-sig")
-    contents = input.read(-1)
-    input.close()
-
-    if wjwj_re.search(contents):
-        reportError("Empty \\wj \\wj* pair(s) in " + shortname(path), 77)
-    if backslasheol_re.search(contents):
-        reportError("Stranded backslash(es) at end of line(s) in " + shortname(path), 78)
-    if '\x00' in contents:
-        reportError("Null bytes found in " + shortname(path), 79)
-    aligned_usfm = ("lemma=" in contents or "x-occurrences" in contents)
-    if aligned_usfm:
-        contents = usfm_utils.unalign_usfm(contents)
-
-    if len(contents) < 100:
-        reportError("Incomplete file: " + shortname(path), 80)
-    else:
-        reportProgress(f"CHECKING {shortname(path)}...")
+# Builds the whole file scanner, with or without the wjwj, backslasheol and null byte checks.
+# The scanner matches a single character class first, so the regex engine skips the rest of the text quickly.
+# Each branch then consumes at most one more character, so that no branch can hide a match of another.
+# The c and v branches match only the markers that one of the marker_checks would report.
+def scanner(fileChecks):
+    backslash = [r'(?P<c>c(?=[0-9]|\s*\d+[^\d\s]+[\n\r]|(?<=[^\n]\\c)\s*\d))',
+                 r'(?P<v>v(?=[0-9]|\s*[-0-9]+[^-\d\s]|(?<=[^\n\r\s]\\v)\s*\d))']
+    others = [r'(?<=\n)(?P<orphan>(?=\n[^\\]))',      # blank line followed by text
+              r"(?<=\w')(?P<embedded>(?=\w))"]          # single quote between letters
+    if fileChecks:
+        backslash += [r'(?P<wjwj>(?<= \\)(?=wj +\\wj\*))',  # empty \wj \wj* pair
+                      r'(?P<eol>(?= *\n))']                # stranded backslash at end of line
+        others += [r'(?<=\x00)(?P<null>)']
+    first = r"\\\n'" + (r'\x00' if fileChecks else '')
+    return re.compile(rf"[{first}](?:(?<=\\)(?:{'|'.join(backslash)})|{'|'.join(others)})")
+
+scan_re = scanner(True)
+wholescan_re = scanner(False)
+
+# The findings of the whole file checks, made in a single pass over the text.
+# Each finding is (match, line number), in the order the matches occur in the text.
+#   findings[check] - matches of each marker check, the same as check.finditer(text) would find
+#   findings['orphan'] - line numbers of text that follows a blank line; only if there is any
+#   findings['wjwj'], findings['eol'], findings['null'] - line numbers of the file checks
+#   nsingle, ndouble, nembedded - counts of straight quotes, and of single quotes between letters
+# Aligned usfm is mostly markup, which makes literal searches for the file checks faster than the scanner,
+# so with wholeChecks=False, only those searches are made.
+class WholeFileScan:
+    def __init__(self, text, wholeChecks=True, fileChecks=True):
+        self.findings = {'orphan': [], 'wjwj': [], 'eol': [], 'null': []}
+        self.nsingle = self.ndouble = self.nembedded = 0
+        if wholeChecks:
+            self.scan(text, scan_re if fileChecks else wholescan_re)
+        elif fileChecks:
+            for (kind, regex) in (('wjwj', wjwj_re), ('eol', backslasheol_re)):
+                if found := regex.search(text):
+                    self.findings[kind].append((found, text.count('\n', 0, found.start()) + 1))
+            if (pos := text.find('\x00')) >= 0:
+                self.findings['null'].append((None, text.count('\n', 0, pos) + 1))
+
+    def scan(self, text, scanner):
+        ends = {check: 0 for checks in marker_checks.values() for (check, offset) in checks}
+        embeddedEnd = 0
+        blankLines = False
+        lineno = 1
+        linepos = 0
+        for found in scanner.finditer(text):
+            kind = found.lastgroup
+            pos = found.start()
+            lineno += text.count('\n', linepos, pos)
+            linepos = pos
+            if kind in marker_checks:
+                for (check, offset) in marker_checks[kind]:
+                    start = pos + offset
+                    if start >= ends[check] and (match := check.match(text, start)):
+                        ends[check] = match.end()
+                        self.findings.setdefault(check, []).append((match, lineno))
+            elif kind == 'embedded':
+                if pos - 1 >= embeddedEnd:      # same as embeddedquotes_re.findall()
+                    self.nembedded += 1
+                    embeddedEnd = pos + 2
+            elif kind == 'orphan':
+                blankLines = True
+                if text[pos+2] != '\n' and not conflict_re.match(text, pos+2):
+                    self.findings['orphan'].append((None, lineno + 2))
+            else:
+                self.findings[kind].append((found, lineno))
+        self.nsingle = text.count("'") - self.nembedded
+        self.ndouble = text.count('"')
+        # Text on line 2, after a blank first line, is reported only if there are other blank lines
+        if blankLines and text[:1] == '\n' and text[1:2] not in ('', '\\', '\n') and not conflict_re.match(text, 1):
+            self.findings['orphan'].insert(0, (None, 2))
+
+    def get(self, check):
+        return self.findings.get(check, [])
+
+# The findings of verifying one file in a worker process, or as recorded in the verify cache.
+# Messages are kept in the order they were reported, and are reported for real when the result is merged.
+class FileResult:
+    def __init__(self, path):
+        self.path = path
+        self.messages = []      # (kind, state.reference, arguments)
+        self.words = dict()     # same form as wordlist
+        self.exception = None   # raised when the result is merged, if verifying the file failed
+
+    def add(self, kind, reference, *args):
+        self.messages.append((kind, reference, args))
+
+# Verifies usfm files and accumulates the issues and the word list across them.
+# Holds all the state of a run, so separate verifiers can run at the same time in different threads.
+#   source_dir - folder for issues.txt and wordlist.txt; file names are reported relative to it
+#   language_code, suppress, std_titles - same as the config values
+#   parse_jobs - worker processes for parsing a large book
+#   gui - the usfm_wizard app, or None
+# Call finish() after verifying the files to write the issues summary and the word list.
+class UsfmVerifier:
+    def __init__(self, source_dir, language_code="", suppress=None, std_titles=(), parse_jobs=1, gui=None):
+        self.source_dir = source_dir
+        self.language_code = language_code
+        self.suppress = list(suppress) if suppress else [False]*12
+        if language_code in {'diu','en','es','es-419','gl','ha','hr','id','kcn','kpj','nag','plt','pmy','pt-br','sw','tl','tpi'}:    # ASCII content
+            self.suppress[9] = True
+        if language_code in {'as','bn','gu','hi','kn','ml','mr','nag','ne','or','pa','ru','ta','te','zh'}:    # ASCII content
+            self.suppress[9] = False
+        self.std_titles = list(std_titles)
+        self.parse_jobs = parse_jobs
+        self.gui = gui
+
+        self.state = State()
+        self.lastToken = None
+        self.aligned_usfm = False
+        self.usfm_version = 2    # reset for each file; a \usfm marker changes it
+        self.issuesFile = None
+        self.issues = dict()     # Can't put in State because we want to accumulate issues across all files.
+        self.wordlist = dict()
+        self.bookIDs = []        # IDs of the books verified so far, to detect duplicates
+        self.fileResult = None   # collects the findings when verifying a file in a worker process
+
+    # Returns the arguments for creating the same verifier in a worker process.
+    def settings(self):
+        return dict(source_dir=self.source_dir, language_code=self.language_code,
+                    suppress=self.suppress, std_titles=self.std_titles)
+
+    def shortname(self, longpath):
+        shortname = Path(longpath)
+        if self.source_dir:
+            source_dir = Path(self.source_dir)
+            if shortname.is_relative_to(source_dir):
+                shortname = shortname.relative_to(source_dir)
+        return str(shortname)
+
+    # If issues.txt file is not already open, opens it for writing.
+    # First renames existing issues.txt file to issues-oldest.txt unless
+    # issues-oldest.txt already exists.
+    # Returns file pointer.
+    def openIssuesFile(self):
+        if not self.issuesFile:
+            source_dir = self.source_dir
+            path = os.path.join(source_dir, "issues.txt")
+            if os.path.exists(path):
+                bakpath = os.path.join(source_dir, "issues-oldest.txt")
+                if not os.path.exists(bakpath):
+                    os.rename(path, bakpath)
+            self.issuesFile = io.open(path, "tw", encoding='utf-8', newline='\n')
+            self.issuesFile.write(f"Issues detected by verifyUSFM, {date.today()}, {source_dir}\n-------------------\n")
+        return self.issuesFile
+
+    # Writes error message to stderr and to issues.txt.
+    # Keeps track of how many errors of each type.
+    def reportError(self, msg, errorId=0, summarize_only=False):
+        if self.fileResult:
+            self.fileResult.add('error', self.state.reference, msg, errorId, summarize_only)
+            return
+        if not summarize_only:
+            self.reportToGui('<<ScriptMessage>>', msg)
+            self.write(msg, sys.stderr)
+            self.openIssuesFile().write(msg + "\n")
+
+        if errorId > 0:
+            issues = self.issues
+            if errorId in issues:
+                newmsg = long_substring(msg, issues[errorId][0])
+                newcount = issues[errorId][1] + 1
+            else:
+                newmsg = msg
+                newcount = 1
+            issues[errorId] = (newmsg, newcount)
+
+    # Sends a progress message to the GUI, and to stdout.
+    def reportProgress(self, msg):
+        if self.fileResult:
+            self.fileResult.add('progress', self.state.reference, msg)
+            return
+        self.reportToGui('<<ScriptProgress>>', msg)
+        self.write(msg, sys.stdout)
+
+    # Sends a status message to the GUI, and to stdout.
+    def reportStatus(self, msg):
+        if self.fileResult:
+            self.fileResult.add('status', self.state.reference, msg)
+            return
+        self.reportToGui('<<ScriptMessage>>', msg)
+        self.write(msg, sys.stdout)
+
+    def reportToGui(self, event, msg):
+        gui = self.gui
+        if gui:
+            with gui.progress_lock:
+                gui.progress = msg if not gui.progress else f"{gui.progress}\n{msg}"
+            gui.event_generate(event, when="tail")
+
+    # This little function streams the specified message and handles UnicodeEncodeError
+    # exceptions, which are common in Indian language texts. 2/5/24.
+    def write(self, msg, stream):
+        try:
+            stream.write(msg + "\n")
+        except UnicodeEncodeError as e:
+            stream.write(self.state.reference + ": (Unicode...)\n")
+
+    # Write summary of issues to issuesFile
+    def reportIssues(self):
+        total = 0
+        issuesfile = self.openIssuesFile()
+        issuesfile.write("\nSUMMARY:\n")
+        for issue in sorted(self.issues.items(), key=lambda kv: kv[1][1], reverse=True):
+            total += issue[1][1]
+            issuesfile.write(f"{issue[1][0]}...:  {issue[1][1]} occurrence(s).\n")
+        issuesfile.write(f"\n{total} issues found.")
+
+    # Writes the word list to a file.
+    def dumpWords(self):
+        path = os.path.join(self.source_dir, "wordlist.txt")
+        with io.open(path, "tw", encoding='utf-8', newline = '\n') as file:
+            file.write("For better viewing, used a fixed-width font if available.\n")
+            file.write("---------------------------------------------------------\n")
+
+            for entry in sorted(self.wordlist.items(), key=wordkey):
+                line = f"{entry[0]:20}  {entry[1][0]}"
+                if entry[1][0] < 3:
+                    line = line + ",   " + entry[1][1]
+                file.write(line + '\n')
+
+    # Writes the summary of issues and the word list, after all the files have been verified.
+    def finish(self):
+        if self.issuesFile:
+            self.reportIssues()
+            self.issuesFile.close()
+            self.issuesFile = None
+        else:
+            self.reportStatus("No issues to report.")
+        self.dumpWords()
+        self.reportStatus("\nDone.")
+        sys.stdout.flush()
+
+    # Report missing text or all ASCII text, in previous verse
+    def previousVerseCheck(self):
+        state = self.state
+        if not isOptional(state.reference) and state.getTextLength() < 10 and state.verse != 0:
+            if state.getTextLength() == 0:
+                self.reportError("Empty verse: " + state.reference, 1)
+            elif not isShortVerse(state.reference):
+                self.reportError("Verse fragment: " + state.reference, 2)
+        if not self.suppress[9] and state.asciiVerse and state.getTextLength() > 0:
+            self.reportError("Verse is entirely ASCII: " + state.reference, 3)
+
+    def longChunkCheck(self):
+        state = self.state
+        max_chunk_length = 400  # set lower if this is ever needed again
+        if not self.aligned_usfm and state.verse - (max_chunk_length-1) > state.startChunkVerse:
+            self.reportError("Long chunk: " + state.startChunkRef + "-" + str(state.verse) + "   (" + str(state.verse-state.startChunkVerse+1) + " verses)", 4)
+
+
+    # Verifies that at least one book title is specified, other than the English book title.
+    # This method is called just before chapter 1 begins, so there has been every
+    # opportunity for the book title to be specified.
+    def verifyBookTitle(self):
+        state = self.state
+        title_ok = False
+        en_name = bookTitleEnglish(state.ID)
+        for title in state.booktitles:
+            if title and title != en_name:
+                title_ok = True
+        if not title_ok:
+            self.reportError("No non-English book title for " + state.ID, 5)
+
+    # Reports inconsistent chapter titling
+    def verifyChapterTitles(self):
+        state = self.state
+        if len(state.chaptertitles) > 1 and len(state.chaptertitles) != len(self.std_titles):
+            self.reportError(f"Inconsistent chapter titling: {state.chaptertitles} in {state.ID}", 6)
+        if state.nChapterLabels > 1 and state.nChapterLabels != state.chapter:
+            self.reportError(f"Some chapters do not have chapter labels but {state.nChapterLabels} do.", 7)
+
+    # Verifies correct number of verses for the current chapter.
+    # This method is called just before the next chapter begins.
+    def verifyVerseCount(self):
+        state = self.state
+        if state.chapter > 0 and state.verse != nVerses(state.ID, state.chapter):
+            # Acts may have 40 o4 41 verses, normally 41.
+            # 2 Cor. may have 13 or 14 verses, normally 14.
+            # 3 John may have 14 or 15 verses, normally 14.
+            # Revelation 12 may have 17 or 18 verses, normally 17.
+            if state.reference != 'REV 12:18' and state.reference != '3JN 1:15' and state.reference != '2CO 13:13' \
+                and state.reference != 'ACT 19:40':
+                self.reportError(f"Chapter normally has {nVerses(state.ID, state.chapter)} verses: {state.reference}", 8)
+
+    def verifyFootnotes(self):
+        state = self.state
+        if state.footnote_starts != state.footnote_ends:
+            self.reportError("Mismatched footnote tags (" + str(state.footnote_starts) + " started and " + str(state.footnote_ends) + " ended) in " + state.ID, 9)
+        if state.endnote_starts != state.endnote_ends:
+            self.reportError("Mismatched endnote tags (" + str(state.endnote_starts) + " started and " + str(state.endnote_ends) + " ended) in " + state.ID, 10)
+
+    # Checks whether the entire file was empty or unreadable
+    def verifyNotEmpty(self, filename):
+        state = self.state
+        if not state.ID or state.chapter == 0:
+            if not state.ID in {'FRT','BAK'}:
+                self.reportError("File may be empty, or open in another program: " + filename, 11)
+
+    def verifyChapterCount(self):
+        state = self.state
+        if state.ID and state.chapter != nChapters(state.ID):
+            self.reportError("There should be " + str(nChapters(state.ID)) + " chapters in " + state.ID + " but " + str(state.chapter) + " chapters are found.", 12)
+
+    # \b is used to indicate additional white space between paragraphs.
+    # No text or verse marker should follow this marker
+    # and it should not be used before or after titles to indicate white space.
+    def takeB(self):
+        self.state.addB()
+
+    # Processes a chapter tag
+    def takeC(self, c):
+        state = self.state
+        # Report missing text in previous verse
+        if c != "1":
+            self.previousVerseCheck()
+            # self.longChunkCheck()
+        state.addChapter(c)
+        if len(state.IDs) == 0:
+            self.reportError("Missing ID before chapter: " + c, 13)
+        if state.chapter < state.lastChapter:
+            self.reportError("Chapter out of order: " + state.reference, 14)
+        elif state.chapter == state.lastChapter:
+            self.reportError("Duplicate chapter: " + state.reference, 15)
+        elif state.chapter > state.lastChapter + 2:
+            self.reportError("Missing chapters before: " + state.reference, 16)
+        elif state.chapter > state.lastChapter + 1:
+            self.reportError("Missing chapter(s) between: " + state.lastRef + " and " + state.reference, 17)
+
+    # Processes a chapter label
+    def takeCL(self, label):
+        # Report missing text in previous verse
+        title = self.state.addChapterLabel(label.rstrip())   # gets title without chapter number, but spacing unchanged
+        if len(self.std_titles) > 0:
+            if title not in self.std_titles:
+                self.reportError(f"Non-standard chapter label at {self.state.reference}: {label}", 42)
+
+    # Handles all the footnote and endnote token types
+    def takeFootnote(self, token):
+        state = self.state
+        if token.isF_S() or token.isRQS():
+            if state.footnote_starts != state.footnote_ends:
+                self.reportError(f"Footnote starts before previous one is terminated at {state.reference}", 18)
+            state.addFootnoteStart()
+        elif token.isFE_S():
+            if state.endnote_starts != state.endnote_ends:
+                self.reportError(f"Endnote starts before previous one is terminated at {state.reference}", 19)
+            self.reportError(f"Warning: endnote \\fe ... \\fe* at {state.reference} may break USFM Converter and Scripture App Builder.", 20)
+            state.addEndnoteStart()
+        elif token.isF_E() or token.isRQE():
+            state.addFootnoteEnd()
+        elif token.isFE_E():
+            state.addEndnoteEnd()
+        else:
+            if not state.inFootnote():
+                self.reportError(f"Footnote marker ({token.type}) not between \\f ... \\f* pair at {state.reference}", 21)
+        self.takeText(token.value, footnote=True)
+
+    def takeID(self, id):
+        if len(id) < 3:
+            self.reportError("Invalid ID: " + id, 22)
+        id = id[0:3].upper()
+        self.checkBookID(id)
+        self.state.addID(id)
+
+    # Reports a book ID that has already been seen, in this file or an earlier one.
+    def checkBookID(self, id):
+        if self.fileResult:
+            self.fileResult.add('id', self.state.reference, id)    # checked when the result is merged, in file order
+            return
+        if id in self.bookIDs:
+            self.reportError("Duplicate ID: " + id, 23)
+        self.bookIDs.append(id)
+
+    def reportParagraphMarkerErrors(self, type):
+        state = self.state
+        if state.currMarkerType in {QQ,PP} and not self.suppress[4]:
+            self.reportError("Warning: back to back paragraph/poetry markers after: " + state.reference, 24)
+        if state.needText() and not isOptional(state.reference):
+            self.reportError("Paragraph marker after verse marker, or empty verse: " + state.reference, 25)
+        if type == 'nb' and state.currMarkerType != C:
+            self.reportError("\\nb marker should follow chapter marker: " + state.reference, 25.1)
+
+    def takeP(self, type):
+        state = self.state
+        self.reportParagraphMarkerErrors(type)
+        if not self.aligned_usfm and not self.suppress[3] and not state.sentenceEnded():
+            if state.verse > 0:
+                self.reportError(f"Punctuation missing at end of paragraph: {state.reference}", 26, self.suppress[11])
+            else:
+                self.reportError(f"Punctuation missing at end of paragraph before {state.reference}", 26.1, self.suppress[11])
+        state.addParagraph() if type != 'nb' else state.addNB()
+
+    def takeQ(self, type):
+        self.reportParagraphMarkerErrors(type)
+        self.state.addPoetry()
+
+    def takeS5(self):
+        # self.longChunkCheck()
+        self.state.addS5()
+        self.takeSection('s5')
+
+    def takeSection(self, tag):
+        state = self.state
+        if not self.suppress[4]:
+            if state.currMarkerType == PP:
+                self.reportError(f"Warning: useless paragraph (p,m,nb) marker before \\{tag} marker at: {state.reference}", 27)
+            elif state.currMarkerType == QQ:
+                self.reportError(f"Warning: useless \q before \\{tag} marker at: {state.reference}", 28)
+            elif state.currMarkerType == B:
+                self.reportError(f"\\b may not be used before or after section heading. {state.reference}", 29)
+        state.addSection()
+
+    def takeTitle(self, token):
+        state = self.state
+        if token.isTOC3():
+            state.addToc3(token.value)
+            if self.usfm_version == 2:
+                if (len(token.value) != 3 or not token.value.isascii()):
+                    self.reportError("Invalid toc3 value in " + state.reference, 64)
+                elif token.value.upper() != state.ID:
+                    self.reportError(f"toc3 value ({token.value}) not the same as book ID in {state.reference}", 64.5)
+        else:
+            state.addTitle(token.value)
+        if token.isMT() and token.value.isascii() and not self.suppress[9]:
+            self.reportError("mt token has ASCII value in " + state.reference, 30)
+        if token.value.isupper() and not state.upperCaseReported and not self.suppress[8]:
+            self.reportError("Upper case book title in " + state.reference, 31)
+            state.reportedUpperCase()
+        if token.value.startswith("Ii"):
+            self.reportError(f"Mixed case roman numerals in \\{token.type} field", 31.1)
+        if state.currMarkerType == B:
+            self.reportError("\\b may not be used before or after titles or headings. " + state.reference, 32)
+
+    # Receives a string containing a verse number or range of verse numbers.
+    # Reports missing text in previous verse.
+    # Reports errors related to the verse number(s), such as missing or duplicated verses.
+    def takeV(self, vstr):
+        state = self.state
+        if state.currMarkerType == B:
+            self.reportError(f"\\b should be used only between paragraphs. {state.reference}", 33)
+        if vstr != "1":
+            self.previousVerseCheck()   # Checks previous verse
+        vlist = []
+        if vstr.find('-') > 0:
+            vv_range = vv_re.search(vstr)
+            if vv_range:
+                vnStart = int(vv_range.group(1))
+                vnEnd = int(vv_range.group(2))
+                # while vn <= vnEnd:
+                #     vlist.append(vn)
+                #     vn += 1
+                for vn in range(vnStart, vnEnd + 1):
+                    vlist.append(vn)
+            else:
+                self.reportError("Problem in verse range near " + state.reference, 34)
+        else:
+            vlist.append(int(vstr))
+
+        for vn in vlist:
+            v = str(vn)
+            state.addVerse(str(vn))
+            if len(state.IDs) == 0 and state.chapter == 0:
+                self.reportError("Missing ID before verse: " + v, 35)
+            if state.chapter == 0:
+                self.reportError("Missing chapter tag: " + state.reference, 36)
+            if state.verse == 1 and state.needPP:
+                self.reportError("Need paragraph marker before: " + state.reference, 37, self.suppress[2])
+            if state.needQQ:
+                self.reportError("Need \\q or \\p after acrostic heading before: " + state.reference, 38)
+                state.resetPoetry()
+            if state.verse < state.lastVerse and state.addError(state.lastRef):
+                self.reportError("Verse out of order: " + state.reference + " after " + state.lastRef, 39)
+                state.addError(state.reference)
+            elif state.verse == state.lastVerse:
+                self.reportError("Duplicated verse number: " + state.reference, 40)
+            elif state.verse == state.lastVerse + 2 and not isOptional(state.reference, True):
+                if state.addError(state.lastRef):
+                    self.reportError("Missing verse between: " + state.lastRef + " and " + state.reference, 41)
+            elif state.verse > state.lastVerse + 2 and state.addError(state.lastRef):
+                self.reportError("Missing verses between: " + state.lastRef + " and " + state.reference, 41.1)
+
+    # Looks for possible verse references and square brackets in the text, not preceded by a footnote marker.
+    # This function is only called when parsing a piece of text preceded by a verse marker.
+    def reportFootnotes(self, text):
+        state = self.state
+        if not isFootnote(self.lastToken):
+            if ref := reference_re.search(text):
+                self.reportFootnote(ref.group(0))
+            elif ('(' in text or '[' in text or ')' in text) and (isOptional(state.reference) or state.reference in footnoted_verses.footnotedVerses):
+                self.reportFootnote('(')
+            elif "[" in text:
+                fn = bracketed_re.search(text)
+                if not fn or ' ' in fn.group(1):    # orphan [, or more than one word between brackets
+                    self.reportFootnote('[')
+
+    def reportFootnote(self, trigger):
+        reference = self.state.reference
+        if ':' in trigger:
+            self.reportError(f"Probable chapter:verse reference ({trigger}) at {reference} belongs in a footnote", 43)
+        elif isOptional(reference) or reference in footnoted_verses.footnotedVerses:
+            self.reportError(f"Bracket or parens found in {reference}, a verse that is often footnoted", 43.1)
+        else:
+            self.reportError(f"Optional text or untagged footnote at {reference}", 43.2)
+
+    # Warns when a paragraph break appears in what seems to be the middle of a sentence.
+    # Warns when the specified string is supposed to start a sentence but the first word is not capitalized.
+    # Warns when a sentence later in the string does not start with a capital letter.
+    def reportCaps(self, s):
+        state = self.state
+        if state.needCaps():
+            word = sentences.firstword(s)
+            if word and word[0].islower():
+                if state.currMarkerType == PP or state.prevMarkerType == PP:
+                    self.reportError(f"First word of paragraph not capitalized near {state.reference}", 44, self.suppress[10])
+                else:
+                    self.reportError(f"First word in sentence is not capitalized: \"{word}\" at {state.reference}", 44.1, self.suppress[10])
+        for word in sentences.nextfirstwords(s):
+            if word[0].islower():
+                self.reportError(f"First word in sentence is not capitalized: \"{word}\" in {state.reference}", 44.1, self.suppress[10])
+
+    def reportPunctuation(self, text):
+        state = self.state
+        if bad := punctuation_re.search(text):
+            i = bad.start()
+            if text[i:i+3] != '...' or text[i:i+4] == "....":
+                chars = bad.group(1)
+                if not (chars[0] in ',.' and chars[1] in "0123456789"):   # it's a number
+                    if not (chars[0] == ":" and chars[1] in "0123456789"):
+                        self.reportError("Check the punctuation at " + state.reference + ": " + chars, 45)
+                    elif not (state.inFootnote() or self.lastToken.getType().startswith('io') \
+                              or self.lastToken.getType().startswith('ip')):
+                        s = context(text, bad.start()-2, bad.end()+1)
+                        self.reportError(f"Untagged footnote (probable) at {state.reference}: {s}", 46)
+        #if bad := adjacent_re.search(text):
+            #i = bad.start()
+            #if text[i:i+3] != "..." or text[i:i+4] == "....":   # Don't report proper ellipses ...
+                #self.reportError("Check repeated punctuation at " + state.reference + ": " + bad.group(1), 47)
+        if bad := spacey_re.search(text):
+            self.reportError("Space before phrase ending mark at " + state.reference + ": " + bad.group(1), 48)
+        if bad := outsidequote_re.search(text):
+            i = bad.start()
+            if text[i+1:i+4] != "...":
+                self.reportError(f"Punctuation after quote mark at {state.reference}: {bad.group(1)}", 50)
+
+        if bad := spacey2_re.search(text):
+            s = context(text, bad.start()-2, bad.end()+2)
+        elif bad := spacey3_re.match(text):
+            s = context(text, 0, bad.end()+2)
+        elif bad := spacey4_re.search(text):
+            s = context(text, bad.start()-2, len(text))
+        if bad:
+            self.reportError(f"Free floating mark at {state.reference}: {s}", 49)
+
+        if "''" in text or '""' in text:
+            self.reportError("Repeated quotes at " + state.reference, 51)
+        bad = wordmedial_punct_re.search(text)
+        if bad and text[bad.end()-1] not in "0123456789":
+            s = context(text, bad.start(), bad.end())
+            self.reportError(f"Word medial punctuation in {state.reference}: {s}", 52)
+        if '/' in text:
+            self.reportError(f"Forward slash in {state.reference}", 52.1)
+        if '\\' in text:
+            self.reportError(f"Backslash in {state.reference}", 52.2)
+        if '=' in text:
+            self.reportError(f"Equals sign (=) in {state.reference}", 52.3)
+
+    def reportNumbers(self, t, footnote):
+        state = self.state
+        verseflag = False
+        if not footnote:
+            if t.startswith(str(state.verse) + " "):
+                self.reportError("Verse number in text (probable): " + state.reference, 59)
+                verseflag = True
+            elif v := number_re.search(t):
+                while v:
+                    if v.group(1) == str(state.verse) or v.group(1) == str(state.verse+1):
+                        self.reportError(f"Possible verse number ({v.group(1)}) in text at {state.reference}", 59.1)
+                        verseflag = True
+                    v = number_re.search(t, v.end()-1)
+            if not verseflag:
+                chapverse = chapverse_re.search(t)
+                while chapverse:
+                    if chapverse.group(2) == ":" or int(chapverse.group(3)) > int(chapverse.group(1)):
+                        self.reportError(f"Likely verse reference ({chapverse.group(0)}) in text at {state.reference}", 59.2)
+                        verseflag = True
+                    chapverse = chapverse_re.search(t, chapverse.end())
+        if embed := numberembed_re.search(t):
+            self.reportError(f"Embedded number in word: {embed.group(0)} at {state.reference}", 60)
+        elif not verseflag:
+            if suffixed := numbersuffix_re.search(t):
+                if not footnote:
+                    self.reportError(f"Invalid number suffix: {suffixed.group(0)} at {state.reference}", 60.2)
+            if prefixed := numberprefix_re.search(t):
+                if not footnote or (prefixed.group(0)[0] not in {':','-'}):
+                    self.reportError(f"Invalid number prefix: {prefixed.group(0)} at {state.reference}", 60.1)
+        if unsegmented := unsegmented_re.search(t):
+            if len(unsegmented.group(0)) > 4:
+                self.reportError(f"Unsegmented number: {unsegmented.group(0)} at {state.reference}", 61.5)
+        if fmt := numberformat_re.search(t):
+            self.reportError(f"Space in number {fmt.group(0)} at {state.reference}", 61.6)
+        elif leadzero := leadingzero_re.search(t):
+            self.reportError(f"Invalid leading zero: {leadzero.group(0)} at {state.reference}", 61)
+
+    # Performs checks on some text, at most a verse in length.
+    def takeText(self, t, footnote=False):
+        state = self.state
+        lastToken = self.lastToken
+        if not state.textOkay() and not isTextCarryingToken(lastToken):
+            if t[0] == '\\':
+                self.reportError("Uncommon or invalid marker near " + state.reference, 53)
+            else:
+                # print u"Missing verse marker before text: <" + t.encode('utf-8') + u"> around " + state.reference
+                # reportError(u"Missing verse marker or extra text around " + state.reference + u": <" + t[0:10] + u'>.')
+                self.reportError("Missing verse marker or extra text near " + state.reference, 54)
+            if lastToken:
+                self.reportError("  preceding Token was \\" + lastToken.getValue(), 0)
+            else:
+                self.reportError("  no preceding Token", 0)
+        if state.textOkay() and state.verse == 0:
+            self.reportError(f"Unmarked text before {state.reference + ':1'}", 76)
+        if "<" in t and not ">" in t:
+            if "<< HEAD" in t:
+                self.reportError("Unresolved translation conflict near " + state.reference, 55)
+            else:
+                self.reportError("Angle bracket not closed at " + state.reference, 56)
+        if "Conflict Parsing Error" in t:
+            self.reportError("BTT Writer artifact in " + state.reference, 57)
+        if not self.suppress[3] and not self.aligned_usfm:    # report punctuation issues
+            self.reportPunctuation(t)
+        if period := period_re.match(t):    # text starts with a period
+            if len(t) <= period.end() + 1:
+                self.reportError(f"Orphaned punctuation at {state.reference}", 58)
+            else:
+                self.reportError("Text begins with phrase-ending punctuation in " + state.reference, 58.1)
+        if lastToken.isV() and not self.aligned_usfm:
+            self.reportFootnotes(t)
+        if not self.suppress[1]:
+            self.reportNumbers(t, footnote)
+        if not footnote:
+            self.reportCaps(t)
+            state.endSentence( sentences.endsSentence(t) )
+        state.addText(t)
+        self.addWords(t)
+
+    def addWords(self, t):
+        state = self.state
+        wordlist = self.wordlist
+        for item in t.split():
+            word = item.strip(".,:;!?+-[]{}()<>\"“‘’”*/")
+            if quoteend_re.search(word):
+                word = word.rstrip(allpunc)
+            if word:
+                if not state.inFootnote() or notnumberinfootnote_re.search(word):
+                    (count, ref) = wordlist.get(word, (0, None))
+                    ref = state.reference if count == 0 else ""
+                    wordlist[word] = (count+1, ref)
+
+    def take(self, token):
+        state = self.state
+        if not token.isTEXT():
+            if not state.addMarker(token.type):
+                self.reportError(f"Back to back markers of type {token.type} at {state.reference}", 62)
+        else:
+            self.takeText(token.value, state.inFootnote())
+
+        if token.isID():
+            self.takeID(token.value)
+        elif token.isC():
+            if not self.suppress[5]:
+                self.verifyVerseCount()  # for the preceding chapter
+            if not state.ID:
+                self.reportError("Missing book ID: " + state.reference, 62.1)
+                sys.exit(-1)
+            if token.value == "1":
+                self.verifyBookTitle()
+            self.takeC(token.value)
+        elif token.isCL():
+            self.takeCL(token.value)
+        elif token.isP() or token.isPI() or token.isPC() or token.isNB() or token.isM():
+            self.takeP(token.type)
+            if token.value:     # paragraph markers can be followed by text
+                self.reportError("Unexpected: text returned as part of paragraph token." +  state.reference, 63)
+                self.takeText(token.value)
+        elif token.isV():
+            self.takeV(token.value)
+        elif isFootnote(token):
+            self.takeFootnote(token)
+        elif token.isS5():
+            self.takeS5()
+        elif token.isS() or token.isMR() or token.isMS() or token.isD() or token.isSP():
+            self.takeSection(token.type)
+        elif token.isQA():
+            state.addAcrosticHeading()
+        elif isPoetry(token):
+            self.takeQ(token.type)
+        elif token.isB():
+            self.takeB()
+        elif isTitleToken(token):
+            self.takeTitle(token)
+        elif token.isUSFM():    # non-standard USFM token but is used by UnfoldingWord software
+            self.usfm_version = int(token.value[0])
+        elif token.isUnknown():
+            if token.value == "p":
+                self.reportError("Orphaned paragraph marker after " + state.reference, 65)
+            elif token.value == "v":
+                self.reportError("Unnumbered verse after " + state.reference, 66)
+            elif self.usfm_version == 2:
+                self.reportError("Invalid USFM token (\\" + token.value + ") near " + state.reference, 67)
+
+        if self.language_code in {"ur"} and isNumericCandidate(token) and re.search(r'[0-9]', token.value):
+            self.reportError("Arabic numerals in footnote at " + state.reference, 68)
+
+        self.lastToken = token
+
+    # Reports the bad chapter and verse patterns found by the whole file scan.
+    # The line numbers are reported if lineNumbers is True.
+    def verifyChapterAndVerseMarkers(self, scan, path, lineNumbers=True):
+        def where(lineno):
+            return f" at line {lineno} in {path}" if lineNumbers else " in " + path
+        for (badactor, lineno) in scan.get(bad_chapter_re1):
+            self.reportError("Missing newline before chapter marker: " + badactor.group(1) + where(lineno), 69)
+        for (badactor, lineno) in scan.get(bad_chapter_re2):
+            self.reportError("Missing space before chapter number: " + badactor.group(0) + where(lineno), 70)
+        for (badactor, lineno) in scan.get(bad_chapter_re3):
+            self.reportError("Missing space after chapter number: " + badactor.group(1) + where(lineno), 71)
+        for (badactor, lineno) in scan.get(bad_verse_re1):
+            s = badactor.group(1)
+            if s[0] < ' ' or s[0] > '~': # not printable ascii
+                s = s[1:]
+            self.reportError("Missing white space before verse marker: " + s + where(lineno), 72)
+        for (badactor, lineno) in scan.get(bad_verse_re2):
+            self.reportError("Missing space before verse number: " + badactor.group(0) + where(lineno), 73)
+        for (badactor, lineno) in scan.get(bad_verse_re3):
+            s = badactor.group(1)
+    #        if s[-1] < ' ' or s[-1] > '~': # not printable ascii
+    #            s = s[:-1]
+            self.reportError("Missing space after verse number: " + s + where(lineno), 74)
+
+    def verifyParagraphCount(self):
+        state = self.state
+        if state.nParagraphs / state.chapter <= 2.5 and state.nPoetry / state.chapter <= 15:
+            self.reportError(f"Low paragraph count ({state.nParagraphs + state.nPoetry}) for {state.ID}", 73.5)
+
+    # Receives the text of an entire book as input, and the WholeFileScan of it.
+    # Verifies things that are better done as a whole file.
+    # Can't report verse references because we haven't started to parse the book yet.
+    def verifyWholeFile(self, contents, path, scan, lineNumbers=True):
+        self.verifyChapterAndVerseMarkers(scan, path, lineNumbers)
+
+        for (match, lineno) in scan.get('orphan'):
+            self.reportError("Unmarked text at line " + str(lineno) + " in " + path, 76)
+
+        if not self.suppress[6]:
+            nembedded = scan.nembedded
+            nsingle = scan.nsingle
+            ndouble = scan.ndouble
+            if ndouble > 0:
+                if nsingle == 0 or self.suppress[7]:
+                    self.reportError(f"Straight quotes in {self.shortname(path)}: {ndouble} doubles.", 75)
+                else:
+                    self.reportError(f"Straight quotes in {self.shortname(path)}: {ndouble} doubles, {nsingle} singles not counting {nembedded} word-medial.", 75)
+            elif nsingle > 0 and not self.suppress[7]:
+                self.reportError(f"Straight quotes in {self.shortname(path)}: {nsingle} singles not counting {nembedded} word-medial.", 75)
+
+    # Verifies the specified usfm file.
+    # The whole text is read into memory, because the whole file checks and unaligning need all of it.
+    def verify_file(self, path):
+        input = io.open(path, "r", buffering=1, encoding="utf-8-sig")
+        contents = input.read(-1)
+        input.close()
+        self.verify_text(contents, path)
+
+    # Verifies the specified usfm text, as if it were the contents of the file at path.
+    # Corresponding entry point in tx-manager code is verify_contents_quiet()
+    def verify_text(self, contents, path):
+        self.state = state = State()
+        self.lastToken = None
+        self.usfm_version = 2
+
+        # One pass over the file for the whole file checks. Aligned usfm gets a second pass once it is unaligned.
+        self.aligned_usfm = ("lemma=" in contents or "x-occurrences" in contents)
+        scan = WholeFileScan(contents, wholeChecks = not self.aligned_usfm)
+        if scan.get('wjwj'):
+            self.reportError(f"Empty \\wj \\wj* pair(s) in {self.shortname(path)}, first at line {scan.get('wjwj')[0][1]}", 77)
+        if scan.get('eol'):
+            self.reportError(f"Stranded backslash(es) at end of line(s) in {self.shortname(path)}, first at line {scan.get('eol')[0][1]}", 78)
+        if scan.get('null'):
+            self.reportError(f"Null bytes found in {self.shortname(path)}, first at line {scan.get('null')[0][1]}", 79)
+        if self.aligned_usfm:
+            contents = usfm_utils.unalign_usfm(contents)
+
+        if len(contents) < 100:
+            self.reportError("Incomplete file: " + self.shortname(path), 80)
+        else:
+            self.reportProgress(f"CHECKING {self.shortname(path)}...")
+            sys.stdout.flush()
+            if self.aligned_usfm:
+                scan = WholeFileScan(contents, fileChecks = False)
+            self.verifyWholeFile(contents, self.shortname(path), scan, lineNumbers = not self.aligned_usfm)
+            for token in parseUsfm.iterString(contents, self.parse_jobs):     # tokens one chapter at a time; the text is still all in memory
+                self.take(token)
+            if (self.usfm_version == 2 or self.aligned_usfm) and not state.toc3:
+                self.reportError("No \\toc3 tag in " + self.shortname(path), 81)
+            self.previousVerseCheck()       # checks last verse in the file
+            self.verifyNotEmpty(path)
+            if not self.suppress[5]:
+                self.verifyVerseCount()      # for the last chapter
+            self.verifyChapterCount()
+            self.verifyFootnotes()
+            self.verifyChapterTitles()
+            self.verifyParagraphCount()
+            state.addID("")
+            sys.stderr.flush()
+
+    # Verifies all .usfm files under the specified folder.
+    # If jobs > 1, the files are verified in that many worker processes.
+    # If incremental, only the files that have changed since the last incremental run are verified.
+    # Either way, the output is the same as verifying one file at a time.
+    def verify_dir(self, dir, jobs=1, incremental=False):
+        cache = verify_cache.FolderCache(dir, self.cacheSettings()) if incremental else None
+        try:
+            if jobs > 1:
+                self.verifyDirParallel(dir, jobs, cache)
+            elif cache:
+                self.verifyDirCached(dir, cache)
+            else:
+                for path in usfmPaths(dir):
+                    self.verify_file(path)
+        finally:
+            if cache:
+                cache.save()
+
+    # Verifies all .usfm files under the specified folder, using the specified number of worker processes.
+    # The results are merged in the same order that usfmPaths() generates the files,
+    # so the output is the same as verifying them one at a time.
+    # If a cache is specified, only the files that have changed since the cache entry was saved are verified.
+    def verifyDirParallel(self, dir, jobs, cache=None):
+        settings = self.settings()
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            pending = [self.cachedFileResult(cache, path) or pool.submit(verifyFileInWorker, path, settings)
+                       for path in usfmPaths(dir)]
+            try:
+                for item in pending:
+                    if isinstance(item, FileResult):
+                        result = item
+                    else:
+                        result = item.result()
+                        self.cacheFileResult(cache, result)
+                    self.mergeFileResult(result)
+            except BaseException:
+                for item in pending:
+                    if not isinstance(item, FileResult):
+                        item.cancel()
+                raise
+
+    # Verifies all .usfm files under the specified folder that have changed since the cache entry was saved.
+    # Replays the findings of the unchanged files, so the output is the same as verifying them all.
+    def verifyDirCached(self, dir, cache):
+        for path in usfmPaths(dir):
+            if not (result := self.cachedFileResult(cache, path)):
+                result = self.collectFileResult(path)
+                self.cacheFileResult(cache, result)
+            self.mergeFileResult(result)
+
+    # Returns the FileResult recorded in the cache for the specified file, or None if the file has changed.
+    def cachedFileResult(self, cache, path):
+        if cache and (entry := cache.get(path)):
+            result = FileResult(path)
+            (result.messages, result.words) = entry
+            return result
+        return None
+
+    def cacheFileResult(self, cache, result):
+        if cache and not result.exception:
+            cache.put(result.path, result.messages, result.words)
+
+    # Returns the settings that the findings for a file depend on, besides the file itself.
+    def cacheSettings(self):
+        code = verify_cache.codeVersion([sys.modules[__name__], parseUsfm, usfm_verses, footnoted_verses,
+                                         usfm_utils, sentences])
+        return (code, tuple(self.suppress), tuple(self.std_titles), self.language_code)
+
+    # Verifies the specified file, collecting the findings in a FileResult instead of reporting them.
+    # Returns the FileResult.
+    def collectFileResult(self, path):
+        mainWordlist = self.wordlist
+        self.fileResult = result = FileResult(path)
+        self.wordlist = result.words
+        try:
+            self.verify_file(path)
+        except (SystemExit, Exception) as e:
+            result.exception = e
+        finally:
+            self.fileResult = None
+            self.wordlist = mainWordlist
+        return result
+
+    # Reports the findings of a file verified in a worker process, and adds its words to the word list.
+    def mergeFileResult(self, result):
+        wordlist = self.wordlist
+        for (kind, reference, args) in result.messages:
+            self.state.reference = reference     # for write()
+            if kind == 'error':
+                self.reportError(*args)
+            elif kind == 'progress':
+                self.reportProgress(*args)
+            elif kind == 'status':
+                self.reportStatus(*args)
+            elif kind == 'id':
+                self.checkBookID(*args)
+        for word, (count, ref) in result.words.items():
+            if word in wordlist:
+                wordlist[word] = (wordlist[word][0] + count, "")
+            else:
+                wordlist[word] = (count, ref)
         sys.stdout.flush()
-        tokens = parseUsfm.parseString(contents)    # Slow!
-        verifyWholeFile(contents, shortname(path))  # placed after parseUsfm so that its error messages come after the long parsing time pause
-        for token in tokens:
-            take(token)
-        if (usfm_version == 2 or aligned_usfm) and not state.toc3:
-            reportError("No \\toc3 tag in " + shortname(path), 81)
-        previousVerseCheck()       # checks last verse in the file
-        verifyNotEmpty(path)
-        if not suppress[5]:
-            verifyVerseCount()      # for the last chapter
-        verifyChapterCount()
-        verifyFootnotes()
-        verifyChapterTitles()
-        verifyParagraphCount()
-        state.addID("")
         sys.stderr.flush()
+        if result.exception:
+            raise result.exception
 
-# Verifies all .usfm files under the specified folder.
-def verifyDir(dir):
-    dirpath = Path(dir)
-    for path in dirpath.iterdir():
-        if path.name[0] != '.':         # ignore hidden files
-            if path.is_dir():
-                # It's a directory, recurse into it
-                verifyDir(path)
-            elif path.is_file() and path.name[-3:].lower() == 'sfm':
-                verifyFile(path)
+# Verifies the specified file in a worker process, with the settings of the verifier in the main process.
+# Returns a FileResult.
+def verifyFileInWorker(path, settings):
+    return UsfmVerifier(**settings).collectFileResult(path)
 
 def main(app=None):
-    global config
-    global suppress
-    global language_code
-    global gui
-
-    gui = app
     config = configmanager.ToolsConfigManager().get_section('VerifyUSFM')   # configmanager version
     if config:
         source_dir = config['source_dir']
+        suppress = [False]*12
         for i in range(1, len(suppress)):
             suppress[i] = config.getboolean('suppress'+str(i), fallback = False)
-        language_code = config['language_code']
-        if language_code in {'diu','en','es','es-419','gl','ha','hr','id','kcn','kpj','nag','plt','pmy','pt-br','sw','tl','tpi'}:    # ASCII content
-            suppress[9] = True
-        if language_code in {'as','bn','gu','hi','kn','ml','mr','nag','ne','or','pa','ru','ta','te','zh'}:    # ASCII content
-            suppress[9] = False
-        global std_titles
         std_titles = [ config.get('standard_chapter_title', fallback = '') ]
         if std_titles == ['']:
             std_titles = []
-        uv = config.get('usfm_version', fallback = "2")
-        usfm_version = int(uv[0])
-
-        global state
-        state = State()
-        global issues
-        issues = dict()
+        verifier = UsfmVerifier(source_dir, config['language_code'], suppress, std_titles,
+                                parse_jobs = config.getint('parse_jobs', fallback = 1), gui = app)
 
         file = config['filename']    # configmanager version
 
         if file:
             path = os.path.join(source_dir, file)
             if os.path.isfile(path):
-                verifyFile(path)
+                verifier.verify_file(path)
             else:
-                reportError(f"No such file: {path}")
-        else:
-            verifyDir(source_dir)
-
-        global issuesFile
-        if issuesFile:
-            reportIssues()
-            issuesFile.close()
-            issuesFile = None
+                verifier.reportError(f"No such file: {path}")
         else:
-            reportStatus("No issues to report.")
-        dumpWords()
-        reportStatus("\nDone.")
-        sys.stdout.flush()
-    if gui:
-        gui.event_generate('<<ScriptEnd>>', when="tail")
+            verifier.verify_dir(source_dir, config.getint('verify_jobs', fallback = 1),
+                                config.getboolean('incremental', fallback = False))
+        verifier.finish()
+    if app:
+        app.event_generate('<<ScriptEnd>>', when="tail")
 
 if __name__ == "__main__":
     main()
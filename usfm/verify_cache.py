@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# On-disk cache of verifyUSFM findings, one entry per folder of usfm files.
+# An entry holds, for each file in the folder, a hash of the file contents with the
+# messages and words that verifying the file produced.
+# verifyUSFM replays the findings of unchanged files instead of verifying them again.
+# Each entry also records the settings it was made with: the verify options and
+# a hash of the verifier code. An entry made with other settings is not used.
+
+import hashlib
+import marshal
+import os
+import struct
+import zlib
+
+cache_dir = os.path.expanduser("~/AppData/Local/usfm_wizard/verify_cache")
+
+# Errors that mean a cache entry is unreadable
+readErrors = (OSError, ValueError, EOFError, TypeError, struct.error, zlib.error)
+
+# Returns a hash of the source files of the specified modules,
+# which changes whenever the verifier code changes.
+def codeVersion(modules):
+    h = hashlib.sha1(f"{marshal.version}\n".encode('utf-8'))
+    for module in modules:
+        with open(module.__file__, 'rb') as input:
+            h.update(input.read())
+    return h.hexdigest()
+
+# Returns a hash of the contents of the specified file.
+def fileHash(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as input:
+        while block := input.read(1 << 20):
+            h.update(block)
+    return h.hexdigest()
+
+def entryPath(dir):
+    key = hashlib.sha1(os.path.abspath(dir).encode('utf-8', 'surrogatepass')).hexdigest()
+    return os.path.join(cache_dir, key + ".bin")
+
+# The cached findings for the files in one folder.
+# get() returns the findings recorded for a file, if the file has not changed since.
+# put() records new findings, and save() writes the entry for the files seen by get() and put().
+# Failure to read or write the cache is not an error; the files just get verified again.
+class FolderCache:
+    def __init__(self, dir, settings):
+        self.dir = dir
+        self.path = entryPath(dir)
+        self.settings = settings
+        self.entries = dict()   # relative path => (hash, messages, words), as read from the cache
+        self.seen = dict()      # the same, for the files verified or replayed in this run
+        self.hashes = dict()
+        try:
+            with open(self.path, 'rb') as input:
+                (settings, entries) = marshal.loads(zlib.decompress(input.read()))
+            if settings == self.settings:
+                self.entries = entries
+        except readErrors:
+            pass
+
+    def key(self, path):
+        return os.path.relpath(path, self.dir)
+
+    # Returns the (messages, words) recorded for the specified file, or None if the file has changed.
+    def get(self, path):
+        key = self.key(path)
+        hash = self.hashes[key] = fileHash(path)
+        entry = self.entries.get(key)
+        if entry and entry[0] == hash:
+            self.seen[key] = entry
+            return entry[1:]
+        return None
+
+    # Records the findings for the specified file, which was passed to get() first.
+    def put(self, path, messages, words):
+        key = self.key(path)
+        self.seen[key] = (self.hashes[key], messages, words)
+
+    # Writes the entry for this folder. Files not seen in this run are dropped.
+    def save(self):
+        temppath = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(temppath, 'wb') as output:
+                output.write(zlib.compress(marshal.dumps((self.settings, self.seen)), 1))
+            os.replace(temppath, self.path)     # atomic, in case another run is reading the entry
+        except (OSError, ValueError):
+            try:
+                os.remove(temppath)
+            except OSError:
+                pass
+
+# Removes all entries from the cache.
+def clear():
+    if os.path.isdir(cache_dir):
+        for entry in os.scandir(cache_dir):
+            if entry.name.endswith(".bin"):
+                os.remove(entry.path)